@@ -0,0 +1,117 @@
+"""
+Benchmark: get_album_and_single_artists as a join + DISTINCT (old) vs an
+EXISTS semi-join (current) on a skewed synthetic catalog.
+
+For each form it reports the intermediate rows the query produces before
+DISTINCT (singles x albums per artist for the join, one row per single
+for the semi-join), the best-of-N latency and the query plan.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_album_single.py --backend sqlite --songs 200000 --zipf 1.3
+    python bench_album_single.py --backend mysql --user mk2605 --password ... --scale medium
+"""
+import argparse
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from synthetic_catalog import SCALES, Catalog
+
+QUERIES = {
+    "join + DISTINCT": """
+        SELECT DISTINCT s.artist_name
+        FROM Song s
+        JOIN Album a ON s.artist_name = a.artist_name
+        WHERE s.album_id IS NULL
+    """,
+    "EXISTS semi-join": """
+        SELECT DISTINCT s.artist_name
+        FROM Song s
+        WHERE s.album_id IS NULL
+          AND EXISTS (SELECT 1 FROM Album a WHERE a.artist_name = s.artist_name)
+    """,
+}
+
+# rows each form produces before DISTINCT
+INTERMEDIATE = {
+    "join + DISTINCT": """
+        SELECT COUNT(*)
+        FROM Song s
+        JOIN Album a ON s.artist_name = a.artist_name
+        WHERE s.album_id IS NULL
+    """,
+    "EXISTS semi-join": """
+        SELECT COUNT(*)
+        FROM Song s
+        WHERE s.album_id IS NULL
+          AND EXISTS (SELECT 1 FROM Album a WHERE a.artist_name = s.artist_name)
+    """,
+}
+
+
+def run(mydb, sql):
+    cursor = mydb.cursor()
+    cursor.execute(sql)
+    return {row[0] for row in cursor.fetchall()}
+
+
+def best_ms(mydb, sql, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(mydb, sql)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def plan(mydb, sql):
+    prefix = "EXPLAIN QUERY PLAN " if mydb.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = mydb.cursor()
+    cursor.execute(prefix + sql)
+    return cursor.fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--tracks-per-album", type=int, default=5)
+    parser.add_argument("--zipf", type=float, default=1.2, help="artist skew")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-load", action="store_true", help="use the data already loaded")
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+
+    if not args.no_load:
+        catalog = Catalog(songs=args.songs or SCALES[args.scale],
+                          tracks_per_album=args.tracks_per_album, zipf_s=args.zipf)
+        music_db.clear_database(mydb, truncate=True)
+        music_db.load_single_songs(mydb, catalog.singles(), bulk=True)
+        music_db.load_albums(mydb, catalog.albums(), bulk=True)
+
+    results = {name: run(mydb, sql) for name, sql in QUERIES.items()}
+    same = len({frozenset(r) for r in results.values()}) == 1
+    print(f"{len(next(iter(results.values())))} artists, results identical: {same}\n")
+
+    print(f"{'query':<20}{'intermediate rows':>20}{'best ms':>12}")
+    for name, sql in QUERIES.items():
+        cursor = mydb.cursor()
+        cursor.execute(INTERMEDIATE[name])
+        intermediate = cursor.fetchone()[0]
+        print(f"{name:<20}{intermediate:>20}{best_ms(mydb, sql, args.repeat):>12.2f}")
+
+    for name, sql in QUERIES.items():
+        print(f"\nplan, {name}:")
+        for row in plan(mydb, sql):
+            print("   ", row)
+
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: clear_database with DELETE (default) vs TRUNCATE (truncate=True).
+
+Loads the same synthetic catalog before every clear and times the clear
+alone. Also reports the first genre_id handed out after each clear, which
+shows whether the AUTO_INCREMENT counters were reset.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_clear.py --backend sqlite --songs 50000
+    python bench_clear.py --backend mysql --user mk2605 --password ... --scale medium
+"""
+import argparse
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from synthetic_catalog import SCALES, Catalog
+
+
+def load(mydb, catalog):
+    music_db.load_users(mydb, catalog.users())
+    music_db.load_single_songs(mydb, catalog.singles(), bulk=True)
+    music_db.load_albums(mydb, catalog.albums(), bulk=True)
+    music_db.load_song_ratings(mydb, catalog.ratings(), bulk=True)
+
+
+def next_genre_id(mydb):
+    cursor = mydb.cursor()
+    cursor.execute("INSERT INTO Genre(name) VALUES (%s)", ("bench_clear probe",))
+    genre_id = cursor.lastrowid
+    mydb.commit()
+    return genre_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+
+    catalog = Catalog(songs=args.songs or SCALES[args.scale])
+    music_db.clear_database(mydb, truncate=True)
+
+    print(f"{'mode':<10}{'best s':>10}{'worst s':>10}{'next genre_id':>16}")
+    for mode, truncate in (("DELETE", False), ("TRUNCATE", True)):
+        times = []
+        for _ in range(args.repeat):
+            load(mydb, catalog)
+            start = time.perf_counter()
+            music_db.clear_database(mydb, truncate=truncate)
+            times.append(time.perf_counter() - start)
+        print(f"{mode:<10}{min(times):>10.3f}{max(times):>10.3f}{next_genre_id(mydb):>16}")
+        music_db.clear_database(mydb, truncate=True)
+
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
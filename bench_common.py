@@ -0,0 +1,44 @@
+"""
+Connection options shared by the bench_*.py scripts.
+
+    parser = argparse.ArgumentParser(...)
+    add_connection_arguments(parser)
+    ...
+    mydb = connect_from_args(parser.parse_args())
+
+--backend picks mysql or sqlite (default: $MUSICDB_BACKEND, then mysql);
+SQLite opens --path, MySQL uses --host/--user/--password/--database.
+"""
+import os
+
+from music_db_backends import connect
+
+BACKENDS = ("mysql", "sqlite")
+
+
+def add_connection_arguments(parser, backends=BACKENDS):
+    """
+    Adds the connection options to `parser`. Scripts that only work on
+    MySQL pass backends=("mysql",) and get no --backend/--path.
+    """
+    if len(backends) > 1:
+        parser.add_argument("--backend", choices=backends, default=None,
+                            help=f"{' or '.join(backends)} (default: $MUSICDB_BACKEND)")
+        parser.add_argument("--path", default="bench.sqlite3", help="SQLite database file")
+    else:
+        parser.set_defaults(backend=backends[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="mk2605")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="musicdb")
+
+
+def connect_from_args(args):
+    """
+    Opens the connection described by the options of add_connection_arguments.
+    """
+    backend = args.backend or os.environ.get("MUSICDB_BACKEND", "mysql")
+    if backend == "sqlite":
+        return connect("sqlite", path=args.path)
+    return connect(backend, host=args.host, user=args.user,
+                   password=args.password, database=args.database)
@@ -0,0 +1,56 @@
+"""
+Benchmark: replaying already-loaded singles and albums with the row-by-row
+loaders, conflicts="exception" (a failing INSERT per duplicate) vs
+conflicts="check" (existing keys looked up per chunk, no INSERT).
+
+Every row of the replay is a duplicate, which is the worst case for
+"exception". Also prints the per-reason counts of each run.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_conflicts.py --backend sqlite --songs 20000
+    python bench_conflicts.py --backend mysql --user mk2605 --password ... --scale medium
+"""
+import argparse
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from synthetic_catalog import SCALES, Catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--prepared", action="store_true", help="use prepared cursors")
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+
+    catalog = Catalog(songs=args.songs or SCALES[args.scale])
+    singles, albums = list(catalog.singles()), list(catalog.albums())
+    music_db.clear_database(mydb, truncate=True)
+    music_db.load_single_songs(mydb, singles, bulk=True)
+    music_db.load_albums(mydb, albums, bulk=True)
+
+    print(f"replaying {len(singles)} singles and {len(albums)} albums")
+    print(f"{'conflicts':<12}{'singles s':>12}{'albums s':>12}  counts")
+    for mode in music_db.CONFLICT_MODES:
+        stats = {}
+        start = time.perf_counter()
+        music_db.load_single_songs(mydb, singles, conflicts=mode, stats=stats, prepared=args.prepared)
+        singles_s = time.perf_counter() - start
+        start = time.perf_counter()
+        music_db.load_albums(mydb, albums, conflicts=mode, stats=stats, prepared=args.prepared)
+        albums_s = time.perf_counter() - start
+        print(f"{mode:<12}{singles_s:>12.3f}{albums_s:>12.3f}  {stats}")
+
+    music_db.clear_database(mydb, truncate=True)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
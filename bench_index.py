@@ -0,0 +1,114 @@
+"""
+Benchmark: memory and lookup time of the song keys of a catalog held as a
+dict of (title, artist_name) -> song_id, as the bulk rating loader caches
+them, vs a CatalogIndex (music_db_index.py). Memory is measured with
+tracemalloc, so it covers the strings, tuples and ints as well as the
+tables.
+
+With --load, also times load_song_ratings(bulk=True) against a database
+with and without index=... (building the index is timed separately).
+
+WARNING: --load clears the target database.
+
+Usage:
+    python bench_index.py --songs 1000000
+    python bench_index.py --backend sqlite --songs 20000 --load
+    python bench_index.py --backend mysql --user mk2605 --password ... --scale medium --load
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from music_db_index import CatalogIndex
+from synthetic_catalog import SCALES, Catalog
+
+
+def song_keys(catalog):
+    """
+    (title, artist_name) of every song of the catalog, without repeats.
+    """
+    keys = [(title, artist) for title, _, artist, _ in catalog.singles()]
+    keys += [(song_title, artist) for _, _, artist, _, song_titles in catalog.albums()
+             for song_title in song_titles]
+    return list(dict.fromkeys(keys))
+
+
+def measure(build):
+    """
+    Runs build() and returns (result, bytes allocated by it, seconds).
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    seconds = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, seconds
+
+
+def build_dict(keys):
+    # fresh copies of the strings, as they would arrive from the database
+    return {(title.encode().decode(), artist.encode().decode()): i
+            for i, (title, artist) in enumerate(keys, 1)}
+
+
+def build_index(keys):
+    index = CatalogIndex(capacity=len(keys))
+    for i, (title, artist) in enumerate(keys, 1):
+        index.add_song(title, artist, i)
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--load", action="store_true", help="also time the rating loader")
+    args = parser.parse_args()
+
+    catalog = Catalog(songs=args.songs or SCALES[args.scale])
+    keys = song_keys(catalog)
+    print(f"{len(keys)} songs")
+    print(f"{'structure':<14}{'MB':>10}{'B/song':>10}{'build s':>10}{'lookup s':>10}")
+    for name, build in (("dict", build_dict), ("CatalogIndex", build_index)):
+        table, size, build_s = measure(lambda: build(keys))
+        lookup = table.get if name == "dict" else (lambda key: table.song_id(*key))
+        start = time.perf_counter()
+        for key in keys:
+            lookup(key)
+        lookup_s = time.perf_counter() - start
+        print(f"{name:<14}{size / 2**20:>10.1f}{size / len(keys):>10.1f}{build_s:>10.3f}{lookup_s:>10.3f}")
+        del table, lookup
+
+    if not args.load:
+        return
+
+    mydb = connect_from_args(args)
+
+    ratings = list(catalog.ratings())
+    print(f"\nloading {len(ratings)} ratings")
+    for name in ("queries", "index"):
+        music_db.clear_database(mydb, truncate=True)
+        music_db.load_users(mydb, catalog.users())
+        music_db.load_single_songs(mydb, catalog.singles(), bulk=True)
+        music_db.load_albums(mydb, catalog.albums(), bulk=True)
+        index = None
+        if name == "index":
+            start = time.perf_counter()
+            index = CatalogIndex.load(mydb)
+            print(f"{'index build':<14}{time.perf_counter() - start:>10.3f}s  {index.nbytes() / 2**20:.1f} MB")
+        start = time.perf_counter()
+        music_db.load_song_ratings(mydb, ratings, bulk=True, index=index)
+        print(f"{name:<14}{time.perf_counter() - start:>10.3f}s")
+
+    music_db.clear_database(mydb, truncate=True)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Load/query benchmark for music_db on a synthetic catalog.
+
+Generates a catalog from a fixed seed (synthetic_catalog.py), times every
+load_* function (rows/sec, round trips) and every get_* function (p50/p95/
+p99 latency, round trips per call), and writes the results as JSON so runs
+of different versions can be compared.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_music_db.py --backend sqlite --scale small --output bench.json
+    python bench_music_db.py --backend mysql --user mk2605 --password ... --songs 200000 --bulk
+    python bench_music_db.py --backend sqlite --baseline old.json   # flag regressions
+"""
+import argparse
+import json
+import platform
+import random
+import subprocess
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from music_db_instrument import Instrumentation, InstrumentedMusicDB
+from synthetic_catalog import SCALES, Catalog
+
+
+def percentile(sorted_values, p):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def bench_load(db, name, rows, n_rows, **kwargs):
+    """
+    Times one call of the loader `name` on the InstrumentedMusicDB `db`.
+    """
+    start = time.perf_counter()
+    rejects = getattr(db, name)(rows, **kwargs)
+    seconds = time.perf_counter() - start
+    call = db.connection.instrumentation.stats()["last_calls"][name]
+    return {
+        "rows": n_rows,
+        "rejects": len(rejects),
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(n_rows / seconds, 1) if seconds else None,
+        "statements": call["statements"],
+        "round_trips": call["round_trips"],
+    }
+
+
+def bench_query(db, name, arg_sets):
+    """
+    Times `name` once per argument tuple; round trips come from the
+    instrumentation totals of those calls.
+    """
+    before = db.connection.instrumentation.stats()["calls"].get(name, {"round_trips": 0})
+    latencies = []
+    for args in arg_sets:
+        start = time.perf_counter()
+        getattr(db, name)(*args)
+        latencies.append((time.perf_counter() - start) * 1000)
+    after = db.connection.instrumentation.stats()["calls"][name]
+    latencies.sort()
+    return {
+        "calls": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "round_trips_per_call": (after["round_trips"] - before["round_trips"]) / len(latencies),
+    }
+
+
+def query_arguments(catalog, calls, seed):
+    """
+    Same pseudo-random query arguments for every run with this seed.
+    """
+    rng = random.Random(f"{seed}:queries")
+    first, last = catalog.years
+
+    def year_range():
+        start = rng.randint(first, last)
+        return (start, rng.randint(start, last))
+
+    every_year = [(year, year) for year in range(first, last + 1)]
+
+    return {
+        "get_most_prolific_individual_artists": [(rng.choice([5, 10, 100]), year_range()) for _ in range(calls)],
+        "get_artists_last_single_in_year": [(rng.randint(first, last),) for _ in range(calls)],
+        "get_top_song_genres": [(rng.choice([5, 10, 100]),) for _ in range(calls)],
+        "get_album_and_single_artists": [() for _ in range(calls)],
+        "get_most_rated_songs": [(year_range(), rng.choice([5, 10, 100])) for _ in range(calls)],
+        "get_most_engaged_users": [(year_range(), rng.choice([5, 10, 100])) for _ in range(calls)],
+        # one call per report: every year of the catalog
+        "get_most_prolific_individual_artists_for_ranges": [(10, every_year) for _ in range(calls)],
+        "get_most_rated_songs_for_ranges": [(every_year, 10) for _ in range(calls)],
+        "get_most_engaged_users_for_ranges": [(every_year, 10) for _ in range(calls)],
+    }
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, threshold):
+    """
+    Prints the metrics that got worse than `baseline` by more than `threshold`.
+    Returns True if there were any.
+    """
+    regressions = []
+    for name, stats in results["loads"].items():
+        old = baseline.get("loads", {}).get(name)
+        if old and old.get("rows_per_sec") and stats["rows_per_sec"] < old["rows_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: {old['rows_per_sec']} -> {stats['rows_per_sec']} rows/s")
+    for name, stats in results["queries"].items():
+        old = baseline.get("queries", {}).get(name)
+        if old and stats["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {old['p95_ms']} -> {stats['p95_ms']} ms")
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    return bool(regressions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--bulk", action="store_true", help="use the bulk loaders")
+    parser.add_argument("--batch-size", type=int, default=music_db.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--calls", type=int, default=50, help="calls per get_* function")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="regression tolerance")
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+    # counts statements and round trips per call; no slow log or EXPLAIN
+    db = InstrumentedMusicDB(mydb, Instrumentation(slow_ms=None, explain=False))
+
+    songs = args.songs or SCALES[args.scale]
+    catalog = Catalog(songs=songs, seed=args.seed)
+    load_kwargs = {"bulk": True, "batch_size": args.batch_size} if args.bulk else {}
+
+    results = {
+        "version": git_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {"backend": getattr(mydb, "dialect", None) and mydb.dialect.name,
+                   "songs": songs, "seed": args.seed, "bulk": args.bulk,
+                   "batch_size": args.batch_size, "calls": args.calls},
+        "loads": {},
+        "queries": {},
+    }
+
+    start = time.perf_counter()
+    db.clear_database()
+    results["clear_database_seconds"] = round(time.perf_counter() - start, 4)
+
+    loads = results["loads"]
+    loads["load_users"] = bench_load(db, "load_users", catalog.users(), catalog.n_users)
+    loads["load_single_songs"] = bench_load(db, "load_single_songs", catalog.singles(),
+                                            catalog.n_singles, **load_kwargs)
+    loads["load_albums"] = bench_load(db, "load_albums", catalog.albums(), catalog.n_albums, **load_kwargs)
+    loads["load_song_ratings"] = bench_load(db, "load_song_ratings", catalog.ratings(),
+                                            catalog.n_ratings, **load_kwargs)
+    for name, stats in loads.items():
+        print(f"{name:<22}{stats['rows']:>10} rows {stats['rows_per_sec']:>12} rows/s "
+              f"{stats['round_trips']:>10} round trips")
+
+    for name, arg_sets in query_arguments(catalog, args.calls, args.seed).items():
+        stats = results["queries"][name] = bench_query(db, name, arg_sets)
+        print(f"{name:<40} p50 {stats['p50_ms']:>9} ms  p95 {stats['p95_ms']:>9} ms  "
+              f"p99 {stats['p99_ms']:>9} ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressed = compare(results, json.load(f), args.threshold)
+
+    mydb.close()
+    if regressed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
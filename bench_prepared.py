@@ -0,0 +1,90 @@
+"""
+Micro-benchmark: plain cursors vs server-side prepared cursors for the
+per-row statements of the music_db loaders.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_prepared.py --user mk2605 --password ... [--rows 5000]
+"""
+import argparse
+import time
+
+from bench_common import add_connection_arguments, connect_from_args
+from music_db import clear_database, load_single_songs, load_users, load_song_ratings
+
+# The fixed statements the row-by-row loaders issue for every row
+HOT_STATEMENTS = [
+    ("artist upsert", "INSERT IGNORE INTO Artist(name) VALUES (%s)",
+     lambda i: (f"Bench Artist {i % 50}",)),
+    ("genre lookup", "SELECT genre_id FROM Genre WHERE name=%s",
+     lambda i: (f"Bench Genre {i % 10}",)),
+    ("song lookup", "SELECT song_id FROM Song WHERE title=%s AND artist_name=%s",
+     lambda i: (f"Bench Song {i}", f"Bench Artist {i % 50}")),
+]
+
+
+def time_statement(mydb, sql, make_params, rows, prepared):
+    """
+    Runs `sql` once per row and returns the mean time per row in microseconds.
+    The plain cursor interpolates the parameters client-side and the server
+    parses the full text every time; the prepared one parses it once.
+    """
+    cursor = mydb.cursor(prepared=True) if prepared else mydb.cursor()
+    start = time.perf_counter()
+    for i in range(rows):
+        cursor.execute(sql, make_params(i))
+        if cursor.description:
+            cursor.fetchall()
+    elapsed = time.perf_counter() - start
+    mydb.rollback()
+    return elapsed / rows * 1e6
+
+
+def time_loader(mydb, load, data, prepared):
+    start = time.perf_counter()
+    load(mydb, data, prepared=prepared)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    # prepared cursors are a mysql-connector feature
+    add_connection_arguments(parser, backends=("mysql",))
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+    clear_database(mydb)
+
+    print(f"Per-statement cost over {args.rows} rows (us/row)")
+    print(f"{'statement':<16}{'plain':>10}{'prepared':>10}{'saving':>10}")
+    for name, sql, make_params in HOT_STATEMENTS:
+        plain = time_statement(mydb, sql, make_params, args.rows, prepared=False)
+        prepared = time_statement(mydb, sql, make_params, args.rows, prepared=True)
+        print(f"{name:<16}{plain:>10.1f}{prepared:>10.1f}{(1 - prepared / plain) * 100:>9.1f}%")
+
+    singles = [(f"Bench Song {i}", ("Pop", "Rock"), f"Bench Artist {i % 50}", "2020-01-01")
+               for i in range(args.rows)]
+    users = [f"bench_user_{i}" for i in range(100)]
+    ratings = [(f"bench_user_{i % 100}", (f"Bench Artist {i % 50}", f"Bench Song {i}"), 4, "2023-01-01")
+               for i in range(args.rows)]
+
+    print(f"\nLoader wall time over {args.rows} rows (s)")
+    print(f"{'loader':<20}{'plain':>10}{'prepared':>10}")
+    results = {}
+    for prepared in (False, True):
+        clear_database(mydb)
+        songs = time_loader(mydb, load_single_songs, singles, prepared)
+        load_users(mydb, users)
+        rated = time_loader(mydb, load_song_ratings, ratings, prepared)
+        results[prepared] = (songs, rated)
+    for i, name in enumerate(["load_single_songs", "load_song_ratings"]):
+        print(f"{name:<20}{results[False][i]:>10.2f}{results[True][i]:>10.2f}")
+
+    clear_database(mydb)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
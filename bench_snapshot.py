@@ -0,0 +1,69 @@
+"""
+Benchmark: music_db SQL queries vs the same queries on a MusicSnapshot.
+
+Reads whatever is in the database; load a catalog first.
+
+Usage:
+    python bench_snapshot.py --user mk2605 --password ... [--repeat 5]
+    python bench_snapshot.py --backend sqlite --path bench.sqlite3
+"""
+import argparse
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from music_snapshot import MusicSnapshot
+
+
+def best_of(repeat, func, *args):
+    """
+    Returns (result, best wall time in ms) over `repeat` calls.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--years", type=int, nargs=2, default=(2000, 2025))
+    parser.add_argument("-n", type=int, default=10)
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+
+    start = time.perf_counter()
+    snapshot = MusicSnapshot(mydb)
+    print(f"Snapshot built in {time.perf_counter() - start:.2f}s, "
+          f"{snapshot.nbytes() / 2**20:.1f} MiB of columns, "
+          f"{len(snapshot.rating_song)} ratings, {len(snapshot.song_id)} songs")
+
+    years, n = tuple(args.years), args.n
+    queries = [
+        ("get_most_prolific_individual_artists", (n, years)),
+        ("get_artists_last_single_in_year", (years[1],)),
+        ("get_top_song_genres", (n,)),
+        ("get_album_and_single_artists", ()),
+        ("get_most_rated_songs", (years, n)),
+        ("get_most_engaged_users", (years, n)),
+    ]
+
+    print(f"\n{'query':<40}{'sql ms':>10}{'snap ms':>10}{'speedup':>10}  same")
+    for name, query_args in queries:
+        sql_result, sql_ms = best_of(args.repeat, getattr(music_db, name), mydb, *query_args)
+        snap_result, snap_ms = best_of(args.repeat, getattr(snapshot, name), *query_args)
+        same = [tuple(row) for row in sql_result] == snap_result if isinstance(snap_result, list) \
+            else sql_result == snap_result
+        print(f"{name:<40}{sql_ms:>10.2f}{snap_ms:>10.2f}{sql_ms / max(snap_ms, 1e-6):>9.1f}x  {same}")
+
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark: replaying a rating feed that is already loaded, with the
+row-by-row loader (rejects every rated pair after four lookups), the bulk
+loader, and upsert=True (one lookup per chunk, writes only what changed).
+
+A second upsert run replays the feed with a share of the ratings moved to
+a later date and value, as a corrected feed would; those are updated.
+
+WARNING: clears the target database.
+
+Usage:
+    python bench_upsert.py --backend sqlite --songs 20000
+    python bench_upsert.py --backend mysql --user mk2605 --password ... --scale medium
+"""
+import argparse
+import random
+import time
+
+import music_db
+from bench_common import add_connection_arguments, connect_from_args
+from synthetic_catalog import SCALES, Catalog
+
+
+def corrected(ratings, share, seed=0):
+    rng = random.Random(seed)
+    for username, song, value, date in ratings:
+        if rng.random() < share:
+            yield username, song, value % 5 + 1, "2099-12-31"
+        else:
+            yield username, song, value, date
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    add_connection_arguments(parser)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--songs", type=int, help="overrides --scale")
+    parser.add_argument("--batch-size", type=int, default=music_db.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--corrected", type=float, default=0.1,
+                        help="share of ratings changed in the corrected feed")
+    args = parser.parse_args()
+
+    mydb = connect_from_args(args)
+
+    catalog = Catalog(songs=args.songs or SCALES[args.scale])
+    ratings = list(catalog.ratings())
+    music_db.clear_database(mydb, truncate=True)
+    music_db.load_users(mydb, catalog.users())
+    music_db.load_single_songs(mydb, catalog.singles(), bulk=True)
+    music_db.load_albums(mydb, catalog.albums(), bulk=True)
+    music_db.load_song_ratings(mydb, ratings, bulk=True)
+
+    runs = [
+        ("row-by-row", ratings, {}),
+        ("bulk", ratings, {"bulk": True}),
+        ("upsert", ratings, {"upsert": True}),
+        ("upsert corr.", list(corrected(ratings, args.corrected)), {"upsert": True}),
+    ]
+    print(f"replaying {len(ratings)} ratings")
+    print(f"{'mode':<14}{'seconds':>10}  counts")
+    for name, feed, kwargs in runs:
+        stats = {}
+        start = time.perf_counter()
+        music_db.load_song_ratings(mydb, feed, batch_size=args.batch_size, stats=stats, **kwargs)
+        print(f"{name:<14}{time.perf_counter() - start:>10.3f}  {stats}")
+
+    music_db.clear_database(mydb, truncate=True)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
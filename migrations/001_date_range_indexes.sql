@@ -0,0 +1,18 @@
+-- Composite indexes for the date-range filters in music_db.py.
+--
+-- The get_* analytics functions filter on release_date / rating_date with
+-- half-open ranges (col >= 'Y-01-01' AND col < 'Y+1-01-01'). With these
+-- indexes the filters become index range scans and the top-N counts are
+-- computed from the index alone.
+--
+-- Apply with: mysql -u <user> -p musicdb < migrations/001_date_range_indexes.sql
+
+-- get_most_rated_songs: rating_date range, grouped by song_id
+CREATE INDEX rating_date_song ON Rating (rating_date, song_id);
+
+-- get_most_engaged_users: rating_date range, grouped by username
+CREATE INDEX rating_date_user ON Rating (rating_date, username);
+
+-- get_most_prolific_individual_artists: album_id IS NULL + release_date
+-- range, grouped by artist_name
+CREATE INDEX album_date_artist ON Song (album_id, release_date, artist_name);
@@ -0,0 +1,98 @@
+-- Summary tables for the top-N analytics queries, kept up to date by
+-- triggers on SongGenre and Rating.
+--
+--   GenreSongCount       songs per genre           (get_top_song_genres)
+--   SongYearRatingCount  ratings per song per year (get_most_rated_songs)
+--   UserYearRatingCount  ratings per user per year (get_most_engaged_users)
+--
+-- The get_* functions read them when called with use_summaries=True.
+-- Triggers do not fire for rows removed by ON DELETE CASCADE (e.g. the
+-- SongGenre rows of a deleted Song), so after deleting parent rows run
+--   python music_db_summaries.py check     (report drift)
+--   python music_db_summaries.py rebuild   (recompute from base tables)
+--
+-- Apply with: mysql -u <user> -p musicdb < migrations/002_summary_tables.sql
+
+CREATE TABLE `GenreSongCount` (
+  `genre_id` int NOT NULL,
+  `num_songs` bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (`genre_id`),
+  KEY `num_songs` (`num_songs`),
+  CONSTRAINT `genresongcount_ibfk_1` FOREIGN KEY (`genre_id`) REFERENCES `Genre` (`genre_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `SongYearRatingCount` (
+  `song_id` bigint NOT NULL,
+  `year` smallint NOT NULL,
+  `num_ratings` bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (`song_id`,`year`),
+  KEY `year_song` (`year`,`song_id`,`num_ratings`),
+  CONSTRAINT `songyearratingcount_ibfk_1` FOREIGN KEY (`song_id`) REFERENCES `Song` (`song_id`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE `UserYearRatingCount` (
+  `username` varchar(30) NOT NULL,
+  `year` smallint NOT NULL,
+  `num_ratings` bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (`username`,`year`),
+  KEY `year_user` (`year`,`username`,`num_ratings`),
+  CONSTRAINT `useryearratingcount_ibfk_1` FOREIGN KEY (`username`) REFERENCES `User` (`username`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Start from the current contents of the base tables
+INSERT INTO GenreSongCount (genre_id, num_songs)
+  SELECT genre_id, COUNT(*) FROM SongGenre GROUP BY genre_id;
+INSERT INTO SongYearRatingCount (song_id, year, num_ratings)
+  SELECT song_id, YEAR(rating_date), COUNT(*) FROM Rating GROUP BY song_id, YEAR(rating_date);
+INSERT INTO UserYearRatingCount (username, year, num_ratings)
+  SELECT username, YEAR(rating_date), COUNT(*) FROM Rating GROUP BY username, YEAR(rating_date);
+
+DELIMITER ;;
+
+CREATE TRIGGER `songgenre_count_insert` AFTER INSERT ON `SongGenre` FOR EACH ROW
+BEGIN
+  INSERT INTO GenreSongCount (genre_id, num_songs) VALUES (NEW.genre_id, 1)
+    ON DUPLICATE KEY UPDATE num_songs = num_songs + 1;
+END ;;
+
+CREATE TRIGGER `songgenre_count_delete` AFTER DELETE ON `SongGenre` FOR EACH ROW
+BEGIN
+  UPDATE GenreSongCount SET num_songs = num_songs - 1 WHERE genre_id = OLD.genre_id;
+END ;;
+
+CREATE TRIGGER `rating_count_insert` AFTER INSERT ON `Rating` FOR EACH ROW
+BEGIN
+  INSERT INTO SongYearRatingCount (song_id, year, num_ratings)
+    VALUES (NEW.song_id, YEAR(NEW.rating_date), 1)
+    ON DUPLICATE KEY UPDATE num_ratings = num_ratings + 1;
+  INSERT INTO UserYearRatingCount (username, year, num_ratings)
+    VALUES (NEW.username, YEAR(NEW.rating_date), 1)
+    ON DUPLICATE KEY UPDATE num_ratings = num_ratings + 1;
+END ;;
+
+CREATE TRIGGER `rating_count_delete` AFTER DELETE ON `Rating` FOR EACH ROW
+BEGIN
+  UPDATE SongYearRatingCount SET num_ratings = num_ratings - 1
+    WHERE song_id = OLD.song_id AND year = YEAR(OLD.rating_date);
+  UPDATE UserYearRatingCount SET num_ratings = num_ratings - 1
+    WHERE username = OLD.username AND year = YEAR(OLD.rating_date);
+END ;;
+
+CREATE TRIGGER `rating_count_update` AFTER UPDATE ON `Rating` FOR EACH ROW
+BEGIN
+  IF NOT (OLD.song_id <=> NEW.song_id AND OLD.username <=> NEW.username
+          AND YEAR(OLD.rating_date) <=> YEAR(NEW.rating_date)) THEN
+    UPDATE SongYearRatingCount SET num_ratings = num_ratings - 1
+      WHERE song_id = OLD.song_id AND year = YEAR(OLD.rating_date);
+    UPDATE UserYearRatingCount SET num_ratings = num_ratings - 1
+      WHERE username = OLD.username AND year = YEAR(OLD.rating_date);
+    INSERT INTO SongYearRatingCount (song_id, year, num_ratings)
+      VALUES (NEW.song_id, YEAR(NEW.rating_date), 1)
+      ON DUPLICATE KEY UPDATE num_ratings = num_ratings + 1;
+    INSERT INTO UserYearRatingCount (username, year, num_ratings)
+      VALUES (NEW.username, YEAR(NEW.rating_date), 1)
+      ON DUPLICATE KEY UPDATE num_ratings = num_ratings + 1;
+  END IF;
+END ;;
+
+DELIMITER ;
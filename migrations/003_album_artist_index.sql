@@ -0,0 +1,11 @@
+-- Covering index for get_album_and_single_artists.
+--
+-- The query reads the singles (album_id IS NULL) and keeps each artist
+-- that also has an album. With (album_id, artist_name) the singles are one
+-- index range, already sorted by artist_name, so DISTINCT needs no sort
+-- and no Song rows are read; the EXISTS probe uses the Album index on
+-- artist_name.
+--
+-- Apply with: mysql -u <user> -p musicdb < migrations/003_album_artist_index.sql
+
+CREATE INDEX album_artist ON Song (album_id, artist_name);
@@ -0,0 +1,111 @@
+-- Per-artist single statistics, kept up to date by triggers on Song and
+-- Album like the tables of 002_summary_tables.sql.
+--
+--   ArtistSingleStats  first and last single date, number of singles and
+--                      number of albums per artist
+--                      (get_artists_last_single_in_year,
+--                       get_album_and_single_artists)
+--
+-- The get_* functions read it when called with use_summaries=True. The
+-- year lookup becomes a range scan of the last_single index instead of
+-- grouping every single by artist.
+--
+-- Inserting a single can only widen the date range, so the insert trigger
+-- adjusts it in place. Deleting a single decrements the count, and only
+-- recomputes the row from the artist's remaining singles when the deleted
+-- single was on its first or last date, so deleting all of an artist's
+-- singles (clear_database) does not rescan them for every row. Changing a
+-- single recomputes the rows of its old and new artist. Rows removed by ON DELETE CASCADE
+-- (the songs of a deleted album) do not fire triggers, so check and
+-- rebuild with music_db_summaries.py as for the other summary tables.
+--
+-- Apply with: mysql -u <user> -p musicdb < migrations/004_artist_single_stats.sql
+
+CREATE TABLE `ArtistSingleStats` (
+  `artist_name` varchar(100) NOT NULL,
+  `first_single` date DEFAULT NULL,
+  `last_single` date DEFAULT NULL,
+  `num_singles` bigint NOT NULL DEFAULT 0,
+  `num_albums` bigint NOT NULL DEFAULT 0,
+  PRIMARY KEY (`artist_name`),
+  KEY `last_single` (`last_single`,`artist_name`),
+  KEY `singles_albums` (`num_singles`,`num_albums`,`artist_name`),
+  CONSTRAINT `artistsinglestats_ibfk_1` FOREIGN KEY (`artist_name`) REFERENCES `Artist` (`name`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+-- Start from the current contents of the base tables
+INSERT INTO ArtistSingleStats (artist_name, first_single, last_single, num_singles, num_albums)
+  SELECT a.name,
+         (SELECT MIN(s.release_date) FROM Song s WHERE s.artist_name = a.name AND s.album_id IS NULL),
+         (SELECT MAX(s.release_date) FROM Song s WHERE s.artist_name = a.name AND s.album_id IS NULL),
+         (SELECT COUNT(*) FROM Song s WHERE s.artist_name = a.name AND s.album_id IS NULL),
+         (SELECT COUNT(*) FROM Album al WHERE al.artist_name = a.name)
+  FROM Artist a;
+
+DELIMITER ;;
+
+CREATE PROCEDURE `refresh_artist_single_stats`(IN artist VARCHAR(100))
+BEGIN
+  INSERT INTO ArtistSingleStats (artist_name, first_single, last_single, num_singles, num_albums)
+    SELECT artist, MIN(release_date), MAX(release_date), COUNT(*), 0
+    FROM Song WHERE artist_name = artist AND album_id IS NULL
+    ON DUPLICATE KEY UPDATE first_single = VALUES(first_single),
+                            last_single = VALUES(last_single),
+                            num_singles = VALUES(num_singles);
+END ;;
+
+CREATE TRIGGER `song_single_stats_insert` AFTER INSERT ON `Song` FOR EACH ROW
+BEGIN
+  IF NEW.album_id IS NULL THEN
+    INSERT INTO ArtistSingleStats (artist_name, first_single, last_single, num_singles)
+      VALUES (NEW.artist_name, NEW.release_date, NEW.release_date, 1)
+      ON DUPLICATE KEY UPDATE
+        first_single = LEAST(COALESCE(first_single, NEW.release_date), NEW.release_date),
+        last_single = GREATEST(COALESCE(last_single, NEW.release_date), NEW.release_date),
+        num_singles = num_singles + 1;
+  END IF;
+END ;;
+
+CREATE TRIGGER `song_single_stats_delete` AFTER DELETE ON `Song` FOR EACH ROW
+BEGIN
+  IF OLD.album_id IS NULL THEN
+    UPDATE ArtistSingleStats SET num_singles = num_singles - 1
+      WHERE artist_name = OLD.artist_name;
+    IF EXISTS (SELECT 1 FROM ArtistSingleStats
+               WHERE artist_name = OLD.artist_name
+                 AND (first_single = OLD.release_date OR last_single = OLD.release_date)) THEN
+      CALL refresh_artist_single_stats(OLD.artist_name);
+    END IF;
+  END IF;
+END ;;
+
+CREATE TRIGGER `song_single_stats_update` AFTER UPDATE ON `Song` FOR EACH ROW
+BEGIN
+  IF NOT (OLD.album_id <=> NEW.album_id AND OLD.artist_name <=> NEW.artist_name
+          AND OLD.release_date <=> NEW.release_date) THEN
+    CALL refresh_artist_single_stats(OLD.artist_name);
+    CALL refresh_artist_single_stats(NEW.artist_name);
+  END IF;
+END ;;
+
+CREATE TRIGGER `album_stats_insert` AFTER INSERT ON `Album` FOR EACH ROW
+BEGIN
+  INSERT INTO ArtistSingleStats (artist_name, num_albums) VALUES (NEW.artist_name, 1)
+    ON DUPLICATE KEY UPDATE num_albums = num_albums + 1;
+END ;;
+
+CREATE TRIGGER `album_stats_delete` AFTER DELETE ON `Album` FOR EACH ROW
+BEGIN
+  UPDATE ArtistSingleStats SET num_albums = num_albums - 1 WHERE artist_name = OLD.artist_name;
+END ;;
+
+CREATE TRIGGER `album_stats_update` AFTER UPDATE ON `Album` FOR EACH ROW
+BEGIN
+  IF NOT (OLD.artist_name <=> NEW.artist_name) THEN
+    UPDATE ArtistSingleStats SET num_albums = num_albums - 1 WHERE artist_name = OLD.artist_name;
+    INSERT INTO ArtistSingleStats (artist_name, num_albums) VALUES (NEW.artist_name, 1)
+      ON DUPLICATE KEY UPDATE num_albums = num_albums + 1;
+  END IF;
+END ;;
+
+DELIMITER ;
@@ -1,12 +1,605 @@
-from typing import Tuple, List, Set
+import datetime
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Tuple, List, Set, Dict, Iterable, Sequence, Optional
 
-def clear_database(mydb):
+# Rows per multi-row statement in the bulk loaders.
+DEFAULT_BATCH_SIZE = 1000
+
+# Artist names and genres each kept per database by the dimension cache.
+DEFAULT_DIMENSION_CACHE_SIZE = 100_000
+
+# Databases the dimension cache keeps entries for (least recently used out).
+DEFAULT_DIMENSION_CACHE_DATABASES = 8
+
+# How the row-by-row loaders recognise songs and albums that already exist:
+#   "exception": a failing INSERT rejects the row; it counts as a duplicate
+#                if it broke a UNIQUE key, else as a failed insert
+#   "check": existing keys are looked up per chunk and skipped without a
+#            statement; other rows go in with INSERT IGNORE, and a row that
+#            is not inserted must be explained by an existing key
+CONFLICT_MODES = ("exception", "check")
+
+
+class LoadError(Exception):
+    """
+    A row could not be loaded for a reason other than a duplicate key
+    (raised with conflicts="check").
+    """
+
+
+def _chunks(rows: Iterable, size: int):
+    """
+    Yields consecutive lists of at most `size` items from `rows`.
+    """
+    if size < 1:
+        raise ValueError("batch_size must be at least 1")
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _committing(mydb, items: Iterable, commit_every: int, weight=None):
+    """
+    Yields `items` unchanged and commits after every `commit_every` input
+    rows, counted when the caller asks for the next item, i.e. once the
+    previous one has been fully written. `weight` gives the number of rows
+    in an item (len for chunks); by default each item is one row.
+    No intermediate commits are made if commit_every is None.
+    """
+    pending = 0
+    for item in items:
+        yield item
+        pending += weight(item) if weight else 1
+        if commit_every and pending >= commit_every:
+            mydb.commit()
+            pending = 0
+
+
+class RejectWriter:
+    """
+    Reject sink for the load_* functions that writes each reject as one
+    tab-separated line to a text file instead of keeping it in memory.
+    Unlike a set, it does not deduplicate.
+
+    Example:
+        with open("rejects.tsv", "w") as f:
+            load_song_ratings(mydb, rows, reject_sink=RejectWriter(f))
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.count = 0
+
+    def add(self, reject):
+        if isinstance(reject, str):
+            reject = (reject,)
+        self.file.write("\t".join(str(field) for field in reject) + "\n")
+        self.count += 1
+
+
+def _date_range(year_range: Tuple[int, int]) -> Tuple[str, str]:
+    """
+    Turns an inclusive (start_year, end_year) into a half-open date range
+    [start_year-01-01, end_year+1-01-01) for predicates of the form
+        col >= %s AND col < %s
+
+    Unlike YEAR(col) BETWEEN %s AND %s, this compares the bare column, so
+    MySQL can answer it with a range scan on an index over col.
+    """
+    start_year, end_year = year_range
+    return f"{int(start_year):04d}-01-01", f"{int(end_year) + 1:04d}-01-01"
+
+
+def _parse_date(value) -> Optional[datetime.date]:
+    """
+    Returns `value` as a datetime.date, or None if it is not a valid date.
+    Accepts dates and "YYYY-MM-DD" strings, with or without leading zeros
+    ("2020-1-5" is 2020-01-05, as MySQL reads it).
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        year, month, day = (int(part) for part in str(value).strip().split("-"))
+        return datetime.date(year, month, day)
+    except (TypeError, ValueError):
+        return None
+
+
+def collation_key(name: str) -> str:
+    """
+    Approximates MySQL's utf8mb4_0900_ai_ci comparison: ignores case and
+    accents, so "élan" sorts next to, and matches, "Elan".
+    """
+    if name.isascii():
+        return name.casefold()
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+_ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+
+
+def nocase_key(name: str) -> str:
+    """
+    SQLite's COLLATE NOCASE comparison: folds ASCII letters only, so
+    "Adele" matches "ADELE" but "élan" does not match "Elan" or "ÉLAN".
+    """
+    return name.translate(_ASCII_LOWER)
+
+
+def name_key(mydb):
+    """
+    The key function that compares names the way `mydb`'s schema does:
+    nocase_key on SQLite, collation_key on MySQL.
+    """
+    dialect = getattr(mydb, "dialect", None)
+    return nocase_key if dialect is not None and dialect.name == "sqlite" else collation_key
+
+
+class PreparedCursor:
+    """
+    Cursor for the row-by-row loaders that gives every distinct SQL text its
+    own server-side prepared cursor (mydb.cursor(prepared=True)), created on
+    first use and reused for every later row. The server parses each
+    statement once; afterwards only the parameters are sent.
+
+    Results are read completely after execute, like a buffered cursor, so
+    a caller may fetch one row and go on to the next statement.
+    """
+
+    def __init__(self, mydb):
+        self.mydb = mydb
+        self._statements = {}   # sql text -> prepared driver cursor
+        self._rows = []
+        self._pos = 0
+        self.rowcount = -1
+        self.lastrowid = None
+        self.warning_count = 0
+        self.description = None
+
+    def _statement_cursor(self, sql):
+        cursor = self._statements.get(sql)
+        if cursor is None:
+            cursor = self._statements[sql] = self.mydb.cursor(prepared=True)
+        return cursor
+
+    def execute(self, sql, params=()):
+        cursor = self._statement_cursor(sql)
+        cursor.execute(sql, tuple(params))
+        self.description = cursor.description
+        self._rows = cursor.fetchall() if cursor.description else []
+        self._pos = 0
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+        self.warning_count = getattr(cursor, "warning_count", 0) or 0
+
+    def executemany(self, sql, seq_params):
+        for params in seq_params:
+            self.execute(sql, params)
+
+    def fetchone(self):
+        if self._pos >= len(self._rows):
+            return None
+        row = self._rows[self._pos]
+        self._pos += 1
+        return row
+
+    def fetchmany(self, size=1):
+        rows = self._rows[self._pos:self._pos + size]
+        self._pos += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._rows[self._pos:]
+        self._pos = len(self._rows)
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        for cursor in self._statements.values():
+            cursor.close()
+        self._statements.clear()
+        self._rows = []
+
+
+def _loader_cursor(mydb, prepared: bool):
+    """
+    Cursor for the row-by-row loaders: a PreparedCursor if `prepared`,
+    otherwise a plain mydb.cursor().
+    """
+    return PreparedCursor(mydb) if prepared else mydb.cursor()
+
+
+def _insert_rows(cursor, insert_sql: str, rows: Sequence[Tuple], suffix: str = ""):
+    """
+    Runs `insert_sql` (ending in VALUES) once for all `rows`, expanding it
+    into a single multi-row statement: VALUES (%s, %s), (%s, %s), ...
+    `suffix` is appended after the rows (e.g. ON DUPLICATE KEY UPDATE ...).
+    """
+    if not rows:
+        return
+    row_sql = "(" + ", ".join(["%s"] * len(rows[0])) + ")"
+    params = [value for row in rows for value in row]
+    cursor.execute(insert_sql + " " + ", ".join([row_sql] * len(rows)) + suffix, params)
+
+
+def _values_table(columns: Sequence[str], rows: Sequence[Tuple]) -> Tuple[str, list]:
+    """
+    Builds an inline derived table from Python rows:
+        SELECT %s AS c1, %s AS c2 UNION ALL SELECT %s, %s ...
+
+    Joining it against a base table lets the database compare keys with its
+    own collation and hand back the caller's original values, so a single
+    query can resolve ids for a whole batch.
+    """
+    first = "SELECT " + ", ".join(f"%s AS {c}" for c in columns)
+    rest = "SELECT " + ", ".join(["%s"] * len(columns))
+    sql = " UNION ALL ".join([first] + [rest] * (len(rows) - 1))
+    params = [value for row in rows for value in row]
+    return sql, params
+
+
+def _resolve_genre_ids(cursor, names: Sequence[str]) -> Dict[str, int]:
+    """
+    Maps each genre name to its genre_id in one query.
+    Names that are not in Genre are missing from the result.
+    """
+    if not names:
+        return {}
+    values_sql, params = _values_table(("name",), [(g,) for g in names])
+    cursor.execute(f"""
+        SELECT v.name, g.genre_id
+        FROM ({values_sql}) v
+        JOIN Genre g ON g.name = v.name
+    """, params)
+    return {name: genre_id for name, genre_id in cursor.fetchall()}
+
+
+def _resolve_ids(cursor, table: str, id_column: str,
+                 keys: Sequence[Tuple[str, str]]) -> Dict[int, int]:
+    """
+    Looks up the id of every (title, artist_name) in `keys` in one query.
+    Works for both Song and Album, which share that UNIQUE key.
+
+    Returns:
+        dict of position in `keys` -> id, for the keys found in `table`
+    """
+    if not keys:
+        return {}
+    values_sql, params = _values_table(
+        ("idx", "title", "artist_name"),
+        [(i, title, artist) for i, (title, artist) in enumerate(keys)]
+    )
+    cursor.execute(f"""
+        SELECT v.idx, t.{id_column}
+        FROM ({values_sql}) v
+        JOIN {table} t ON t.title = v.title AND t.artist_name = v.artist_name
+    """, params)
+    return {int(idx): row_id for idx, row_id in cursor.fetchall()}
+
+
+def _insert_new_keyed_rows(cursor, table: str, id_column: str, insert_sql: str,
+                           keys: Sequence[Tuple[str, str]],
+                           rows: Sequence[Tuple], index=None) -> List:
+    """
+    Inserts `rows` into a table with UNIQUE(title, artist_name) and reports
+    which of them were actually added, with the same outcome as inserting
+    them one by one and skipping each duplicate.
+
+    keys[i] is the (title, artist_name) of rows[i].
+    index: IndexSession of a CatalogIndex (Song only). The existing ids
+    are taken from it instead of a lookup query, and new songs are added
+    to it.
+
+    Returns:
+        list with the new id for each row that was inserted, or None for
+        rows that already existed or repeat an earlier row of `rows`
+    """
+    if index is None:
+        existing = set(_resolve_ids(cursor, table, id_column, keys).values())
+    else:
+        existing = {index.song_id(title, artist) for title, artist in keys}
+    # rows go in in order, so of two colliding rows the first one is kept
+    _insert_rows(cursor, insert_sql, rows)
+    ids = _resolve_ids(cursor, table, id_column, keys)
+
+    result = []
+    for i in range(len(keys)):
+        row_id = ids.get(i)
+        if row_id is None or row_id in existing:
+            result.append(None)
+            continue
+        existing.add(row_id)
+        result.append(row_id)
+        if index is not None:
+            index.add_song(keys[i][0], keys[i][1], row_id)
+    return result
+
+
+def _check_index(mydb, index):
+    """
+    Raises ValueError if `index` (a CatalogIndex) keys names differently
+    from how `mydb` compares them, which would resolve or skip songs the
+    database considers distinct.
+    """
+    if index.key is not name_key(mydb):
+        raise ValueError("index was built for another backend; use CatalogIndex.load(mydb)")
+
+
+def _count(stats, reason: str, n: int = 1):
+    """
+    Adds n to stats[reason] if the caller asked for stats.
+    """
+    if stats is not None and n:
+        stats[reason] = stats.get(reason, 0) + n
+
+
+def _existing_keys(cursor, table: str, id_column: str,
+                   keys: Sequence[Tuple[str, str]]) -> List[bool]:
+    """
+    For each (title, artist_name) in `keys`, whether it is already in
+    `table`. Looked up DEFAULT_BATCH_SIZE keys per query.
+    """
+    found = []
+    for chunk in _chunks(keys, DEFAULT_BATCH_SIZE):
+        ids = _resolve_ids(cursor, table, id_column, chunk)
+        found.extend(i in ids for i in range(len(chunk)))
+    return found
+
+
+def _insert_unless_duplicate(cursor, table: str, insert_sql: str, params: Sequence,
+                             key: Tuple[str, str]):
+    """
+    Runs `insert_sql` (an INSERT IGNORE of one row into a table with
+    UNIQUE(title, artist_name)) and tells a duplicate apart from a failure.
+
+    Returns:
+        the new id, or None if `key` was already taken
+
+    Raises LoadError if the row was not inserted although `key` is free
+    (e.g. a foreign key failed), or was inserted with warnings (e.g. a
+    truncated value), which IGNORE would otherwise let pass.
+    """
+    cursor.execute(insert_sql, params)
+    if cursor.rowcount == 1:
+        if getattr(cursor, "warning_count", 0):
+            raise LoadError(f"{table} row {key!r} was inserted with warnings")
+        return cursor.lastrowid
+    cursor.execute(f"SELECT 1 FROM {table} WHERE title = %s AND artist_name = %s", key)
+    if cursor.fetchone() is None:
+        raise LoadError(f"{table} row {key!r} was not inserted and is not a duplicate")
+    return None
+
+
+def _is_duplicate_key(error) -> bool:
+    """
+    Whether a failed INSERT broke a UNIQUE or PRIMARY KEY constraint
+    (MySQL error 1062, SQLite "UNIQUE constraint failed").
+    """
+    return getattr(error, "errno", None) == 1062 or "UNIQUE constraint failed" in str(error)
+
+
+def _database_key(mydb):
+    """
+    Identifies the database behind a connection, so connections to the same
+    database share dimension cache entries. connect() in music_db_backends
+    sets database_key; any other connection is given a token of its own on
+    first use (None if it takes no attributes, which disables caching).
+
+    Keys hold their token, so unlike id() they are never reused by a later
+    connection while the cache remembers them.
+    """
+    key = getattr(mydb, "database_key", None)
+    if key is None:
+        key = ("connection", object())
+        try:
+            mydb.database_key = key
+        except AttributeError:
+            return None
+    return key
+
+
+class DimensionCache:
+    """
+    Process-wide cache of the dimension rows the loaders need for every
+    input row: known Artist names, and Genre name -> genre_id.
+
+    Entries are kept per database, warmed with one query each on first use,
+    and added only after the loader that inserted them has committed, so a
+    rolled-back insert is never cached. At most `maxdatabases` databases
+    are kept (least recently used out). Names are matched exactly; a name
+    the database would consider equal ("pop" for "Pop") is a miss and is
+    looked up once. Each map holds at most `maxsize` names (least recently
+    used out first); maxsize=0 turns caching across calls off.
+
+    clear_database invalidates it. Call invalidate() after deleting artists
+    or genres any other way (another process, raw SQL).
+    """
+
+    def __init__(self, maxsize=DEFAULT_DIMENSION_CACHE_SIZE,
+                 maxdatabases=DEFAULT_DIMENSION_CACHE_DATABASES):
+        self.maxsize = maxsize
+        self.maxdatabases = maxdatabases
+        self._lock = threading.Lock()
+        self._databases = OrderedDict()   # database key -> (artists, genres) OrderedDicts
+        self.hits = 0
+        self.misses = 0
+
+    def _maps(self, mydb, cursor):
+        key = _database_key(mydb)
+        artists, genres = OrderedDict(), OrderedDict()
+        if key is None or not self.maxsize or not self.maxdatabases:
+            # nothing is kept across calls; maps live for this session only
+            return artists, genres
+        with self._lock:
+            maps = self._databases.get(key)
+            if maps is not None:
+                self._databases.move_to_end(key)
+                return maps
+        cursor.execute("SELECT name, genre_id FROM Genre LIMIT %s", (self.maxsize,))
+        genres.update(cursor.fetchall())
+        cursor.execute("SELECT name FROM Artist LIMIT %s", (self.maxsize,))
+        artists.update((row[0], True) for row in cursor.fetchall())
+        with self._lock:
+            maps = self._databases.setdefault(key, (artists, genres))
+            while len(self._databases) > self.maxdatabases:
+                self._databases.popitem(last=False)
+            return maps
+
+    def session(self, mydb, cursor) -> "_DimensionSession":
+        """
+        Dimension lookups for one loader call on `mydb`.
+        """
+        artists, genres = self._maps(mydb, cursor)
+        return _DimensionSession(self, cursor, artists, genres)
+
+    def _publish(self, artists, genres, new_artists, new_genres):
+        with self._lock:
+            for name in new_artists:
+                artists[name] = True
+            genres.update(new_genres)
+            for mapping in (artists, genres):
+                while len(mapping) > self.maxsize:
+                    mapping.popitem(last=False)
+
+    def _get(self, mapping, name):
+        with self._lock:
+            value = mapping.get(name)
+            if value is None:
+                self.misses += 1
+            else:
+                mapping.move_to_end(name)
+                self.hits += 1
+            return value
+
+    def invalidate(self):
+        """
+        Forgets every database; the next loader call warms again.
+        """
+        with self._lock:
+            self._databases.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "databases": len(self._databases),
+                    "artists": sum(len(a) for a, _ in self._databases.values()),
+                    "genres": sum(len(g) for _, g in self._databases.values())}
+
+
+class _DimensionSession:
+    """
+    Ensures artists and genres exist for one loader call. Names inserted in
+    this call are remembered locally and handed to the shared cache by
+    publish(), which the loader calls after its final commit.
+    """
+
+    def __init__(self, cache, cursor, artists, genres):
+        self.cache = cache
+        self.cursor = cursor
+        self.artists = artists
+        self.genres = genres
+        self.new_artists = set()
+        self.new_genres = {}
+
+    def _known_artist(self, name):
+        return name in self.new_artists or self.cache._get(self.artists, name) is not None
+
+    def _known_genre_id(self, name):
+        if name in self.new_genres:
+            return self.new_genres[name]
+        return self.cache._get(self.genres, name)
+
+    def ensure_artists(self, names: Sequence[str]):
+        """
+        INSERT IGNOREs the artists that are not known yet, in one statement.
+        """
+        missing = [name for name in dict.fromkeys(names) if not self._known_artist(name)]
+        _insert_rows(self.cursor, "INSERT IGNORE INTO Artist(name) VALUES", [(a,) for a in missing])
+        self.new_artists.update(missing)
+
+    def genre_ids(self, names: Sequence[str]) -> Dict[str, int]:
+        """
+        Returns genre name -> genre_id for `names`, inserting the genres
+        that are not known yet and looking up their ids in one query.
+        """
+        ids, missing = {}, []
+        for name in dict.fromkeys(names):
+            genre_id = self._known_genre_id(name)
+            if genre_id is None:
+                missing.append(name)
+            else:
+                ids[name] = genre_id
+        if missing:
+            _insert_rows(self.cursor, "INSERT IGNORE INTO Genre(name) VALUES", [(g,) for g in missing])
+            resolved = _resolve_genre_ids(self.cursor, missing)
+            self.new_genres.update(resolved)
+            ids.update(resolved)
+        return ids
+
+    def publish(self):
+        self.cache._publish(self.artists, self.genres, self.new_artists, self.new_genres)
+
+
+# Shared by every loader call in this process.
+DIMENSIONS = DimensionCache()
+
+
+# Every table clear_database(truncate=True) empties if it exists, including
+# SongArtist and the optional summary tables of migrations/002.
+TRUNCATE_TABLES = [
+    "Rating", "SongGenre", "SongArtist", "Song", "Album", "User", "Artist", "Genre",
+    "GenreSongCount", "SongYearRatingCount", "UserYearRatingCount", "ArtistSingleStats",
+]
+
+
+def clear_database(mydb, truncate: bool = False):
     """
     Deletes all rows from all tables of the database.
     Order matters because of foreign key constraints.
+
+    truncate: empty the tables with TRUNCATE TABLE instead, with foreign
+    key checks off for the session. TRUNCATE drops and recreates each
+    table rather than deleting (and undo-logging) every row, so it takes
+    about the same time however full the tables are, and it resets the
+    AUTO_INCREMENT counters. It commits implicitly and cannot be rolled
+    back, and triggers do not fire, which is why the summary tables are
+    truncated along with the base tables.
     """
     cursor = mydb.cursor()
 
+    if truncate:
+        # 1. Find which of the tables exist in this schema
+        cursor.execute("""
+            SELECT table_name FROM information_schema.tables
+            WHERE table_schema = DATABASE()
+        """)
+        existing = {row[0].lower() for row in cursor.fetchall()}
+        mydb.commit()
+
+        # 2. Truncate in any order, checks restored even on failure
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        try:
+            for table in TRUNCATE_TABLES:
+                if table.lower() in existing:
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+            mydb.commit()
+        finally:
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+            DIMENSIONS.invalidate()
+        return
+
     # Order: children → parents
     tables = [
         "Rating",
@@ -22,54 +615,117 @@ def clear_database(mydb):
         cursor.execute(f"DELETE FROM {table}")
 
     mydb.commit()
+    DIMENSIONS.invalidate()
 
 
-def load_single_songs(mydb, single_songs):
+def load_single_songs(mydb, single_songs, bulk: bool = False,
+                      batch_size: int = DEFAULT_BATCH_SIZE,
+                      commit_every: int = None, reject_sink=None,
+                      prepared: bool = False, conflicts: str = "exception",
+                      stats: dict = None, index=None):
     """
     Inserts single songs into the database.
     Returns set of (song, artist) that were rejected.
-    """
-    cursor = mydb.cursor()
-    rejects = set()
-
-    for title, genres, artist, release_date in single_songs:
-
-        # 1. Ensure artist exists
-        cursor.execute("INSERT IGNORE INTO Artist(name) VALUES (%s)", (artist,))
 
-        # 2. Ensure each genre exists
-        for g in genres:
-            cursor.execute("INSERT IGNORE INTO Genre(name) VALUES (%s)", (g,))
-
-        # 3. Try to insert song (as a single → album_id = NULL)
-        try:
-            cursor.execute("""
-                INSERT INTO Song (title, release_date, artist_name, album_id)
-                VALUES (%s, %s, %s, NULL)
-            """, (title, release_date, artist))
-        except Exception:
-            # Already exists (because of UNIQUE(title, artist_name)) → reject
+    single_songs can be any iterable, e.g. a generator reading a file.
+
+    With bulk=True, songs are written in chunks of `batch_size` using
+    multi-row statements instead of one round trip per row (see
+    _load_single_songs_bulk). The reject set is the same either way.
+
+    commit_every: commit after this many input rows instead of only once
+    at the end, to bound the size of the open transaction.
+    reject_sink: object with an add() method that receives each reject as
+    it is found (e.g. a RejectWriter); it is returned instead of a set.
+    prepared: run the per-row statements on server-side prepared cursors,
+    one per statement, reused across rows (see PreparedCursor). Applies to
+    the row-by-row path only.
+    conflicts: how the row-by-row path recognises existing songs (see
+    CONFLICT_MODES). With "check", the songs of each chunk of `batch_size`
+    rows are looked up in one query and existing ones are rejected without
+    an INSERT; errors other than duplicates raise instead of being
+    counted as rejects.
+    stats: dict that receives counts per outcome: "inserted", "duplicate"
+    and, with conflicts="exception", "insert_failed" for rows refused for
+    another reason (e.g. a value too long for its column).
+    index: CatalogIndex (music_db_index.py) that receives the inserted
+    songs once the load has committed. In bulk mode it also replaces the
+    lookup of existing songs, so it must hold every song of the database.
+    """
+    if conflicts not in CONFLICT_MODES:
+        raise ValueError(f"conflicts must be one of {CONFLICT_MODES}")
+    if index is not None:
+        _check_index(mydb, index)
+        index = index.session()
+    if bulk:
+        return _load_single_songs_bulk(mydb, single_songs, batch_size, commit_every,
+                                       reject_sink, stats, index)
+
+    cursor = _loader_cursor(mydb, prepared)
+    rejects = set() if reject_sink is None else reject_sink
+    dimensions = DIMENSIONS.session(mydb, cursor)
+    checked = conflicts == "check"
+    if checked:
+        songs = _with_existing_singles(mydb.cursor(), single_songs, batch_size)
+    else:
+        songs = ((song, False) for song in single_songs)
+
+    for (title, genres, artist, release_date), exists in _committing(mydb, songs, commit_every):
+
+        # 1. Ensure artist exists (no statement if it is cached)
+        dimensions.ensure_artists([artist])
+
+        # 2. Ensure each genre exists and get its id
+        genre_ids = dimensions.genre_ids(genres)
+
+        # 3. Insert song (as a single → album_id = NULL) and get its song_id
+        if exists:
+            # found by the chunk lookup → reject without an INSERT
             rejects.add((title, artist))
+            _count(stats, "duplicate")
             continue
 
-        # 4. Get song_id to insert genres
-        cursor.execute("""
-            SELECT song_id FROM Song 
-            WHERE title=%s AND artist_name=%s
-        """, (title, artist))
-        row = cursor.fetchone()
-        if not row:
-            # Shouldn't happen, but be defensive
-            continue
-        song_id = row[0]
+        if checked:
+            song_id = _insert_unless_duplicate(cursor, "Song", """
+                INSERT IGNORE INTO Song (title, release_date, artist_name, album_id)
+                VALUES (%s, %s, %s, NULL)
+            """, (title, release_date, artist), (title, artist))
+            if song_id is None:
+                # repeats an earlier row of the same chunk
+                rejects.add((title, artist))
+                _count(stats, "duplicate")
+                continue
+        else:
+            try:
+                cursor.execute("""
+                    INSERT INTO Song (title, release_date, artist_name, album_id)
+                    VALUES (%s, %s, %s, NULL)
+                """, (title, release_date, artist))
+            except Exception as e:
+                # Already exists (because of UNIQUE(title, artist_name)) → reject
+                rejects.add((title, artist))
+                _count(stats, "duplicate" if _is_duplicate_key(e) else "insert_failed")
+                continue
+
+            # 4. Get song_id to insert genres
+            cursor.execute("""
+                SELECT song_id FROM Song 
+                WHERE title=%s AND artist_name=%s
+            """, (title, artist))
+            row = cursor.fetchone()
+            if not row:
+                # Shouldn't happen, but be defensive
+                continue
+            song_id = row[0]
+        _count(stats, "inserted")
+        if index is not None:
+            index.add_song(title, artist, song_id)
 
         # 5. Link genres
         for g in genres:
-            cursor.execute("SELECT genre_id FROM Genre WHERE name=%s", (g,))
-            gid_row = cursor.fetchone()
-            if not gid_row:
+            gid = genre_ids.get(g)
+            if gid is None:
                 continue
-            gid = gid_row[0]
 
             cursor.execute("""
                 INSERT IGNORE INTO SongGenre(song_id, genre_id)
@@ -77,6 +733,73 @@ def load_single_songs(mydb, single_songs):
             """, (song_id, gid))
 
     mydb.commit()
+    dimensions.publish()
+    if index is not None:
+        index.publish()
+    return rejects
+
+
+def _with_existing_singles(cursor, single_songs, batch_size: int):
+    """
+    Yields (song, exists) for each song, where exists tells whether its
+    (title, artist) was already in Song when its chunk was looked up.
+    """
+    for chunk in _chunks(single_songs, batch_size):
+        yield from zip(chunk, _existing_keys(
+            cursor, "Song", "song_id", [(title, artist) for title, _, artist, _ in chunk]))
+
+
+def _load_single_songs_bulk(mydb, single_songs, batch_size: int,
+                            commit_every: int = None, reject_sink=None, stats=None,
+                            index=None):
+    """
+    Set-based version of load_single_songs.
+
+    Per chunk this issues a fixed number of statements regardless of size:
+    one multi-row INSERT IGNORE each for Artist and Genre, one genre_id
+    lookup, two song_id lookups around one multi-row INSERT IGNORE into
+    Song, and one multi-row insert into SongGenre.
+
+    Rejects match the row-by-row loader: a song is rejected if it already
+    exists, or if an earlier row of the input has the same (title, artist).
+    """
+    cursor = mydb.cursor()
+    rejects = set() if reject_sink is None else reject_sink
+    dimensions = DIMENSIONS.session(mydb, cursor)
+
+    for chunk in _committing(mydb, _chunks(single_songs, batch_size), commit_every, weight=len):
+        # 1. Ensure artists and genres exist (deduplicated, in input order)
+        dimensions.ensure_artists([artist for _, _, artist, _ in chunk])
+        genre_ids = dimensions.genre_ids([g for _, genre_names, _, _ in chunk for g in genre_names])
+
+        # 2. Insert all songs at once; existing and repeated ones are skipped
+        song_ids = _insert_new_keyed_rows(
+            cursor, "Song", "song_id",
+            "INSERT IGNORE INTO Song (title, release_date, artist_name, album_id) VALUES",
+            [(title, artist) for title, _, artist, _ in chunk],
+            [(title, release_date, artist, None) for title, _, artist, release_date in chunk],
+            index
+        )
+
+        # 3. Collect genre links for the new songs
+        links = []
+        for song_id, (title, genre_names, artist, _) in zip(song_ids, chunk):
+            if song_id is None:
+                rejects.add((title, artist))
+                _count(stats, "duplicate")
+                continue
+            _count(stats, "inserted")
+            for g in genre_names:
+                if g in genre_ids:
+                    links.append((song_id, genre_ids[g]))
+
+        _insert_rows(cursor, "INSERT IGNORE INTO SongGenre(song_id, genre_id) VALUES",
+                     list(dict.fromkeys(links)))
+
+    mydb.commit()
+    dimensions.publish()
+    if index is not None:
+        index.publish()
     return rejects
 
 
@@ -85,108 +808,179 @@ def get_most_prolific_individual_artists(mydb, n, year_range):
     Returns the top n artists with the most single releases in a given year range.
     """
     cursor = mydb.cursor()
-    start_year, end_year = year_range
+    start_date, end_date = _date_range(year_range)
 
     cursor.execute("""
         SELECT artist_name, COUNT(*) AS num_singles
         FROM Song
         WHERE album_id IS NULL
-          AND YEAR(release_date) BETWEEN %s AND %s
+          AND release_date >= %s AND release_date < %s
         GROUP BY artist_name
         ORDER BY num_singles DESC, artist_name ASC
         LIMIT %s;
-    """, (start_year, end_year, n))
+    """, (start_date, end_date, n))
 
     return cursor.fetchall()
 
 
-def get_artists_last_single_in_year(mydb, year: int) -> Set[str]:
+def get_artists_last_single_in_year(mydb, year: int, use_summaries: bool = False) -> Set[str]:
     """
     Get all artists who released their last single in the given year.
 
     "Last single" means: take all singles (Song with album_id IS NULL),
     find the maximum YEAR(release_date) for each artist, and keep those
     whose max year equals the input year.
+
+    With use_summaries=True the last single dates are read from
+    ArtistSingleStats (migrations/004_artist_single_stats.sql), one range
+    of its last_single index, instead of grouping all singles.
     """
     cursor = mydb.cursor()
+    start_date, end_date = _date_range((year, year))
+
+    if use_summaries:
+        cursor.execute("""
+            SELECT artist_name
+            FROM ArtistSingleStats
+            WHERE last_single >= %s AND last_single < %s
+        """, (start_date, end_date))
+        return {row[0] for row in cursor.fetchall()}
 
     cursor.execute("""
         SELECT artist_name
         FROM Song
         WHERE album_id IS NULL
         GROUP BY artist_name
-        HAVING MAX(YEAR(release_date)) = %s
-    """, (year,))
+        HAVING MAX(release_date) >= %s AND MAX(release_date) < %s
+    """, (start_date, end_date))
 
     return {row[0] for row in cursor.fetchall()}
 
 
-def load_albums(mydb, albums: List[Tuple[str, str, str, str, List[str]]]) -> Set[Tuple[str, str]]:
+def load_albums(mydb, albums: Iterable[Tuple[str, str, str, str, List[str]]],
+                bulk: bool = False,
+                batch_size: int = DEFAULT_BATCH_SIZE,
+                commit_every: int = None, reject_sink=None,
+                prepared: bool = False, conflicts: str = "exception",
+                stats: dict = None, index=None) -> Set[Tuple[str, str]]:
     """
     Add albums to the database.
 
-    albums: list of tuples (album_title, genre_name, artist_name, release_date, [song_titles])
+    albums: iterable of tuples (album_title, genre_name, artist_name, release_date, [song_titles])
+
+    With bulk=True, albums are written in chunks of `batch_size` using
+    multi-row statements (see _load_albums_bulk).
+
+    commit_every, reject_sink, prepared, conflicts and index work as in
+    load_single_songs. With conflicts="check", the albums and tracks of
+    each chunk of `batch_size` albums are looked up in two queries.
+
+    stats: dict that receives counts per outcome: "inserted",
+    "duplicate_album", "unknown_genre", "tracks_inserted" and
+    "duplicate_track" ("track_failed" for other refused tracks with
+    conflicts="exception").
 
     Returns:
         Set of (album_title, artist_name) that were rejected because
         the artist already has an album with that title.
     """
-    cursor = mydb.cursor()
-    rejects: Set[Tuple[str, str]] = set()
+    if conflicts not in CONFLICT_MODES:
+        raise ValueError(f"conflicts must be one of {CONFLICT_MODES}")
+    if index is not None:
+        _check_index(mydb, index)
+        index = index.session()
+    if bulk:
+        return _load_albums_bulk(mydb, albums, batch_size, commit_every, reject_sink, stats, index)
+
+    cursor = _loader_cursor(mydb, prepared)
+    rejects = set() if reject_sink is None else reject_sink
+    dimensions = DIMENSIONS.session(mydb, cursor)
+    checked = conflicts == "check"
+    if checked:
+        albums = _with_existing_albums(mydb.cursor(), albums, batch_size)
+    else:
+        albums = ((album, None, None) for album in albums)
+
+    for album, album_exists, tracks_exist in _committing(mydb, albums, commit_every):
+        album_title, genre_name, artist_name, release_date, song_titles = album
 
-    for album_title, genre_name, artist_name, release_date, song_titles in albums:
         # ensure artist exists
-        cursor.execute("INSERT IGNORE INTO Artist(name) VALUES (%s)", (artist_name,))
+        dimensions.ensure_artists([artist_name])
 
         # ensure genre exists
-        cursor.execute("INSERT IGNORE INTO Genre(name) VALUES (%s)", (genre_name,))
-        cursor.execute("SELECT genre_id FROM Genre WHERE name=%s", (genre_name,))
-        genre_row = cursor.fetchone()
-        if not genre_row:
+        genre_id = dimensions.genre_ids([genre_name]).get(genre_name)
+        if genre_id is None:
             rejects.add((album_title, artist_name))
+            _count(stats, "unknown_genre")
             continue
-        genre_id = genre_row[0]
 
-        # check if this (album_title, artist_name) already exists
-        cursor.execute("""
-            SELECT album_id
-            FROM Album
-            WHERE title = %s AND artist_name = %s
-        """, (album_title, artist_name))
-        if cursor.fetchone():
-            # reject, don't insert songs for this album
-            rejects.add((album_title, artist_name))
-            continue
+        if checked:
+            # insert album unless the chunk lookup (or the insert) finds it
+            album_id = None if album_exists else _insert_unless_duplicate(cursor, "Album", """
+                INSERT IGNORE INTO Album (title, release_date, artist_name, genre_id)
+                VALUES (%s, %s, %s, %s)
+            """, (album_title, release_date, artist_name, genre_id), (album_title, artist_name))
+            if album_id is None:
+                rejects.add((album_title, artist_name))
+                _count(stats, "duplicate_album")
+                continue
+        else:
+            # check if this (album_title, artist_name) already exists
+            cursor.execute("""
+                SELECT album_id
+                FROM Album
+                WHERE title = %s AND artist_name = %s
+            """, (album_title, artist_name))
+            if cursor.fetchone():
+                # reject, don't insert songs for this album
+                rejects.add((album_title, artist_name))
+                _count(stats, "duplicate_album")
+                continue
 
-        # insert album
-        cursor.execute("""
-            INSERT INTO Album (title, release_date, artist_name, genre_id)
-            VALUES (%s, %s, %s, %s)
-        """, (album_title, release_date, artist_name, genre_id))
-        album_id = cursor.lastrowid
+            # insert album
+            cursor.execute("""
+                INSERT INTO Album (title, release_date, artist_name, genre_id)
+                VALUES (%s, %s, %s, %s)
+            """, (album_title, release_date, artist_name, genre_id))
+            album_id = cursor.lastrowid
+        _count(stats, "inserted")
 
         # insert songs that belong to this album
-        for song_title in song_titles:
-            # try to insert song; uniqueness is (title, artist_name)
-            try:
-                cursor.execute("""
-                    INSERT INTO Song (title, release_date, artist_name, album_id)
+        for i, song_title in enumerate(song_titles):
+            if checked:
+                # uniqueness is (title, artist_name); a taken title is skipped
+                song_id = None if tracks_exist[i] else _insert_unless_duplicate(cursor, "Song", """
+                    INSERT IGNORE INTO Song (title, release_date, artist_name, album_id)
                     VALUES (%s, %s, %s, %s)
-                """, (song_title, release_date, artist_name, album_id))
-            except Exception:
-                # conflict on (title, artist_name) → skip this song
-                continue
-
-            # get song_id
-            cursor.execute("""
-                SELECT song_id FROM Song
-                WHERE title=%s AND artist_name=%s
-                  AND album_id = %s
-            """, (song_title, artist_name, album_id))
-            row = cursor.fetchone()
-            if not row:
-                continue
-            song_id = row[0]
+                """, (song_title, release_date, artist_name, album_id), (song_title, artist_name))
+                if song_id is None:
+                    _count(stats, "duplicate_track")
+                    continue
+            else:
+                # try to insert song; uniqueness is (title, artist_name)
+                try:
+                    cursor.execute("""
+                        INSERT INTO Song (title, release_date, artist_name, album_id)
+                        VALUES (%s, %s, %s, %s)
+                    """, (song_title, release_date, artist_name, album_id))
+                except Exception as e:
+                    # conflict on (title, artist_name) → skip this song
+                    _count(stats, "duplicate_track" if _is_duplicate_key(e) else "track_failed")
+                    continue
+
+                # get song_id
+                cursor.execute("""
+                    SELECT song_id FROM Song
+                    WHERE title=%s AND artist_name=%s
+                      AND album_id = %s
+                """, (song_title, artist_name, album_id))
+                row = cursor.fetchone()
+                if not row:
+                    continue
+                song_id = row[0]
+            _count(stats, "tracks_inserted")
+            if index is not None:
+                index.add_song(song_title, artist_name, song_id)
 
             # link album genre to song
             cursor.execute("""
@@ -195,14 +989,111 @@ def load_albums(mydb, albums: List[Tuple[str, str, str, str, List[str]]]) -> Set
             """, (song_id, genre_id))
 
     mydb.commit()
+    dimensions.publish()
+    if index is not None:
+        index.publish()
+    return rejects
+
+
+def _with_existing_albums(cursor, albums, batch_size: int):
+    """
+    Yields (album, album_exists, [track_exists, ...]) for each album, as
+    found in Album and Song when its chunk was looked up. Tracks are only
+    looked up for albums that do not exist yet (None for the others).
+    """
+    for chunk in _chunks(albums, batch_size):
+        album_exists = _existing_keys(
+            cursor, "Album", "album_id", [(album[0], album[2]) for album in chunk])
+        track_exists = iter(_existing_keys(cursor, "Song", "song_id", [
+            (song_title, album[2])
+            for album, exists in zip(chunk, album_exists) if not exists
+            for song_title in album[4]
+        ]))
+        for album, exists in zip(chunk, album_exists):
+            yield album, exists, None if exists else [next(track_exists) for _ in album[4]]
+
+
+def _load_albums_bulk(mydb, albums, batch_size: int, commit_every: int = None,
+                      reject_sink=None, stats=None, index=None) -> Set[Tuple[str, str]]:
+    """
+    Set-based version of load_albums.
+
+    Per chunk of albums: multi-row INSERT IGNORE for Artist and Genre, one
+    genre_id lookup, then albums and all of their tracks are each inserted
+    with one multi-row statement framed by two id lookups, and SongGenre
+    links go in as one multi-row insert.
+
+    Same outcome as the row-by-row loader: an album that exists (or repeats
+    an earlier album of the input) is rejected with none of its tracks, and
+    a track whose (title, artist) is already taken is skipped.
+    """
+    cursor = mydb.cursor()
+    rejects = set() if reject_sink is None else reject_sink
+    dimensions = DIMENSIONS.session(mydb, cursor)
+
+    for chunk in _committing(mydb, _chunks(albums, batch_size), commit_every, weight=len):
+        # 1. Ensure artists and genres exist
+        dimensions.ensure_artists([album[2] for album in chunk])
+        genre_ids = dimensions.genre_ids([album[1] for album in chunk])
+
+        # 2. Insert albums; existing and repeated albums are rejected
+        candidates = []
+        for album in chunk:
+            if album[1] in genre_ids:
+                candidates.append(album)
+            else:
+                rejects.add((album[0], album[2]))
+                _count(stats, "unknown_genre")
+
+        album_ids = _insert_new_keyed_rows(
+            cursor, "Album", "album_id",
+            "INSERT IGNORE INTO Album (title, release_date, artist_name, genre_id) VALUES",
+            [(title, artist) for title, _, artist, _, _ in candidates],
+            [(title, release_date, artist, genre_ids[genre])
+             for title, genre, artist, release_date, _ in candidates]
+        )
+
+        # 3. Insert the tracks of the new albums; conflicting tracks are skipped
+        tracks = []
+        for album_id, (title, genre, artist, release_date, song_titles) in zip(album_ids, candidates):
+            if album_id is None:
+                rejects.add((title, artist))
+                _count(stats, "duplicate_album")
+                continue
+            _count(stats, "inserted")
+            for song_title in song_titles:
+                tracks.append((song_title, release_date, artist, album_id, genre_ids[genre]))
+
+        song_ids = _insert_new_keyed_rows(
+            cursor, "Song", "song_id",
+            "INSERT IGNORE INTO Song (title, release_date, artist_name, album_id) VALUES",
+            [(song_title, artist) for song_title, _, artist, _, _ in tracks],
+            [track[:4] for track in tracks],
+            index
+        )
+
+        # 4. Link album genre to the new songs
+        links = [(song_id, track[4]) for song_id, track in zip(song_ids, tracks)
+                 if song_id is not None]
+        _count(stats, "tracks_inserted", len(links))
+        _count(stats, "duplicate_track", len(tracks) - len(links))
+        _insert_rows(cursor, "INSERT IGNORE INTO SongGenre(song_id, genre_id) VALUES", links)
+
+    mydb.commit()
+    dimensions.publish()
+    if index is not None:
+        index.publish()
     return rejects
 
 
-def get_top_song_genres(mydb, n: int) -> List[Tuple[str, int]]:
+def get_top_song_genres(mydb, n: int, use_summaries: bool = False) -> List[Tuple[str, int]]:
     """
     Get n genres that are most represented in number of songs.
     Songs include singles as well as songs in albums.
 
+    With use_summaries=True the counts are read from GenreSongCount
+    (migrations/002_summary_tables.sql) instead of aggregating SongGenre.
+
     Returns:
         list of (genre_name, number_of_songs), sorted by:
         - descending number_of_songs
@@ -210,6 +1101,17 @@ def get_top_song_genres(mydb, n: int) -> List[Tuple[str, int]]:
     """
     cursor = mydb.cursor()
 
+    if use_summaries:
+        cursor.execute("""
+            SELECT g.name, c.num_songs
+            FROM GenreSongCount c
+            JOIN Genre g ON c.genre_id = g.genre_id
+            WHERE c.num_songs > 0
+            ORDER BY c.num_songs DESC, g.name ASC
+            LIMIT %s
+        """, (n,))
+        return cursor.fetchall()
+
     cursor.execute("""
         SELECT g.name, COUNT(*) AS num_songs
         FROM SongGenre sg
@@ -222,37 +1124,56 @@ def get_top_song_genres(mydb, n: int) -> List[Tuple[str, int]]:
     return cursor.fetchall()
 
 
-def get_album_and_single_artists(mydb) -> Set[str]:
+def get_album_and_single_artists(mydb, use_summaries: bool = False) -> Set[str]:
     """
     Get artists who have released albums as well as singles.
 
     - Album artist: appears in Album.artist_name
     - Single artist: appears in Song.artist_name for rows with album_id IS NULL
+
+    EXISTS makes the Album side a semi-join: each single is checked for
+    one album of its artist, instead of being joined to every one of them
+    (singles x albums rows) and deduplicated afterwards. Singles are read
+    from the Song(album_id, artist_name) index (migrations/003).
+
+    With use_summaries=True the single and album counts in
+    ArtistSingleStats (migrations/004) are read instead.
     """
     cursor = mydb.cursor()
 
+    if use_summaries:
+        cursor.execute("""
+            SELECT artist_name
+            FROM ArtistSingleStats
+            WHERE num_singles > 0 AND num_albums > 0
+        """)
+        return {row[0] for row in cursor.fetchall()}
+
     cursor.execute("""
         SELECT DISTINCT s.artist_name
         FROM Song s
-        JOIN Album a ON s.artist_name = a.artist_name
         WHERE s.album_id IS NULL
+          AND EXISTS (SELECT 1 FROM Album a WHERE a.artist_name = s.artist_name)
     """)
 
     return {row[0] for row in cursor.fetchall()}
 
 
-def load_users(mydb, users: List[str]) -> Set[str]:
+def load_users(mydb, users: Iterable[str], commit_every: int = None,
+               reject_sink=None, prepared: bool = False) -> Set[str]:
     """
     Add users to the database.
 
+    commit_every, reject_sink and prepared work as in load_single_songs.
+
     Returns:
         Set of usernames that were NOT added (rejected)
         because they already exist.
     """
-    cursor = mydb.cursor()
-    rejects: Set[str] = set()
+    cursor = _loader_cursor(mydb, prepared)
+    rejects = set() if reject_sink is None else reject_sink
 
-    for username in users:
+    for username in _committing(mydb, users, commit_every):
         # try to insert, but ignore on duplicate
         cursor.execute("INSERT IGNORE INTO User(username) VALUES (%s)", (username,))
         # if rowcount == 0, insert failed (duplicate)
@@ -265,46 +1186,90 @@ def load_users(mydb, users: List[str]) -> Set[str]:
 
 def load_song_ratings(
     mydb,
-    song_ratings: List[Tuple[str, Tuple[str, str], int, str]]
+    song_ratings: Iterable[Tuple[str, Tuple[str, str], int, str]],
+    bulk: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    commit_every: int = None,
+    reject_sink=None,
+    prepared: bool = False,
+    upsert: bool = False,
+    stats: dict = None,
+    index=None
 ) -> Set[Tuple[str, str, str]]:
     """
     Load ratings for songs.
 
-    song_ratings: list of (username, (artist_name, song_title), rating, date)
+    song_ratings: iterable of (username, (artist_name, song_title), rating, date)
+
+    With bulk=True, ratings are validated in chunks of `batch_size` against
+    client-side caches and written with multi-row INSERTs
+    (see _load_song_ratings_bulk).
+
+    With upsert=True, a rating for a song the user already rated replaces
+    the stored one if its date is the same or later (last write wins by
+    rating_date) instead of being rejected, so a feed can be replayed or
+    corrected. Always runs in chunks of `batch_size` (see
+    _upsert_song_ratings).
+
+    commit_every, reject_sink and prepared work as in load_single_songs.
+    stats: dict that receives counts per outcome: "inserted", "rejected",
+    and with upsert=True "updated" and "unchanged" (counted per (user, song)
+    pair of each chunk rather than per input row).
+    index: CatalogIndex (music_db_index.py) holding every song; songs are
+    resolved in it instead of by querying Song, and the bulk and upsert
+    paths keep no per-song cache.
 
     Returns:
         set of (username, artist_name, song_title) that are rejected because:
           (a) username not in User
           (b) (artist,song) not in Song
-          (c) user already rated that song
+          (c) user already rated that song (not with upsert=True)
           (d) rating not in 1..5
+          (e) rating_date is not a date (upsert=True)
     """
-    cursor = mydb.cursor()
-    rejects: Set[Tuple[str, str, str]] = set()
+    if index is not None:
+        _check_index(mydb, index)
+    if upsert:
+        return _upsert_song_ratings(mydb, song_ratings, batch_size, commit_every,
+                                    reject_sink, stats, index)
+    if bulk:
+        return _load_song_ratings_bulk(mydb, song_ratings, batch_size, commit_every,
+                                       reject_sink, stats, index)
+
+    cursor = _loader_cursor(mydb, prepared)
+    rejects = set() if reject_sink is None else reject_sink
+
+    for rating in _committing(mydb, song_ratings, commit_every):
+        username, (artist_name, song_title), rating_value, rating_date = rating
 
-    for username, (artist_name, song_title), rating_value, rating_date in song_ratings:
         # (d) rating out of range
         if rating_value < 1 or rating_value > 5:
             rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
             continue
 
         # (a) check user exists
         cursor.execute("SELECT 1 FROM User WHERE username=%s", (username,))
         if cursor.fetchone() is None:
             rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
             continue
 
         # (b) find song by (artist_name, title)
-        cursor.execute("""
-            SELECT song_id
-            FROM Song
-            WHERE title = %s AND artist_name = %s
-        """, (song_title, artist_name))
-        song_row = cursor.fetchone()
-        if song_row is None:
+        if index is not None:
+            song_id = index.song_id(song_title, artist_name)
+        else:
+            cursor.execute("""
+                SELECT song_id
+                FROM Song
+                WHERE title = %s AND artist_name = %s
+            """, (song_title, artist_name))
+            song_row = cursor.fetchone()
+            song_id = None if song_row is None else song_row[0]
+        if song_id is None:
             rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
             continue
-        song_id = song_row[0]
 
         # (c) check if this (username, song_id) already rated
         cursor.execute("""
@@ -314,6 +1279,7 @@ def load_song_ratings(
         """, (username, song_id))
         if cursor.fetchone() is not None:
             rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
             continue
 
         # all good, insert rating
@@ -321,6 +1287,203 @@ def load_song_ratings(
             INSERT INTO Rating (username, song_id, rating_value, rating_date)
             VALUES (%s, %s, %s, %s)
         """, (username, song_id, rating_value, rating_date))
+        _count(stats, "inserted")
+
+    mydb.commit()
+    return rejects
+
+
+def _valid_ratings(cursor, chunk, users: Dict[str, str], songs: Dict[Tuple[str, str], int],
+                   rejects, stats=None, index=None) -> List[Tuple]:
+    """
+    Checks (a), (b) and (d) of load_song_ratings for a chunk of ratings,
+    adding the failures to `rejects`.
+
+    users and songs are caches kept by the caller across chunks (input
+    username -> stored username or None, (title, artist) -> song_id or
+    None); names and songs not seen yet are looked up in one query each.
+    With an index, songs are resolved in it and `songs` is not used.
+
+    Returns:
+        (stored username, song_id, username, artist_name, song_title,
+        rating_value, rating_date) for each valid rating, in input order
+    """
+    # (d) rating out of range
+    candidates = []
+    for username, (artist_name, song_title), rating_value, rating_date in chunk:
+        if rating_value < 1 or rating_value > 5:
+            rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
+        else:
+            candidates.append((username, artist_name, song_title, rating_value, rating_date))
+
+    # (a) and (b): fill the caches with the names and songs not seen yet
+    new_users = list(dict.fromkeys(c[0] for c in candidates if c[0] not in users))
+    if new_users:
+        values_sql, params = _values_table(("username",), [(u,) for u in new_users])
+        cursor.execute(f"""
+            SELECT v.username, u.username
+            FROM ({values_sql}) v
+            JOIN User u ON u.username = v.username
+        """, params)
+        users.update(dict.fromkeys(new_users))
+        users.update(cursor.fetchall())
+
+    if index is None:
+        new_songs = list(dict.fromkeys((c[2], c[1]) for c in candidates if (c[2], c[1]) not in songs))
+        song_ids = _resolve_ids(cursor, "Song", "song_id", new_songs)
+        for i, key in enumerate(new_songs):
+            songs[key] = song_ids.get(i)
+
+    valid = []
+    for username, artist_name, song_title, rating_value, rating_date in candidates:
+        user = users[username]
+        if index is None:
+            song_id = songs[(song_title, artist_name)]
+        else:
+            song_id = index.song_id(song_title, artist_name)
+        if user is None or song_id is None:
+            rejects.add((username, artist_name, song_title))
+            _count(stats, "rejected")
+        else:
+            valid.append((user, song_id, username, artist_name, song_title, rating_value, rating_date))
+    return valid
+
+
+def _load_song_ratings_bulk(mydb, song_ratings, batch_size: int, commit_every: int = None,
+                            reject_sink=None, stats=None, index=None) -> Set[Tuple[str, str, str]]:
+    """
+    Pipelined version of load_song_ratings.
+
+    Usernames and (artist, title) keys are resolved once per call and cached,
+    since this function never adds users or songs. Per chunk it issues at
+    most one User lookup, one Song lookup, one Rating lookup for already
+    rated pairs and one multi-row INSERT.
+
+    Users are cached under the name stored in User, so two spellings the
+    database treats as equal count as the same user for check (c), as they
+    do in the row-by-row loader.
+    """
+    cursor = mydb.cursor()
+    rejects = set() if reject_sink is None else reject_sink
+    users: Dict[str, str] = {}      # input username -> stored username or None
+    songs: Dict[Tuple[str, str], int] = {}   # (title, artist) -> song_id or None
+
+    for chunk in _committing(mydb, _chunks(song_ratings, batch_size), commit_every, weight=len):
+        # (a), (b) and (d)
+        valid = _valid_ratings(cursor, chunk, users, songs, rejects, stats, index)
+
+        # (c) pairs that are already rated in the database...
+        rated = set()
+        if valid:
+            values_sql, params = _values_table(("username", "song_id"), [v[:2] for v in valid])
+            cursor.execute(f"""
+                SELECT DISTINCT v.username, v.song_id
+                FROM ({values_sql}) v
+                JOIN Rating r ON r.username = v.username AND r.song_id = v.song_id
+            """, params)
+            rated = {(user, int(song_id)) for user, song_id in cursor.fetchall()}
+
+        # ...or earlier in this chunk (earlier chunks are already in the database)
+        rows = []
+        for user, song_id, username, artist_name, song_title, rating_value, rating_date in valid:
+            if (user, song_id) in rated:
+                rejects.add((username, artist_name, song_title))
+                _count(stats, "rejected")
+                continue
+            rated.add((user, song_id))
+            rows.append((username, song_id, rating_value, rating_date))
+
+        _insert_rows(cursor, "INSERT INTO Rating (username, song_id, rating_value, rating_date) VALUES", rows)
+        _count(stats, "inserted", len(rows))
+
+    mydb.commit()
+    return rejects
+
+
+def _upsert_song_ratings(mydb, song_ratings, batch_size: int, commit_every: int = None,
+                         reject_sink=None, stats=None, index=None) -> Set[Tuple[str, str, str]]:
+    """
+    load_song_ratings with upsert=True.
+
+    Per chunk: the User and Song lookups of the bulk loader, one query for
+    the stored ratings of the chunk's (user, song) pairs, and one multi-row
+    INSERT ... ON DUPLICATE KEY UPDATE with the pairs that end up new or
+    changed. Replaying ratings that are already stored writes nothing.
+
+    Ratings apply in input order, each replacing the current one if its
+    rating_date is the same or later; the UPDATE repeats that comparison,
+    so an older rating never overwrites a newer one written meanwhile.
+    Dates are compared as datetime.date (see _parse_date), so "2020-1-5"
+    and "2020-01-05" are the same day; a rating_date that is not a date is
+    rejected.
+
+    Each (user, song) pair of a chunk is collapsed to its final rating and
+    counted once against the stored row: "inserted", "updated" if the final
+    rating differs from the stored one, "unchanged" otherwise.
+    """
+    cursor = mydb.cursor()
+    rejects = set() if reject_sink is None else reject_sink
+    users: Dict[str, str] = {}      # input username -> stored username or None
+    songs: Dict[Tuple[str, str], int] = {}   # (title, artist) -> song_id or None
+
+    for chunk in _committing(mydb, _chunks(song_ratings, batch_size), commit_every, weight=len):
+        # (a), (b) and (d)
+        valid = _valid_ratings(cursor, chunk, users, songs, rejects, stats, index)
+
+        # (e) rating_date is not a date
+        dated = []
+        for user, song_id, username, artist_name, song_title, rating_value, rating_date in valid:
+            date = _parse_date(rating_date)
+            if date is None:
+                rejects.add((username, artist_name, song_title))
+                _count(stats, "rejected")
+            else:
+                dated.append((user, song_id, username, int(rating_value), date))
+
+        # stored (rating_value, rating_date) of each pair in the chunk
+        stored = {}
+        if dated:
+            values_sql, params = _values_table(("username", "song_id"), [v[:2] for v in dated])
+            cursor.execute(f"""
+                SELECT v.username, v.song_id, r.rating_value, r.rating_date
+                FROM ({values_sql}) v
+                JOIN Rating r ON r.username = v.username AND r.song_id = v.song_id
+            """, params)
+            stored = {(user, int(song_id)): (int(value), _parse_date(date))
+                      for user, song_id, value, date in cursor.fetchall()}
+
+        # apply the chunk in order to the stored state: the final rating of
+        # each pair, and the input spelling of its username for an INSERT
+        final = dict(stored)
+        usernames = {}
+        for user, song_id, username, rating_value, date in dated:
+            key = (user, song_id)
+            old = final.get(key)
+            if old is None or date >= old[1]:
+                final[key] = (rating_value, date)
+            usernames.setdefault(key, username)
+
+        rows = []
+        for key, username in usernames.items():
+            rating, old = final[key], stored.get(key)
+            if old is None:
+                _count(stats, "inserted")
+            elif rating != old:
+                _count(stats, "updated")
+                username = key[0]
+            else:
+                _count(stats, "unchanged")
+                continue
+            rows.append((username, key[1], rating[0], rating[1].isoformat()))
+
+        _insert_rows(cursor, "INSERT INTO Rating (username, song_id, rating_value, rating_date) VALUES", rows, """
+            ON DUPLICATE KEY UPDATE
+              rating_value = CASE WHEN VALUES(rating_date) >= rating_date
+                                  THEN VALUES(rating_value) ELSE rating_value END,
+              rating_date = CASE WHEN VALUES(rating_date) >= rating_date
+                                 THEN VALUES(rating_date) ELSE rating_date END
+        """)
 
     mydb.commit()
     return rejects
@@ -329,27 +1492,45 @@ def load_song_ratings(
 def get_most_rated_songs(
     mydb,
     year_range: Tuple[int, int],
-    n: int
+    n: int,
+    use_summaries: bool = False
 ) -> List[Tuple[str, str, int]]:
     """
     Get the top n most rated songs in the given year range (inclusive).
 
     "Most rated" = number of ratings (count of Rating rows),
     not the rating score.
-    Ties broken by alphabetical order of song title.
+    Ties broken by alphabetical order of song title, then by song_id.
+
+    With use_summaries=True the per-year counts in SongYearRatingCount
+    are summed instead of counting Rating rows.
     """
     cursor = mydb.cursor()
-    start_year, end_year = year_range
+
+    if use_summaries:
+        cursor.execute("""
+            SELECT s.title, s.artist_name, CAST(SUM(c.num_ratings) AS SIGNED) AS num_ratings
+            FROM SongYearRatingCount c
+            JOIN Song s ON c.song_id = s.song_id
+            WHERE c.year BETWEEN %s AND %s
+            GROUP BY c.song_id, s.title, s.artist_name
+            HAVING num_ratings > 0
+            ORDER BY num_ratings DESC, s.title ASC, c.song_id ASC
+            LIMIT %s
+        """, (year_range[0], year_range[1], n))
+        return cursor.fetchall()
+
+    start_date, end_date = _date_range(year_range)
 
     cursor.execute("""
         SELECT s.title, s.artist_name, COUNT(*) AS num_ratings
         FROM Rating r
         JOIN Song s ON r.song_id = s.song_id
-        WHERE YEAR(r.rating_date) BETWEEN %s AND %s
+        WHERE r.rating_date >= %s AND r.rating_date < %s
         GROUP BY r.song_id, s.title, s.artist_name
-        ORDER BY num_ratings DESC, s.title ASC
+        ORDER BY num_ratings DESC, s.title ASC, r.song_id ASC
         LIMIT %s
-    """, (start_year, end_year, n))
+    """, (start_date, end_date, n))
 
     return cursor.fetchall()
 
@@ -357,29 +1538,262 @@ def get_most_rated_songs(
 def get_most_engaged_users(
     mydb,
     year_range: Tuple[int, int],
-    n: int
+    n: int,
+    use_summaries: bool = False
 ) -> List[Tuple[str, int]]:
     """
     Get the top n most engaged users by number of songs they have rated
     in the given year range.
 
     Ties broken by alphabetical username.
+
+    With use_summaries=True the per-year counts in UserYearRatingCount
+    are summed instead of counting Rating rows.
     """
     cursor = mydb.cursor()
-    start_year, end_year = year_range
+
+    if use_summaries:
+        cursor.execute("""
+            SELECT c.username, CAST(SUM(c.num_ratings) AS SIGNED) AS num_rated
+            FROM UserYearRatingCount c
+            WHERE c.year BETWEEN %s AND %s
+            GROUP BY c.username
+            HAVING num_rated > 0
+            ORDER BY num_rated DESC, c.username ASC
+            LIMIT %s
+        """, (year_range[0], year_range[1], n))
+        return cursor.fetchall()
+
+    start_date, end_date = _date_range(year_range)
 
     cursor.execute("""
         SELECT r.username, COUNT(*) AS num_rated
         FROM Rating r
-        WHERE YEAR(r.rating_date) BETWEEN %s AND %s
+        WHERE r.rating_date >= %s AND r.rating_date < %s
         GROUP BY r.username
         ORDER BY num_rated DESC, r.username ASC
         LIMIT %s
-    """, (start_year, end_year, n))
+    """, (start_date, end_date, n))
 
     return cursor.fetchall()
 
 
+def _year_ranges_tables(year_ranges: Sequence[Tuple[int, int]]):
+    """
+    Inline tables for the batched get_* functions:
+        years:  (year, start_date, end_date) for each distinct year
+        ranges: (idx, year) for every year of every range
+
+    Joining Rating or Song against `years` on the date columns counts each
+    year once with the date indexes, without YEAR() on every row. Joining
+    `ranges` on year equality lets the database hash or index that join
+    instead of comparing every year with every range.
+
+    Returns:
+        (years_sql, years_params, ranges_sql, ranges_params)
+    """
+    years = sorted({year for start, end in year_ranges for year in range(start, end + 1)})
+    years_sql, years_params = _values_table(
+        ("year", "start_date", "end_date"),
+        [(year,) + _date_range((year, year)) for year in years]
+    )
+    ranges_sql, ranges_params = _values_table(
+        ("idx", "year"),
+        [(i, year) for i, (start, end) in enumerate(year_ranges) for year in range(start, end + 1)]
+    )
+    return years_sql, years_params, ranges_sql, ranges_params
+
+
+def _rows_by_range(year_ranges, rows) -> Dict[Tuple[int, int], list]:
+    """
+    Groups (idx, *row) results by year_ranges[idx], keeping their order.
+    """
+    result = {year_range: [] for year_range in year_ranges}
+    for row in rows:
+        result[year_ranges[int(row[0])]].append(tuple(row[1:]))
+    return result
+
+
+def get_most_prolific_individual_artists_for_ranges(
+    mydb,
+    n: int,
+    year_ranges: Sequence[Tuple[int, int]]
+) -> Dict[Tuple[int, int], List[Tuple[str, int]]]:
+    """
+    get_most_prolific_individual_artists for several year ranges at once.
+
+    Singles are counted per artist and year once, summed for each range and
+    ranked with ROW_NUMBER() per range, all in one query (see
+    _year_ranges_tables).
+
+    Returns:
+        dict of (start_year, end_year) -> the list the single-range
+        function returns for it
+    """
+    year_ranges = list(dict.fromkeys(tuple(year_range) for year_range in year_ranges))
+    if not any(start <= end for start, end in year_ranges):
+        # no year to count; reversed ranges give [] as in the single-range functions
+        return {year_range: [] for year_range in year_ranges}
+    cursor = mydb.cursor()
+    years_sql, years_params, ranges_sql, ranges_params = _year_ranges_tables(year_ranges)
+
+    cursor.execute(f"""
+        WITH per_year AS (
+            SELECT y.year, s.artist_name, COUNT(*) AS num
+            FROM ({years_sql}) y
+            JOIN Song s ON s.release_date >= y.start_date AND s.release_date < y.end_date
+            WHERE s.album_id IS NULL
+            GROUP BY y.year, s.artist_name
+        ),
+        totals AS (
+            SELECT q.idx, p.artist_name, CAST(SUM(p.num) AS SIGNED) AS num_singles
+            FROM ({ranges_sql}) q
+            JOIN per_year p ON p.year = q.year
+            GROUP BY q.idx, p.artist_name
+        )
+        SELECT idx, artist_name, num_singles
+        FROM (
+            SELECT idx, artist_name, num_singles,
+                   ROW_NUMBER() OVER (PARTITION BY idx
+                                      ORDER BY num_singles DESC, artist_name ASC) AS rn
+            FROM totals
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY idx, rn
+    """, years_params + ranges_params + [n])
+
+    return _rows_by_range(year_ranges, cursor.fetchall())
+
+
+def get_most_rated_songs_for_ranges(
+    mydb,
+    year_ranges: Sequence[Tuple[int, int]],
+    n: int,
+    use_summaries: bool = False
+) -> Dict[Tuple[int, int], List[Tuple[str, str, int]]]:
+    """
+    get_most_rated_songs for several year ranges at once.
+
+    Ratings are counted per song and year once (or read from
+    SongYearRatingCount with use_summaries=True), summed for each range and
+    ranked with ROW_NUMBER() per range, all in one query (see
+    _year_ranges_tables).
+
+    Returns:
+        dict of (start_year, end_year) -> the list the single-range
+        function returns for it
+    """
+    year_ranges = list(dict.fromkeys(tuple(year_range) for year_range in year_ranges))
+    if not any(start <= end for start, end in year_ranges):
+        # no year to count; reversed ranges give [] as in the single-range functions
+        return {year_range: [] for year_range in year_ranges}
+    cursor = mydb.cursor()
+    years_sql, years_params, ranges_sql, ranges_params = _year_ranges_tables(year_ranges)
+
+    if use_summaries:
+        per_year_sql = """
+            SELECT song_id, year, num_ratings AS num
+            FROM SongYearRatingCount
+            WHERE year BETWEEN %s AND %s
+        """
+        per_year_params = [min(start for start, _ in year_ranges), max(end for _, end in year_ranges)]
+    else:
+        per_year_sql = f"""
+            SELECT y.year, r.song_id, COUNT(*) AS num
+            FROM ({years_sql}) y
+            JOIN Rating r ON r.rating_date >= y.start_date AND r.rating_date < y.end_date
+            GROUP BY y.year, r.song_id
+        """
+        per_year_params = years_params
+
+    cursor.execute(f"""
+        WITH per_year AS ({per_year_sql}),
+        totals AS (
+            SELECT q.idx, p.song_id, CAST(SUM(p.num) AS SIGNED) AS num_ratings
+            FROM ({ranges_sql}) q
+            JOIN per_year p ON p.year = q.year
+            GROUP BY q.idx, p.song_id
+            HAVING CAST(SUM(p.num) AS SIGNED) > 0
+        )
+        SELECT idx, title, artist_name, num_ratings
+        FROM (
+            SELECT t.idx, s.title, s.artist_name, t.num_ratings,
+                   ROW_NUMBER() OVER (PARTITION BY t.idx
+                                      ORDER BY t.num_ratings DESC, s.title ASC, s.song_id ASC) AS rn
+            FROM totals t
+            JOIN Song s ON s.song_id = t.song_id
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY idx, rn
+    """, per_year_params + ranges_params + [n])
+
+    return _rows_by_range(year_ranges, cursor.fetchall())
+
+
+def get_most_engaged_users_for_ranges(
+    mydb,
+    year_ranges: Sequence[Tuple[int, int]],
+    n: int,
+    use_summaries: bool = False
+) -> Dict[Tuple[int, int], List[Tuple[str, int]]]:
+    """
+    get_most_engaged_users for several year ranges at once.
+
+    Ratings are counted per user and year once (or read from
+    UserYearRatingCount with use_summaries=True), summed for each range and
+    ranked with ROW_NUMBER() per range, all in one query (see
+    _year_ranges_tables).
+
+    Returns:
+        dict of (start_year, end_year) -> the list the single-range
+        function returns for it
+    """
+    year_ranges = list(dict.fromkeys(tuple(year_range) for year_range in year_ranges))
+    if not any(start <= end for start, end in year_ranges):
+        # no year to count; reversed ranges give [] as in the single-range functions
+        return {year_range: [] for year_range in year_ranges}
+    cursor = mydb.cursor()
+    years_sql, years_params, ranges_sql, ranges_params = _year_ranges_tables(year_ranges)
+
+    if use_summaries:
+        per_year_sql = """
+            SELECT username, year, num_ratings AS num
+            FROM UserYearRatingCount
+            WHERE year BETWEEN %s AND %s
+        """
+        per_year_params = [min(start for start, _ in year_ranges), max(end for _, end in year_ranges)]
+    else:
+        per_year_sql = f"""
+            SELECT y.year, r.username, COUNT(*) AS num
+            FROM ({years_sql}) y
+            JOIN Rating r ON r.rating_date >= y.start_date AND r.rating_date < y.end_date
+            GROUP BY y.year, r.username
+        """
+        per_year_params = years_params
+
+    cursor.execute(f"""
+        WITH per_year AS ({per_year_sql}),
+        totals AS (
+            SELECT q.idx, p.username, CAST(SUM(p.num) AS SIGNED) AS num_rated
+            FROM ({ranges_sql}) q
+            JOIN per_year p ON p.year = q.year
+            GROUP BY q.idx, p.username
+            HAVING CAST(SUM(p.num) AS SIGNED) > 0
+        )
+        SELECT idx, username, num_rated
+        FROM (
+            SELECT idx, username, num_rated,
+                   ROW_NUMBER() OVER (PARTITION BY idx
+                                      ORDER BY num_rated DESC, username ASC) AS rn
+            FROM totals
+        ) ranked
+        WHERE rn <= %s
+        ORDER BY idx, rn
+    """, per_year_params + ranges_params + [n])
+
+    return _rows_by_range(year_ranges, cursor.fetchall())
+
+
 def main():
     # not required by the assignment; typically left empty or used
     # for ad-hoc testing.
@@ -114,6 +114,8 @@ CREATE TABLE `Rating` (
   `rating_date` date NOT NULL,
   PRIMARY KEY (`username`,`song_id`),
   KEY `song_id` (`song_id`),
+  KEY `rating_date_song` (`rating_date`,`song_id`),
+  KEY `rating_date_user` (`rating_date`,`username`),
   CONSTRAINT `rating_ibfk_1` FOREIGN KEY (`username`) REFERENCES `User` (`username`) ON DELETE CASCADE,
   CONSTRAINT `rating_ibfk_2` FOREIGN KEY (`song_id`) REFERENCES `Song` (`song_id`) ON DELETE CASCADE,
   CONSTRAINT `rating_chk_1` CHECK ((`rating_value` between 1 and 5))
@@ -146,6 +148,8 @@ CREATE TABLE `Song` (
   UNIQUE KEY `title` (`title`,`artist_name`),
   KEY `artist_name` (`artist_name`),
   KEY `album_id` (`album_id`),
+  KEY `album_date_artist` (`album_id`,`release_date`,`artist_name`),
+  KEY `album_artist` (`album_id`,`artist_name`),
   CONSTRAINT `song_ibfk_1` FOREIGN KEY (`artist_name`) REFERENCES `Artist` (`name`) ON DELETE CASCADE,
   CONSTRAINT `song_ibfk_2` FOREIGN KEY (`album_id`) REFERENCES `Album` (`album_id`) ON DELETE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=632 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
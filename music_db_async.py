@@ -0,0 +1,112 @@
+"""
+asyncio interface to music_db.
+
+AsyncMusicDB mirrors every music_db function as a coroutine. Calls run on
+the connections of a MusicDB pool (music_db_pool.py), each on a worker
+thread of its own, so the event loop is never blocked by a query and
+independent queries run concurrently:
+
+    db = AsyncMusicDB(host="localhost", user="mk2605", password="...", database="musicdb")
+    genres, songs, users = await asyncio.gather(
+        db.get_top_song_genres(10),
+        db.get_most_rated_songs((2020, 2024), 10),
+        db.get_most_engaged_users((2020, 2024), 10),
+    )
+    await db.close()
+
+The SQL is the same code music_db runs, so results are identical to the
+synchronous functions on every backend (backend="sqlite", path=... for
+tests; use a file rather than ":memory:", which gives every pooled
+connection its own empty database).
+
+At most pool_size calls run at once; further calls wait for a
+connection without blocking the loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from music_db_pool import MusicDB
+
+
+class AsyncMusicDB:
+    """
+    Coroutine facade over MusicDB.
+
+    db: an existing MusicDB to share; otherwise one is created from the
+    keyword arguments (pool_size, cache, backend, connection settings, ...)
+    """
+
+    def __init__(self, db=None, **music_db_kwargs):
+        self.db = db if db is not None else MusicDB(**music_db_kwargs)
+        # one thread per pooled connection; more would only wait in acquire()
+        self._executor = ThreadPoolExecutor(max_workers=self.db.pool.size,
+                                            thread_name_prefix="music_db")
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+    async def run(self, func, *args, **kwargs):
+        """
+        Runs any music_db-style function func(conn, *args, **kwargs) in one
+        transaction on a pooled connection.
+        """
+        def in_transaction():
+            with self.db.transaction() as conn:
+                return func(conn, *args, **kwargs)
+
+        return await self._call(in_transaction)
+
+    def cache_stats(self):
+        return self.db.cache_stats()
+
+    async def close(self):
+        """
+        Waits for running calls, then closes the pool.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.db.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # writes
+
+    async def clear_database(self, **kwargs):
+        return await self._call(self.db.clear_database, **kwargs)
+
+    async def load_single_songs(self, single_songs, **kwargs):
+        return await self._call(self.db.load_single_songs, single_songs, **kwargs)
+
+    async def load_albums(self, albums, **kwargs):
+        return await self._call(self.db.load_albums, albums, **kwargs)
+
+    async def load_users(self, users, **kwargs):
+        return await self._call(self.db.load_users, users, **kwargs)
+
+    async def load_song_ratings(self, song_ratings, **kwargs):
+        return await self._call(self.db.load_song_ratings, song_ratings, **kwargs)
+
+    # reads
+
+    async def get_most_prolific_individual_artists(self, n, year_range):
+        return await self._call(self.db.get_most_prolific_individual_artists, n, year_range)
+
+    async def get_artists_last_single_in_year(self, year, **kwargs):
+        return await self._call(self.db.get_artists_last_single_in_year, year, **kwargs)
+
+    async def get_top_song_genres(self, n, **kwargs):
+        return await self._call(self.db.get_top_song_genres, n, **kwargs)
+
+    async def get_album_and_single_artists(self, **kwargs):
+        return await self._call(self.db.get_album_and_single_artists, **kwargs)
+
+    async def get_most_rated_songs(self, year_range, n, **kwargs):
+        return await self._call(self.db.get_most_rated_songs, year_range, n, **kwargs)
+
+    async def get_most_engaged_users(self, year_range, n, **kwargs):
+        return await self._call(self.db.get_most_engaged_users, year_range, n, **kwargs)
@@ -0,0 +1,233 @@
+"""
+Database backends for music_db.
+
+music_db.py is written in MySQL's dialect (%s placeholders, INSERT IGNORE,
+YEAR(), ...). A dialect translates those statements for another engine,
+and SQLiteConnection wraps the standard sqlite3 module behind the small
+part of the mysql-connector API that music_db uses, so every music_db
+function runs unchanged on an embedded SQLite file.
+
+Select a backend with connect():
+
+    mydb = connect("mysql", host="localhost", user="mk2605", password="...", database="musicdb")
+    mydb = connect("sqlite", path="musicdb.sqlite3")
+
+or with the MUSICDB_BACKEND environment variable ("mysql" or "sqlite")
+when no backend is passed.
+"""
+import os
+import re
+import sqlite3
+
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "music_db_sqlite.sql")
+
+
+class MySQLDialect:
+    """
+    The dialect music_db is written in; statements pass through unchanged.
+    """
+    name = "mysql"
+
+    def translate(self, sql: str) -> str:
+        return sql
+
+
+class SQLiteDialect:
+    """
+    Rewrites music_db's MySQL statements for SQLite.
+    """
+    name = "sqlite"
+
+    # Inline tables built by music_db._values_table:
+    #   SELECT %s AS a, %s AS b UNION ALL SELECT %s, %s ...
+    # SQLite caps compound SELECTs at 500 terms, so they become
+    #   SELECT column1 AS a, column2 AS b FROM (VALUES (?, ?), (?, ?) ...)
+    _VALUES_TABLE = re.compile(
+        r"SELECT (\? AS \w+(?:, \? AS \w+)*)((?: UNION ALL SELECT \?(?:, \?)*)*)"
+    )
+    _YEAR = re.compile(r"\bYEAR\(([^()]*)\)")
+    _INSERT_IGNORE = re.compile(r"\bINSERT\s+IGNORE\b")
+    _DROP_TEMPORARY = re.compile(r"\bDROP\s+TEMPORARY\s+TABLE\b")
+    # ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT DO UPDATE SET c = excluded.c
+    # (an upsert without a conflict target needs SQLite 3.35)
+    _ON_DUPLICATE_KEY = re.compile(r"\bON\s+DUPLICATE\s+KEY\s+UPDATE\b(.*)$", re.S)
+    _INSERTED_VALUE = re.compile(r"\bVALUES\((\w+)\)")
+    _TRUNCATE = re.compile(r"^\s*TRUNCATE\s+TABLE\s+(\w+)\s*$")
+    _FOREIGN_KEY_CHECKS = re.compile(r"^\s*SET\s+FOREIGN_KEY_CHECKS\s*=\s*([01])\s*$")
+    _TABLES = re.compile(
+        r"^\s*SELECT\s+table_name\s+FROM\s+information_schema\.tables\s+"
+        r"WHERE\s+table_schema\s*=\s*DATABASE\(\)\s*$"
+    )
+
+    def __init__(self):
+        self._cache = {}
+
+    def _values_table(self, match):
+        aliases = re.findall(r"AS (\w+)", match.group(1))
+        row = "(" + ", ".join(["?"] * len(aliases)) + ")"
+        n_rows = 1 + match.group(2).count("UNION ALL")
+        columns = ", ".join(f"column{i + 1} AS {alias}" for i, alias in enumerate(aliases))
+        return f"SELECT {columns} FROM (VALUES {', '.join([row] * n_rows)})"
+
+    def _upsert(self, match):
+        return "ON CONFLICT DO UPDATE SET" + self._INSERTED_VALUE.sub(r"excluded.\1", match.group(1))
+
+    def _statement(self, sql):
+        """
+        Whole-statement rewrites; returns None for ordinary statements.
+        A tuple means several SQLite statements for one MySQL statement.
+        """
+        truncate = self._TRUNCATE.match(sql)
+        if truncate:
+            # SQLite has no TRUNCATE; also reset the AUTOINCREMENT counter
+            table = truncate.group(1)
+            return (f"DELETE FROM {table}", f"DELETE FROM sqlite_sequence WHERE name = '{table}'")
+        checks = self._FOREIGN_KEY_CHECKS.match(sql)
+        if checks:
+            return f"PRAGMA foreign_keys = {'ON' if checks.group(1) == '1' else 'OFF'}"
+        if self._TABLES.match(sql):
+            return "SELECT name FROM sqlite_master WHERE type = 'table'"
+        return None
+
+    def translate(self, sql: str):
+        translated = self._cache.get(sql)
+        if translated is None:
+            translated = self._statement(sql)
+            if translated is None:
+                translated = sql.replace("%s", "?")
+                translated = self._INSERT_IGNORE.sub("INSERT OR IGNORE", translated)
+                translated = self._DROP_TEMPORARY.sub("DROP TABLE", translated)
+                translated = self._ON_DUPLICATE_KEY.sub(self._upsert, translated)
+                translated = self._YEAR.sub(r"CAST(strftime('%Y', \1) AS INTEGER)", translated)
+                translated = self._VALUES_TABLE.sub(self._values_table, translated)
+            if len(self._cache) < 1024:
+                self._cache[sql] = translated
+        return translated
+
+
+class SQLiteCursor:
+    """
+    sqlite3 cursor with mysql-connector call conventions.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+
+    def execute(self, sql, params=()):
+        translated = self._connection.dialect.translate(sql)
+        if isinstance(translated, tuple):
+            for statement in translated:
+                self._cursor.execute(statement)
+            return
+        self._cursor.execute(translated, tuple(params))
+
+    def executemany(self, sql, seq_params):
+        self._cursor.executemany(self._connection.dialect.translate(sql),
+                                 [tuple(params) for params in seq_params])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    SQLite database exposing the mysql-connector connection methods used by
+    music_db (cursor, commit, rollback, close, ping). The schema from
+    music_db_sqlite.sql is created if the database is empty.
+
+    path: database file, or ":memory:"
+    wal: use write-ahead logging, which lets readers run alongside a writer
+    """
+
+    def __init__(self, path=":memory:", wal=True, timeout=30.0):
+        self.path = path
+        self.dialect = SQLiteDialect()
+        # every ":memory:" connection is a database of its own; the token
+        # object cannot be reused by a later connection the way id() can
+        self.database_key = ("sqlite", object() if path == ":memory:" else os.path.abspath(path))
+        # the pool hands a connection to one thread at a time
+        self.raw = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self.raw.execute("PRAGMA foreign_keys = ON")
+        if wal and path != ":memory:":
+            self.raw.execute("PRAGMA journal_mode = WAL")
+            self.raw.execute("PRAGMA synchronous = NORMAL")
+        if self.raw.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'Song'").fetchone()[0] == 0:
+            with open(SQLITE_SCHEMA) as f:
+                self.raw.executescript(f.read())
+
+    def cursor(self, prepared=False, buffered=False):
+        # sqlite3 caches compiled statements itself, so `prepared` needs no work
+        return SQLiteCursor(self)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def ping(self, reconnect=False):
+        self.raw.execute("SELECT 1")
+
+    def is_connected(self):
+        try:
+            self.ping()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def close(self):
+        self.raw.close()
+
+
+def connect(backend=None, **kwargs):
+    """
+    Opens a music_db connection.
+
+    backend: "mysql" (keyword arguments go to mysql.connector.connect) or
+    "sqlite" (keyword arguments go to SQLiteConnection). Defaults to the
+    MUSICDB_BACKEND environment variable, then "mysql".
+
+    MySQL-style arguments are accepted for SQLite too, so a script can
+    switch backends without changing its connect call: host, port, user
+    and password are ignored, and database="musicdb" opens musicdb.sqlite3.
+    """
+    backend = backend or os.environ.get("MUSICDB_BACKEND", "mysql")
+    if backend == "mysql":
+        import mysql.connector
+        mydb = mysql.connector.connect(**kwargs)
+        mydb.dialect = MySQLDialect()
+        mydb.database_key = ("mysql", kwargs.get("host", "localhost"), kwargs.get("port", 3306),
+                             kwargs.get("unix_socket"), kwargs.get("database"))
+        return mydb
+    if backend == "sqlite":
+        for key in ("host", "port", "user", "password"):
+            kwargs.pop(key, None)
+        if "database" in kwargs:
+            kwargs.setdefault("path", kwargs.pop("database") + ".sqlite3")
+        return SQLiteConnection(**kwargs)
+    raise ValueError(f"unknown backend {backend!r}, expected 'mysql' or 'sqlite'")
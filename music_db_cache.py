@@ -0,0 +1,124 @@
+"""
+Result cache for the music_db read functions.
+
+Results of the get_* functions only change when a load_* function or
+clear_database commits, so they can be served from memory until a write
+touches the data they are computed from. Entries are also bounded in
+number (least recently used are evicted first) and optionally expire
+after a TTL, which covers writes made by other processes.
+
+Used by MusicDB (music_db_pool.py) when created with cache=ResultCache(...).
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+# What each read function is computed from
+READ_DEPENDENCIES = {
+    "get_most_prolific_individual_artists": {"singles"},
+    "get_artists_last_single_in_year": {"singles"},
+    "get_top_song_genres": {"song_genres"},
+    "get_album_and_single_artists": {"singles", "albums"},
+    "get_most_rated_songs": {"ratings"},
+    "get_most_engaged_users": {"ratings"},
+}
+
+# What each write function can change
+WRITE_EFFECTS = {
+    "load_single_songs": {"singles", "song_genres"},
+    "load_albums": {"albums", "song_genres"},
+    "load_users": {"users"},
+    "load_song_ratings": {"ratings"},
+    "clear_database": {"singles", "albums", "song_genres", "users", "ratings"},
+}
+
+
+class ResultCache:
+    """
+    LRU cache of read results keyed by (function name, arguments).
+
+    maxsize: number of results kept
+    ttl: seconds a result stays valid, or None to keep it until invalidated
+    """
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()   # (name, args) -> (expires_at, result)
+        self._lock = threading.Lock()
+        self._generation = 0   # bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(name, args, kwargs):
+        # year ranges may be passed as lists
+        args = tuple(tuple(a) if isinstance(a, list) else a for a in args)
+        return name, args, tuple(sorted(kwargs.items()))
+
+    def call(self, name, compute, *args, **kwargs):
+        """
+        Returns the cached result of `name` for these arguments, calling
+        compute(*args, **kwargs) and storing its result on a miss.
+        Callers get a copy, so changing it does not change the cache.
+        """
+        key = self._key(name, args, kwargs)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(entry[1])
+            self.misses += 1
+            generation = self._generation
+
+        result = compute(*args, **kwargs)
+
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            if generation != self._generation:
+                # a write finished while we were reading; the result may be stale
+                return copy.copy(result)
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return copy.copy(result)
+
+    def invalidate_for(self, write_name):
+        """
+        Drops the results that the write function `write_name` may have
+        changed. Unknown names drop everything.
+        """
+        effects = WRITE_EFFECTS.get(write_name)
+        with self._lock:
+            stale = [key for key in self._entries
+                     if effects is None
+                     or READ_DEPENDENCIES.get(key[0], effects) & effects]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            self._generation += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Returns dict with hits, misses, hit_rate, invalidations and size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "size": len(self._entries),
+            }
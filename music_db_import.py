@@ -0,0 +1,465 @@
+"""
+File-based bulk import for very large catalog drops.
+
+The import_* functions take the same input as load_single_songs,
+load_albums and load_song_ratings and return the same reject sets, but
+instead of sending rows over the connection they:
+
+    1. stream the input into temporary TSV files,
+    2. LOAD DATA LOCAL INFILE them into TEMPORARY staging tables,
+    3. resolve artists, genres, ids and rejects with a few set-based
+       statements (INSERT ... SELECT, NOT EXISTS anti-joins), and
+    4. read the rejects back with one query.
+
+The input order is kept as a sequence number in the staging tables, so
+"first occurrence wins" works as in the Python loaders: a row is accepted
+if its key is not in the database and no earlier row of the input has it.
+
+Rows the schema would refuse (a title or name longer than its column, a
+date that is not a date) are found while streaming and staged with ok = 0.
+They still add their artist and genres, as they do in the loaders, but
+never win a key; singles, albums and ratings among them are rejects and
+tracks among them are skipped. The winners then go in with plain INSERTs,
+so a row the database still refuses raises instead of being dropped.
+
+MySQL must allow local infile on both ends:
+    SET GLOBAL local_infile = 1;                     (server)
+    connect(..., allow_local_infile=True)            (client)
+
+Other backends (SQLite) have no LOAD DATA; the staging files are read back
+and inserted with executemany, and the rest runs unchanged.
+
+Usage:
+    python music_db_import.py singles singles.jsonl --user mk2605 --password ...
+    python music_db_import.py ratings ratings.jsonl --backend sqlite --path musicdb.sqlite3 --rejects rejects.tsv
+
+Input files have one JSON array per line in the loader's tuple shape,
+e.g. ["Title", ["Pop", "Rock"], "Artist", "2020-01-01"] for a single.
+"""
+import argparse
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Set, Tuple
+
+from music_db import RejectWriter, _parse_date
+from music_db_backends import connect
+
+# Text columns of the staging tables, wide enough for any valid value and
+# compared with the same collation as the real tables
+TEXT_TYPES = {"mysql": "VARCHAR(1024)", "sqlite": "TEXT COLLATE NOCASE"}
+
+# Rows inserted per executemany when a backend has no LOAD DATA
+FALLBACK_BATCH_SIZE = 10000
+
+# Column lengths of the schema (music_db.sql); longer values are refused
+MAX_LENGTHS = {"song_title": 300, "album_title": 255, "artist_name": 100, "username": 30}
+
+# name -> columns; every text column is declared {text}
+STAGING_TABLES = {
+    # ok: 1 if the row passed _fits / _parse_date
+    "StageSingle": "seq BIGINT PRIMARY KEY, title {text}, artist_name {text}, release_date DATE, ok TINYINT",
+    "StageSingleGenre": "seq BIGINT, genre_name {text}",
+    "StageAlbum": "seq BIGINT PRIMARY KEY, title {text}, genre_name {text}, "
+                  "artist_name {text}, release_date DATE, ok TINYINT",
+    "StageTrack": "ord BIGINT PRIMARY KEY, seq BIGINT, title {text}, ok TINYINT",
+    "StageRating": "seq BIGINT PRIMARY KEY, username {text}, artist_name {text}, "
+                   "title {text}, rating_value INT, rating_date DATE",
+    # first occurrences that will be inserted
+    "StageWinner": "seq BIGINT PRIMARY KEY",
+    "StageTrackWinner": "ord BIGINT PRIMARY KEY",
+    "StageRatingWinner": "seq BIGINT PRIMARY KEY, song_id BIGINT",
+}
+
+_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r", "\0": "\\0"})
+_UNESCAPES = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "0": "\0"}
+
+
+def _fits(value, column) -> bool:
+    """
+    Whether `value` can be stored in the column of that name.
+    """
+    return isinstance(value, str) and len(value) <= MAX_LENGTHS[column]
+
+
+def _tsv_field(value) -> str:
+    return "\\N" if value is None else str(value).translate(_ESCAPES)
+
+
+def _parse_tsv_line(line: str) -> Tuple:
+    """
+    Inverse of the writer: splits a line and undoes LOAD DATA escaping.
+    """
+    fields = []
+    for raw in line.rstrip("\n").split("\t"):
+        if raw == "\\N":
+            fields.append(None)
+            continue
+        out, i = [], 0
+        while i < len(raw):
+            if raw[i] == "\\" and i + 1 < len(raw):
+                out.append(_UNESCAPES.get(raw[i + 1], raw[i + 1]))
+                i += 2
+            else:
+                out.append(raw[i])
+                i += 1
+        fields.append("".join(out))
+    return tuple(fields)
+
+
+class _StagingFiles:
+    """
+    One TSV file per staging table in a temporary directory.
+    """
+
+    def __init__(self, workdir=None):
+        self.dir = tempfile.TemporaryDirectory(prefix="music_db_import_", dir=workdir)
+        self.files = {}
+
+    def write(self, table, row):
+        f = self.files.get(table)
+        if f is None:
+            f = self.files[table] = open(os.path.join(self.dir.name, table + ".tsv"), "w",
+                                         encoding="utf-8", newline="\n")
+        f.write("\t".join(_tsv_field(value) for value in row) + "\n")
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+    def cleanup(self):
+        self.close()
+        self.dir.cleanup()
+
+
+def _dialect_name(mydb) -> str:
+    dialect = getattr(mydb, "dialect", None)
+    return dialect.name if dialect is not None else "mysql"
+
+
+@contextmanager
+def _staging(mydb, tables, workdir=None):
+    """
+    Creates the staging tables and yields (cursor, files). On exit the
+    tables are dropped and the files deleted.
+    """
+    # a plain client-side cursor: LOAD DATA cannot be a prepared statement,
+    # which is what a pooled connection's default cursor would use
+    cursor = mydb.cursor(buffered=True)
+    text = TEXT_TYPES[_dialect_name(mydb)]
+    for table in tables:
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {table} ({STAGING_TABLES[table].format(text=text)})")
+    files = _StagingFiles(workdir)
+    try:
+        yield cursor, files
+    finally:
+        files.cleanup()
+        for table in tables:
+            cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+
+
+def _load_staged(mydb, cursor, files, table):
+    """
+    Loads the TSV file written for `table` into the staging table.
+    """
+    files.close()
+    if table not in files.files:
+        return
+    path = files.files[table].name
+    if _dialect_name(mydb) == "mysql":
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s INTO TABLE {table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+            LINES TERMINATED BY '\\n'
+        """, (path,))
+        return
+
+    with open(path, encoding="utf-8", newline="\n") as f:
+        batch = []
+        for line in f:
+            batch.append(_parse_tsv_line(line))
+            if len(batch) == FALLBACK_BATCH_SIZE:
+                _insert_staged(cursor, table, batch)
+                batch = []
+        if batch:
+            _insert_staged(cursor, table, batch)
+
+
+def _insert_staged(cursor, table, rows):
+    placeholders = ", ".join(["%s"] * len(rows[0]))
+    cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})", rows)
+
+
+def import_single_songs(mydb, single_songs, workdir=None) -> Set[Tuple[str, str]]:
+    """
+    File-based version of load_single_songs. Returns the same rejects.
+
+    workdir: directory for the temporary TSV files (default: system temp)
+    """
+    rejects = set()
+    with _staging(mydb, ["StageSingle", "StageSingleGenre", "StageWinner"], workdir) as (cursor, files):
+        # 1. Stream the input into the staging files, numbered in input order;
+        #    rows the schema would refuse are rejected here
+        for seq, (title, genres, artist, release_date) in enumerate(single_songs):
+            date = _parse_date(release_date)
+            ok = _fits(title, "song_title") and _fits(artist, "artist_name") and date is not None
+            if not ok:
+                rejects.add((title, artist))
+            files.write("StageSingle", (seq, title, artist, date, int(ok)))
+            for g in dict.fromkeys(genres):
+                files.write("StageSingleGenre", (seq, g))
+        _load_staged(mydb, cursor, files, "StageSingle")
+        _load_staged(mydb, cursor, files, "StageSingleGenre")
+
+        # 2. Ensure artists and genres exist
+        cursor.execute("INSERT IGNORE INTO Artist(name) SELECT DISTINCT artist_name FROM StageSingle")
+        cursor.execute("INSERT IGNORE INTO Genre(name) SELECT DISTINCT genre_name FROM StageSingleGenre")
+
+        # 3. First occurrence of every (title, artist) that is not in Song yet
+        cursor.execute("""
+            INSERT INTO StageWinner(seq)
+            SELECT MIN(s.seq)
+            FROM StageSingle s
+            WHERE s.ok = 1
+              AND NOT EXISTS (
+                  SELECT 1 FROM Song x WHERE x.title = s.title AND x.artist_name = s.artist_name
+              )
+            GROUP BY s.title, s.artist_name
+        """)
+
+        # 4. Insert them as singles, in input order
+        cursor.execute("""
+            INSERT INTO Song (title, release_date, artist_name, album_id)
+            SELECT s.title, s.release_date, s.artist_name, NULL
+            FROM StageWinner w JOIN StageSingle s ON s.seq = w.seq
+            ORDER BY s.seq
+        """)
+
+        # 5. Link their genres
+        cursor.execute("""
+            INSERT IGNORE INTO SongGenre(song_id, genre_id)
+            SELECT so.song_id, g.genre_id
+            FROM StageWinner w
+            JOIN StageSingle s ON s.seq = w.seq
+            JOIN Song so ON so.title = s.title AND so.artist_name = s.artist_name
+            JOIN StageSingleGenre sg ON sg.seq = w.seq
+            JOIN Genre g ON g.name = sg.genre_name
+        """)
+
+        # 6. Every other valid row was rejected as a duplicate
+        cursor.execute("""
+            SELECT s.title, s.artist_name
+            FROM StageSingle s LEFT JOIN StageWinner w ON w.seq = s.seq
+            WHERE w.seq IS NULL AND s.ok = 1
+        """)
+        rejects.update(cursor.fetchall())
+
+    mydb.commit()
+    return rejects
+
+
+def import_albums(mydb, albums, workdir=None) -> Set[Tuple[str, str]]:
+    """
+    File-based version of load_albums. Returns the same rejects: albums
+    that exist, repeat an earlier album of the input or name a genre that
+    could not be stored. Tracks whose (title, artist) is taken are skipped,
+    as in load_albums. Albums the schema would refuse are rejects too,
+    where load_albums raises on them.
+    """
+    rejects = set()
+    tables = ["StageAlbum", "StageTrack", "StageWinner", "StageTrackWinner"]
+    with _staging(mydb, tables, workdir) as (cursor, files):
+        # 1. Stream albums and tracks; tracks get one running number
+        ord_ = 0
+        for seq, (title, genre, artist, release_date, song_titles) in enumerate(albums):
+            date = _parse_date(release_date)
+            ok = _fits(title, "album_title") and _fits(artist, "artist_name") and date is not None
+            if not ok:
+                rejects.add((title, artist))
+            files.write("StageAlbum", (seq, title, genre, artist, date, int(ok)))
+            for song_title in song_titles:
+                files.write("StageTrack", (ord_, seq, song_title, int(_fits(song_title, "song_title"))))
+                ord_ += 1
+        _load_staged(mydb, cursor, files, "StageAlbum")
+        _load_staged(mydb, cursor, files, "StageTrack")
+
+        # 2. Ensure artists and genres exist
+        cursor.execute("INSERT IGNORE INTO Artist(name) SELECT DISTINCT artist_name FROM StageAlbum")
+        cursor.execute("INSERT IGNORE INTO Genre(name) SELECT DISTINCT genre_name FROM StageAlbum")
+
+        # 3. First occurrence of every (title, artist) album that is new and
+        #    whose genre exists
+        cursor.execute("""
+            INSERT INTO StageWinner(seq)
+            SELECT MIN(a.seq)
+            FROM StageAlbum a
+            WHERE a.ok = 1
+              AND EXISTS (SELECT 1 FROM Genre g WHERE g.name = a.genre_name)
+              AND NOT EXISTS (
+                  SELECT 1 FROM Album x WHERE x.title = a.title AND x.artist_name = a.artist_name
+              )
+            GROUP BY a.title, a.artist_name
+        """)
+        cursor.execute("""
+            INSERT INTO Album (title, release_date, artist_name, genre_id)
+            SELECT a.title, a.release_date, a.artist_name, g.genre_id
+            FROM StageWinner w
+            JOIN StageAlbum a ON a.seq = w.seq
+            JOIN Genre g ON g.name = a.genre_name
+            ORDER BY a.seq
+        """)
+
+        # 4. First occurrence of every track key among the accepted albums
+        cursor.execute("""
+            INSERT INTO StageTrackWinner(ord)
+            SELECT MIN(t.ord)
+            FROM StageTrack t
+            JOIN StageAlbum a ON a.seq = t.seq
+            JOIN StageWinner w ON w.seq = t.seq
+            WHERE t.ok = 1
+              AND NOT EXISTS (
+                  SELECT 1 FROM Song x WHERE x.title = t.title AND x.artist_name = a.artist_name
+              )
+            GROUP BY t.title, a.artist_name
+        """)
+        cursor.execute("""
+            INSERT INTO Song (title, release_date, artist_name, album_id)
+            SELECT t.title, a.release_date, a.artist_name, al.album_id
+            FROM StageTrackWinner tw
+            JOIN StageTrack t ON t.ord = tw.ord
+            JOIN StageAlbum a ON a.seq = t.seq
+            JOIN Album al ON al.title = a.title AND al.artist_name = a.artist_name
+            ORDER BY t.ord
+        """)
+
+        # 5. Link the album genre to the new tracks
+        cursor.execute("""
+            INSERT IGNORE INTO SongGenre(song_id, genre_id)
+            SELECT s.song_id, al.genre_id
+            FROM StageTrackWinner tw
+            JOIN StageTrack t ON t.ord = tw.ord
+            JOIN StageAlbum a ON a.seq = t.seq
+            JOIN Album al ON al.title = a.title AND al.artist_name = a.artist_name
+            JOIN Song s ON s.title = t.title AND s.artist_name = a.artist_name
+        """)
+
+        # 6. Valid albums that were not accepted
+        cursor.execute("""
+            SELECT a.title, a.artist_name
+            FROM StageAlbum a LEFT JOIN StageWinner w ON w.seq = a.seq
+            WHERE w.seq IS NULL AND a.ok = 1
+        """)
+        rejects.update(cursor.fetchall())
+
+    mydb.commit()
+    return rejects
+
+
+def import_song_ratings(mydb, song_ratings, workdir=None) -> Set[Tuple[str, str, str]]:
+    """
+    File-based version of load_song_ratings. Returns the same rejects:
+    (username, artist_name, song_title) for unknown users or songs,
+    ratings outside 1..5, and pairs rated before or earlier in the input.
+    Ratings whose date is not a date are rejects too, where
+    load_song_ratings raises on them.
+    """
+    rejects = set()
+    with _staging(mydb, ["StageRating", "StageRatingWinner"], workdir) as (cursor, files):
+        # 1. Stream the input; names too long to be in the database cannot
+        #    match and invalid dates cannot be stored, so both are rejects
+        for seq, (username, (artist_name, song_title), rating_value, rating_date) in enumerate(song_ratings):
+            date = _parse_date(rating_date)
+            if not (_fits(username, "username") and _fits(artist_name, "artist_name")
+                    and _fits(song_title, "song_title") and date is not None):
+                rejects.add((username, artist_name, song_title))
+                continue
+            files.write("StageRating", (seq, username, artist_name, song_title, rating_value, date))
+        _load_staged(mydb, cursor, files, "StageRating")
+
+        # 2. First valid rating of every (user, song) pair not rated yet
+        cursor.execute("""
+            INSERT INTO StageRatingWinner(seq, song_id)
+            SELECT MIN(r.seq), s.song_id
+            FROM StageRating r
+            JOIN User u ON u.username = r.username
+            JOIN Song s ON s.title = r.title AND s.artist_name = r.artist_name
+            WHERE r.rating_value BETWEEN 1 AND 5
+              AND NOT EXISTS (
+                  SELECT 1 FROM Rating x WHERE x.username = u.username AND x.song_id = s.song_id
+              )
+            GROUP BY u.username, s.song_id
+        """)
+
+        # 3. Insert them
+        cursor.execute("""
+            INSERT INTO Rating (username, song_id, rating_value, rating_date)
+            SELECT r.username, w.song_id, r.rating_value, r.rating_date
+            FROM StageRatingWinner w JOIN StageRating r ON r.seq = w.seq
+            ORDER BY r.seq
+        """)
+
+        # 4. Everything else was rejected
+        cursor.execute("""
+            SELECT r.username, r.artist_name, r.title
+            FROM StageRating r LEFT JOIN StageRatingWinner w ON w.seq = r.seq
+            WHERE w.seq IS NULL
+        """)
+        rejects.update(cursor.fetchall())
+
+    mydb.commit()
+    return rejects
+
+
+def _read_jsonl(path, kind):
+    """
+    Yields loader tuples from a JSON-lines file.
+    """
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            if kind in ("singles", "ratings"):
+                # genre names / (artist, title) are tuples in the loaders
+                row[1] = tuple(row[1])
+            yield tuple(row)
+
+
+IMPORTERS = {"singles": import_single_songs, "albums": import_albums, "ratings": import_song_ratings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=sorted(IMPORTERS))
+    parser.add_argument("input", help="JSON-lines file of loader tuples")
+    parser.add_argument("--backend", default=None, help="mysql or sqlite (default: $MUSICDB_BACKEND)")
+    parser.add_argument("--path", default="musicdb.sqlite3", help="SQLite database file")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="mk2605")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="musicdb")
+    parser.add_argument("--workdir", help="directory for the staging files")
+    parser.add_argument("--rejects", help="write rejects to this TSV file")
+    args = parser.parse_args()
+
+    if args.backend == "sqlite":
+        mydb = connect("sqlite", path=args.path)
+    else:
+        mydb = connect(args.backend, host=args.host, user=args.user, password=args.password,
+                       database=args.database, allow_local_infile=True)
+
+    rejects = IMPORTERS[args.kind](mydb, _read_jsonl(args.input, args.kind), workdir=args.workdir)
+    print(f"{len(rejects)} rejects")
+    if args.rejects:
+        with open(args.rejects, "w") as f:
+            writer = RejectWriter(f)
+            for reject in sorted(rejects):
+                writer.add(reject)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
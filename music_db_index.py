@@ -0,0 +1,262 @@
+"""
+Compact in-process index of the catalog for the loaders.
+
+Keeping every (title, artist_name) of Song as a tuple of str in a dict
+costs a few hundred bytes per song (two str objects, a tuple, a dict
+entry and an int), which for tens of millions of songs is many GB.
+CatalogIndex stores instead:
+
+    artists: name -> int code (interned once per artist)
+    genres:  name -> int code -> genre_id
+    songs:   64-bit fingerprint of (title, artist code) -> song_id, in an
+             open-addressing table of two flat arrays (16 bytes per slot,
+             at most 70% full)
+
+so memory grows by 16-46 bytes per song whatever the titles are, and
+nbytes() reports it. Names are compared the way the backend's schema
+compares them (music_db.name_key): collation_key for MySQL's case- and
+accent-insensitive collation, nocase_key for SQLite's COLLATE NOCASE.
+The loaders refuse an index built for another backend.
+
+    index = CatalogIndex.load(mydb)
+    rejects = load_song_ratings(mydb, ratings, bulk=True, index=index)
+
+With index=..., load_song_ratings resolves songs locally instead of
+querying Song, and load_single_songs / load_albums add the songs they
+insert to the index (and, in bulk mode, skip the lookup of existing
+songs). Like the dimension cache, new songs reach the index only after
+the loader's final commit, so a load that fails and rolls back leaves it
+unchanged; until then they are staged in a fingerprint table of their
+own. The index does not see songs written by other clients: load
+it after they are done.
+
+Two different songs share a fingerprint with probability about
+n^2 / 2^65 (under 1e-4 for 50M songs); the later one would then resolve
+to the earlier song's id.
+"""
+from array import array
+from typing import Optional
+
+from music_db import collation_key, name_key
+
+# Rows fetched per round trip by CatalogIndex.load
+FETCH_SIZE = 10000
+
+# Fill limit of the fingerprint table, as a fraction of its slots
+MAX_LOAD = 0.7
+
+
+def fingerprint(title: str, artist_code: int, key=collation_key) -> int:
+    """
+    64-bit fingerprint of a song key; never 0, which marks an empty slot.
+    Built on hash(), which is randomised per process, so an index is only
+    valid in the process that built it.
+    """
+    return hash((artist_code, key(title))) & 0xFFFFFFFFFFFFFFFF or 1
+
+
+class FingerprintTable:
+    """
+    Open-addressing hash table from 64-bit fingerprints to 64-bit values,
+    stored in two arrays with linear probing. Doubles when it would be
+    more than MAX_LOAD full.
+    """
+    __slots__ = ("_keys", "_values", "_mask", "_size")
+
+    def __init__(self, capacity: int = 1024):
+        slots = 8
+        while slots * MAX_LOAD < capacity:
+            slots *= 2
+        self._keys = array("Q", bytes(8 * slots))
+        self._values = array("q", bytes(8 * slots))
+        self._mask = slots - 1
+        self._size = 0
+
+    def _slot(self, key: int) -> int:
+        keys, mask = self._keys, self._mask
+        i = key & mask
+        while keys[i] != key and keys[i] != 0:
+            i = (i + 1) & mask
+        return i
+
+    def get(self, key: int) -> Optional[int]:
+        i = self._slot(key)
+        return self._values[i] if self._keys[i] else None
+
+    def put(self, key: int, value: int):
+        if (self._size + 1) > (self._mask + 1) * MAX_LOAD:
+            self._grow()
+        i = self._slot(key)
+        if not self._keys[i]:
+            self._keys[i] = key
+            self._size += 1
+        self._values[i] = value
+
+    def _grow(self):
+        keys, values = self._keys, self._values
+        slots = 2 * len(keys)
+        self._keys = array("Q", bytes(8 * slots))
+        self._values = array("q", bytes(8 * slots))
+        self._mask = slots - 1
+        for key, value in zip(keys, values):
+            if key:
+                i = self._slot(key)
+                self._keys[i] = key
+                self._values[i] = value
+
+    def update(self, other: "FingerprintTable"):
+        """
+        Puts every entry of `other` into this table.
+        """
+        for key, value in zip(other._keys, other._values):
+            if key:
+                self.put(key, value)
+
+    def __len__(self):
+        return self._size
+
+    def nbytes(self) -> int:
+        return self._keys.itemsize * len(self._keys) + self._values.itemsize * len(self._values)
+
+
+class NameCodes:
+    """
+    Interns names to consecutive int codes; names equal under `key` (the
+    database's comparison) get the same code. `names` holds the first
+    spelling of each.
+    """
+    __slots__ = ("_codes", "names", "key")
+
+    def __init__(self, key=collation_key):
+        self._codes = {}
+        self.names = []
+        self.key = key
+
+    def code(self, name: str) -> int:
+        key = self.key(name)
+        code = self._codes.get(key)
+        if code is None:
+            code = self._codes[key] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def find(self, name: str) -> Optional[int]:
+        """
+        Code of `name`, or None if it was never interned.
+        """
+        return self._codes.get(self.key(name))
+
+    def __len__(self):
+        return len(self.names)
+
+
+class CatalogIndex:
+    """
+    Artists, genres and song keys of the catalog (see module docstring).
+
+    key: how names are compared; music_db.name_key(mydb) for the database
+    the index is used with (load() sets it).
+    """
+    __slots__ = ("key", "artists", "genres", "genre_ids", "songs")
+
+    def __init__(self, capacity: int = 1024, key=collation_key):
+        self.key = key
+        self.artists = NameCodes(key)
+        self.genres = NameCodes(key)
+        self.genre_ids = array("q")          # genre code -> genre_id
+        self.songs = FingerprintTable(capacity)
+
+    @classmethod
+    def load(cls, mydb, fetch_size: int = FETCH_SIZE) -> "CatalogIndex":
+        """
+        Builds the index from the database, streaming Song fetch_size rows
+        at a time. The song table is sized from COUNT(*) up front so it is
+        never rehashed while loading.
+        """
+        cursor = mydb.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Song")
+        index = cls(capacity=int(cursor.fetchone()[0]), key=name_key(mydb))
+
+        cursor.execute("SELECT name, genre_id FROM Genre")
+        for name, genre_id in cursor.fetchall():
+            index.add_genre(name, genre_id)
+
+        cursor.execute("SELECT song_id, title, artist_name FROM Song")
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for song_id, title, artist_name in rows:
+                index.add_song(title, artist_name, song_id)
+        return index
+
+    def add_genre(self, name: str, genre_id: int):
+        code = self.genres.code(name)
+        if code == len(self.genre_ids):
+            self.genre_ids.append(genre_id)
+
+    def genre_id(self, name: str) -> Optional[int]:
+        code = self.genres.find(name)
+        return None if code is None else self.genre_ids[code]
+
+    def add_song(self, title: str, artist_name: str, song_id: int):
+        self.songs.put(fingerprint(title, self.artists.code(artist_name), self.key), song_id)
+
+    def song_id(self, title: str, artist_name: str) -> Optional[int]:
+        """
+        song_id of (title, artist_name), or None if it is not in the index.
+        """
+        artist_code = self.artists.find(artist_name)
+        if artist_code is None:
+            return None
+        return self.songs.get(fingerprint(title, artist_code, self.key))
+
+    def session(self) -> "IndexSession":
+        """
+        Song lookups and additions for one loader call.
+        """
+        return IndexSession(self)
+
+    def __len__(self):
+        return len(self.songs)
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the song table and the genre ids; the interned names
+        add roughly 100 bytes per artist and genre on top.
+        """
+        return self.songs.nbytes() + self.genre_ids.itemsize * len(self.genre_ids)
+
+
+class IndexSession:
+    """
+    Songs inserted by one loader call, staged in a fingerprint table of
+    their own. They are looked up here before the index, and merged into
+    it by publish(), which the loader calls after its final commit (as
+    music_db._DimensionSession does for artists and genres).
+
+    New artists get their codes in the index right away; a code with no
+    songs resolves nothing, so a rolled-back load still adds no songs.
+    """
+    __slots__ = ("index", "songs")
+
+    def __init__(self, index: CatalogIndex):
+        self.index = index
+        self.songs = FingerprintTable(capacity=8)
+
+    def song_id(self, title: str, artist_name: str) -> Optional[int]:
+        index = self.index
+        artist_code = index.artists.find(artist_name)
+        if artist_code is None:
+            return None
+        key = fingerprint(title, artist_code, index.key)
+        song_id = self.songs.get(key)
+        return song_id if song_id is not None else index.songs.get(key)
+
+    def add_song(self, title: str, artist_name: str, song_id: int):
+        index = self.index
+        self.songs.put(fingerprint(title, index.artists.code(artist_name), index.key), song_id)
+
+    def publish(self):
+        self.index.songs.update(self.songs)
+        self.songs = FingerprintTable(capacity=8)
@@ -0,0 +1,343 @@
+"""
+Opt-in instrumentation for music_db.
+
+Wrap a connection and every statement the music_db functions run on it is
+counted and timed:
+
+    instrumentation = Instrumentation(slow_ms=50)
+    db = InstrumentedMusicDB(mydb, instrumentation)
+    db.load_albums(albums)            # same call as music_db.load_albums(mydb, albums)
+    print(instrumentation.stats()["calls"]["load_albums"])
+    print(instrumentation.prometheus_text())
+
+Per call (one music_db function invocation) it records statements, round
+trips and wall time. Per statement it aggregates executions and time under
+the normalized SQL text, so the 1,000 inserts of a loop show up as one
+line. Statements slower than `slow_ms` are logged to the "music_db.slow"
+logger together with their EXPLAIN plan.
+
+MusicDB (music_db_pool.py) takes instrumentation=... as well.
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import music_db
+
+slow_log = logging.getLogger("music_db.slow")
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"\b\d+\b")
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'")
+# repeated groups produced by the bulk loaders
+_VALUES_ROWS = re.compile(r"(\((?:%s, )*%s\))(?:, \((?:%s, )*%s\))+")
+_UNION_ROWS = re.compile(r"(UNION ALL SELECT (?:%s, )*%s)(?: \1)+")
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Reduces a statement to its shape: whitespace collapsed, literals
+    replaced by ?, and repeated multi-row VALUES / UNION ALL groups
+    collapsed to one group followed by "...".
+    """
+    sql = _WHITESPACE.sub(" ", sql).strip().rstrip(";")
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _VALUES_ROWS.sub(r"\1, ...", sql)
+    sql = _UNION_ROWS.sub(r"\1 ...", sql)
+    return sql
+
+
+class _CallStats:
+
+    def __init__(self, name):
+        self.name = name
+        self.statements = 0
+        self.round_trips = 0
+        self.started = time.perf_counter()
+
+
+class Instrumentation:
+    """
+    Collects statement and call statistics from InstrumentedConnections.
+
+    slow_ms: statements taking longer are logged with their plan (None: off)
+    explain: run EXPLAIN for slow SELECT statements
+    keep_slow: number of recent slow statements kept for stats()
+    """
+
+    def __init__(self, slow_ms=100.0, explain=True, keep_slow=100):
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self._lock = threading.Lock()
+        self.calls = {}        # function -> {"count", "statements", "round_trips", "seconds"}
+        self.statements = {}   # normalized sql -> {"count", "seconds", "max_ms"}
+        self.slow = deque(maxlen=keep_slow)
+        self.last_calls = {}   # function -> stats of its most recent call
+
+    def wrap(self, mydb):
+        """
+        Returns an InstrumentedConnection over `mydb`.
+        """
+        return InstrumentedConnection(mydb, self)
+
+    def _record_statement(self, sql, seconds):
+        key = normalize_sql(sql)
+        with self._lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                entry = self.statements[key] = {"count": 0, "seconds": 0.0, "max_ms": 0.0}
+            entry["count"] += 1
+            entry["seconds"] += seconds
+            entry["max_ms"] = max(entry["max_ms"], seconds * 1000)
+
+    def _record_call(self, call):
+        seconds = time.perf_counter() - call.started
+        summary = {"statements": call.statements, "round_trips": call.round_trips,
+                   "seconds": seconds}
+        with self._lock:
+            entry = self.calls.setdefault(call.name, {"count": 0, "statements": 0,
+                                                      "round_trips": 0, "seconds": 0.0})
+            entry["count"] += 1
+            entry["statements"] += call.statements
+            entry["round_trips"] += call.round_trips
+            entry["seconds"] += seconds
+            self.last_calls[call.name] = summary
+
+    def _record_slow(self, entry):
+        with self._lock:
+            self.slow.append(entry)
+        slow_log.warning("slow statement (%.1f ms) in %s: %s\nparams: %s\nplan:\n%s",
+                         entry["ms"], entry["call"], entry["sql"], entry["params"],
+                         "\n".join(str(row) for row in entry["plan"]) or "(none)")
+
+    def stats(self):
+        """
+        Returns a snapshot of the collected data:
+            calls:      per function totals (count, statements, round_trips, seconds)
+            last_calls: per function numbers of the most recent call
+            statements: per normalized SQL (count, seconds, max_ms)
+            slow:       recent slow statements with params and plan
+        """
+        with self._lock:
+            return {
+                "calls": {k: dict(v) for k, v in self.calls.items()},
+                "last_calls": {k: dict(v) for k, v in self.last_calls.items()},
+                "statements": {k: dict(v) for k, v in self.statements.items()},
+                "slow": list(self.slow),
+            }
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.statements.clear()
+            self.slow.clear()
+            self.last_calls.clear()
+
+    def prometheus_text(self) -> str:
+        """
+        Returns the statistics in the Prometheus text exposition format.
+        """
+        def label(value):
+            return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+        stats = self.stats()
+        lines = []
+        for metric, field, help_text in [
+            ("music_db_calls_total", "count", "music_db function calls"),
+            ("music_db_call_statements_total", "statements", "Statements issued by music_db calls"),
+            ("music_db_call_round_trips_total", "round_trips", "Round trips made by music_db calls"),
+            ("music_db_call_seconds_total", "seconds", "Wall time spent in music_db calls"),
+        ]:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, entry in sorted(stats["calls"].items()):
+                lines.append(f'{metric}{{function="{label(name)}"}} {entry[field]}')
+        for metric, field, help_text in [
+            ("music_db_statement_executions_total", "count", "Executions per normalized statement"),
+            ("music_db_statement_seconds_total", "seconds", "Time per normalized statement"),
+        ]:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for sql, entry in sorted(stats["statements"].items()):
+                lines.append(f'{metric}{{sql="{label(sql)}"}} {entry[field]}')
+        lines.append("# HELP music_db_slow_statements Slow statements currently kept")
+        lines.append("# TYPE music_db_slow_statements gauge")
+        lines.append(f"music_db_slow_statements {len(stats['slow'])}")
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedConnection:
+    """
+    Connection proxy whose cursors report to an Instrumentation.
+    Everything else is delegated to the wrapped connection.
+    """
+
+    def __init__(self, mydb, instrumentation):
+        self.mydb = mydb
+        self.instrumentation = instrumentation
+        self._call = None
+        self._pending_slow = []
+
+    @contextmanager
+    def call(self, name):
+        """
+        Groups the statements issued inside the block as one call of `name`.
+        """
+        outer, self._call = self._call, _CallStats(name)
+        try:
+            yield self._call
+        finally:
+            self._explain_pending()
+            self.instrumentation._record_call(self._call)
+            self._call = outer
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self, self.mydb.cursor(*args, **kwargs))
+
+    def commit(self):
+        self._count(statements=0, round_trips=1)
+        self.mydb.commit()
+        self._explain_pending()
+
+    def rollback(self):
+        self._count(statements=0, round_trips=1)
+        self.mydb.rollback()
+
+    def __getattr__(self, name):
+        return getattr(self.mydb, name)
+
+    def _count(self, statements, round_trips):
+        if self._call is not None:
+            self._call.statements += statements
+            self._call.round_trips += round_trips
+
+    def _statement_done(self, sql, params, seconds):
+        self.instrumentation._record_statement(sql, seconds)
+        slow_ms = self.instrumentation.slow_ms
+        if slow_ms is not None and seconds * 1000 > slow_ms:
+            # EXPLAIN has to wait until the statement's rows have been read
+            self._pending_slow.append({
+                "call": self._call.name if self._call else None,
+                "sql": _WHITESPACE.sub(" ", sql).strip(),
+                "params": repr(tuple(params))[:200],
+                "ms": seconds * 1000,
+                "plan": [],
+                "_params": params,
+            })
+
+    def _explain_pending(self):
+        pending, self._pending_slow = self._pending_slow, []
+        for entry in pending:
+            params = entry.pop("_params")
+            if self.instrumentation.explain and entry["sql"].lstrip().upper().startswith("SELECT"):
+                entry["plan"] = self._explain(entry["sql"], params)
+            self.instrumentation._record_slow(entry)
+
+    def _explain(self, sql, params):
+        dialect = getattr(self.mydb, "dialect", None)
+        prefix = "EXPLAIN QUERY PLAN " if dialect is not None and dialect.name == "sqlite" else "EXPLAIN "
+        try:
+            cursor = self.mydb.cursor()
+            cursor.execute(prefix + sql, params)
+            return cursor.fetchall()
+        except Exception as e:
+            return [f"EXPLAIN failed: {e}"]
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy that times execute/executemany and the fetches that
+    follow them, and counts statements and round trips.
+    """
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+        self._last = None   # [sql, params, seconds] of the latest statement
+
+    def _finish_last(self):
+        if self._last is not None:
+            self._connection._statement_done(*self._last)
+            self._last = None
+
+    def execute(self, sql, params=()):
+        self._finish_last()
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, params)
+        finally:
+            self._last = [sql, params, time.perf_counter() - start]
+            self._connection._count(statements=1, round_trips=1)
+            if self._cursor.description is None:
+                self._finish_last()
+
+    def executemany(self, sql, seq_params):
+        self._finish_last()
+        seq_params = list(seq_params)
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_params)
+        finally:
+            self._connection._count(statements=len(seq_params), round_trips=1)
+            self._connection._statement_done(sql, seq_params[0] if seq_params else (),
+                                             time.perf_counter() - start)
+
+    def _timed_fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._last is not None:
+                self._last[2] += time.perf_counter() - start
+
+    def fetchone(self):
+        return self._timed_fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=1):
+        return self._timed_fetch(self._cursor.fetchmany, size)
+
+    def fetchall(self):
+        rows = self._timed_fetch(self._cursor.fetchall)
+        self._finish_last()
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def close(self):
+        self._finish_last()
+        self._cursor.close()
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __del__(self):
+        try:
+            self._finish_last()
+        except Exception:
+            pass
+
+
+class InstrumentedMusicDB:
+    """
+    Calls music_db functions on an instrumented connection, one call
+    context per function, e.g. db.get_top_song_genres(5).
+    """
+
+    def __init__(self, mydb, instrumentation):
+        self.connection = instrumentation.wrap(mydb)
+
+    def __getattr__(self, name):
+        func = getattr(music_db, name)
+        if not callable(func) or name.startswith("_"):
+            raise AttributeError(name)
+
+        def instrumented(*args, **kwargs):
+            with self.connection.call(name):
+                return func(self.connection, *args, **kwargs)
+
+        return instrumented
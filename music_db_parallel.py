@@ -0,0 +1,138 @@
+"""
+Parallel sharded loading for large ingests.
+
+load_single_songs and load_song_ratings run on one connection, one row (or
+one chunk) after another. The functions here split the input into shards
+that never touch the same UNIQUE keys and load the shards on a process
+pool, one connection per worker process:
+
+    singles are sharded by artist_name (Song is unique on title, artist_name)
+    ratings are sharded by username    (Rating is unique on username, song_id)
+
+Names are compared the way the schema's collation compares them (see
+music_db.collation_key), so "Adele" and "ADELE" land in the same shard.
+Each shard keeps the input order, so within a shard the first occurrence
+of a key still wins, and the union of the shard reject sets is the set the
+serial loader returns.
+
+    from functools import partial
+    from music_db_backends import connect
+    rejects = load_single_songs_parallel(partial(connect, "mysql", host=..., ...), songs, workers=8)
+
+`connect` is called once in this process and once in every worker, so it
+must be picklable (a module-level function or a functools.partial of one).
+
+Unlike the serial loaders, each shard commits on its own: if one fails,
+the others may already be committed.
+"""
+import atexit
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import music_db
+from music_db import DEFAULT_BATCH_SIZE, _chunks, _insert_rows, collation_key
+
+# connection of the current worker process, opened by _init_worker
+_worker_db = None
+
+
+def _init_worker(connect):
+    global _worker_db
+    _worker_db = connect()
+    atexit.register(_worker_db.close)
+
+
+def _load_shard(loader_name, rows, loader_kwargs):
+    return getattr(music_db, loader_name)(_worker_db, rows, **loader_kwargs)
+
+
+def shard_of(name: str, shards: int) -> int:
+    """
+    Shard number of `name`; names the database considers equal get the
+    same shard in every process.
+    """
+    return zlib.crc32(collation_key(name).encode("utf-8")) % shards
+
+
+def partition(rows, key, shards: int):
+    """
+    Splits `rows` into `shards` lists by shard_of(key(row)), keeping the
+    input order within each list.
+    """
+    parts = [[] for _ in range(shards)]
+    for row in rows:
+        parts[shard_of(key(row), shards)].append(row)
+    return parts
+
+
+def _run_shards(connect, loader_name, parts, workers, reject_sink, loader_kwargs):
+    rejects = set() if reject_sink is None else reject_sink
+    # largest shards first, so a skewed shard does not start last
+    parts = sorted((part for part in parts if part), key=len, reverse=True)
+    if not parts:
+        return rejects
+    with ProcessPoolExecutor(max_workers=min(workers, len(parts)), initializer=_init_worker,
+                             initargs=(connect,)) as executor:
+        futures = [executor.submit(_load_shard, loader_name, part, loader_kwargs) for part in parts]
+        for future in futures:
+            for reject in future.result():
+                rejects.add(reject)
+    return rejects
+
+
+def _create_dimensions(mydb, artists, genres, batch_size):
+    """
+    Inserts all artists and genres up front, so workers only ever find
+    them present instead of racing to insert the same rows.
+    """
+    cursor = mydb.cursor()
+    for chunk in _chunks(artists, batch_size):
+        _insert_rows(cursor, "INSERT IGNORE INTO Artist(name) VALUES", [(a,) for a in chunk])
+    for chunk in _chunks(genres, batch_size):
+        _insert_rows(cursor, "INSERT IGNORE INTO Genre(name) VALUES", [(g,) for g in chunk])
+    mydb.commit()
+
+
+def load_single_songs_parallel(connect, single_songs, workers: int = 4, shards: int = None,
+                               reject_sink=None, **loader_kwargs):
+    """
+    Parallel version of load_single_songs. Returns the same rejects.
+
+    connect: picklable callable returning a new connection
+    workers: worker processes, each with its own connection
+    shards: number of artist shards (default 4 per worker, which evens
+    out artists with many songs)
+    reject_sink: as in load_single_songs; rejects are added as shards finish
+    loader_kwargs: passed to load_single_songs in each worker (bulk,
+    batch_size, commit_every, prepared)
+    """
+    single_songs = list(single_songs)
+    parts = partition(single_songs, lambda song: song[2], shards or workers * 4)
+
+    mydb = connect()
+    try:
+        _create_dimensions(
+            mydb,
+            list(dict.fromkeys(artist for _, _, artist, _ in single_songs)),
+            list(dict.fromkeys(g for _, genres, _, _ in single_songs for g in genres)),
+            loader_kwargs.get("batch_size", DEFAULT_BATCH_SIZE)
+        )
+    finally:
+        mydb.close()
+
+    return _run_shards(connect, "load_single_songs", parts, workers, reject_sink, loader_kwargs)
+
+
+def load_song_ratings_parallel(connect, song_ratings, workers: int = 4, shards: int = None,
+                               reject_sink=None, **loader_kwargs):
+    """
+    Parallel version of load_song_ratings. Returns the same rejects.
+
+    Ratings only reference existing users and songs, so there are no
+    dimension rows to create; load users and songs first.
+
+    Arguments work as in load_single_songs_parallel, with ratings sharded
+    by username.
+    """
+    parts = partition(song_ratings, lambda rating: rating[0], shards or workers * 4)
+    return _run_shards(connect, "load_song_ratings", parts, workers, reject_sink, loader_kwargs)
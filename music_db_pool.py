@@ -0,0 +1,383 @@
+"""
+Connection pooling for music_db.
+
+The functions in music_db.py take a single caller-supplied connection.
+MusicDB owns a bounded pool of connections instead and runs every call
+(or every transaction) on a connection of its own, so concurrent requests
+do not queue up behind one another on a shared connection.
+
+Example:
+    db = MusicDB(host="localhost", user="mk2605", password="...", database="musicdb")
+    db.load_users(["alice", "bob"])
+    top = db.get_top_song_genres(3)
+
+    with db.transaction() as conn:      # several calls, one connection
+        load_single_songs(conn, singles)
+        load_albums(conn, albums)
+"""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+
+import music_db
+import music_db_backends
+
+try:
+    from mysql.connector import errors as _mysql_errors
+    # raised when the server goes away or the socket breaks
+    DISCONNECT_ERRORS = (_mysql_errors.OperationalError, _mysql_errors.InterfaceError)
+except ImportError:  # e.g. SQLite only
+    DISCONNECT_ERRORS = ()
+
+# Prepared statements kept per connection.
+DEFAULT_STATEMENT_CACHE_SIZE = 64
+
+
+class PoolTimeout(Exception):
+    """No connection became available within the pool timeout."""
+
+
+class PooledPreparedCursor(music_db.PreparedCursor):
+    """
+    PreparedCursor that takes its prepared statements from the pooled
+    connection's LRU cache, so they outlive the cursor and are shared by
+    every call that runs on that connection.
+    """
+
+    def _statement_cursor(self, sql):
+        return self.mydb.prepared_cursor(sql)
+
+    def close(self):
+        self._rows = []
+
+
+class PooledConnection:
+    """
+    A pooled connection as handed to the music_db functions.
+
+    Delegates to the underlying driver connection, so cursor() is the
+    driver's plain cursor and reads stream with fetchmany as usual. If
+    prepared statements are enabled, cursor(prepared=True) returns a
+    PooledPreparedCursor that shares this connection's statement cache;
+    the loaders ask for it with prepared=True, for their fixed per-row
+    statements.
+    """
+
+    def __init__(self, raw, prepare=True, statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE):
+        self.raw = raw
+        self.prepare = prepare
+        self.statement_cache_size = statement_cache_size
+        self._statements = OrderedDict()   # sql text -> prepared driver cursor
+        self.last_used = time.monotonic()
+
+    def cursor(self, *args, **kwargs):
+        if self.prepare and not args and kwargs == {"prepared": True}:
+            return PooledPreparedCursor(self)
+        return self.raw.cursor(*args, **kwargs)
+
+    def prepared_cursor(self, sql):
+        """
+        Returns the prepared driver cursor for `sql`, preparing it on first
+        use and closing the least recently used one if the cache is full.
+        """
+        cursor = self._statements.get(sql)
+        if cursor is not None:
+            self._statements.move_to_end(sql)
+            return cursor
+        cursor = self.raw.cursor(prepared=True)
+        self._statements[sql] = cursor
+        if len(self._statements) > self.statement_cache_size:
+            _, evicted = self._statements.popitem(last=False)
+            evicted.close()
+        return cursor
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def __getattr__(self, name):
+        # dialect, database_key, ... of the driver connection
+        return getattr(self.raw, name)
+
+    def is_healthy(self):
+        """
+        Checks that the server still answers, reconnecting once if not.
+        The statement cache is dropped after a reconnect since prepared
+        statements do not survive the session.
+        """
+        try:
+            if hasattr(self.raw, "ping"):
+                self.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            pass
+        self._statements.clear()
+        try:
+            self.raw.reconnect(attempts=1)
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        for cursor in self._statements.values():
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        self._statements.clear()
+        self.raw.close()
+
+
+class ConnectionPool:
+    """
+    Bounded pool of database connections.
+
+    Connections are created lazily by `connect` (a function returning a new
+    driver connection) up to `size`. When all are in use, acquire() waits
+    up to `timeout` seconds and then raises PoolTimeout. Connections idle
+    for more than `ping_after` seconds are health-checked before reuse and
+    replaced if they cannot be revived.
+    """
+
+    def __init__(self, connect, size=5, timeout=30.0, ping_after=30.0,
+                 prepare=True, statement_cache_size=DEFAULT_STATEMENT_CACHE_SIZE):
+        if size < 1:
+            raise ValueError("pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.prepare = prepare
+        self.statement_cache_size = statement_cache_size
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _new_connection(self):
+        return PooledConnection(self._connect(), self.prepare, self.statement_cache_size)
+
+    def acquire(self):
+        """
+        Returns an idle connection, or a new one if the pool is not full.
+        """
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._lock:
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    return self._new_connection()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolTimeout(f"no connection available after {self.timeout}s")
+
+        if time.monotonic() - conn.last_used > self.ping_after and not conn.is_healthy():
+            conn = self.replace(conn)
+        return conn
+
+    def release(self, conn):
+        """
+        Returns a connection to the pool, rolling back anything uncommitted.
+        """
+        try:
+            conn.rollback()
+        except Exception:
+            self.discard(conn)
+            return
+        conn.last_used = time.monotonic()
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    def discard(self, conn):
+        """
+        Closes a broken connection and frees its slot in the pool.
+        """
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def replace(self, conn):
+        """
+        Discards `conn` and returns a freshly opened connection in its slot.
+        """
+        self.discard(conn)
+        with self._lock:
+            self._created += 1
+        try:
+            return self._new_connection()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except DISCONNECT_ERRORS:
+            self.discard(conn)
+            raise
+        except BaseException:
+            self.release(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+
+class MusicDB:
+    """
+    Facade over music_db backed by a ConnectionPool.
+
+    Each method takes the same arguments as the music_db function of the
+    same name, minus `mydb`, and runs it on a connection from the pool.
+    Read methods are retried once on a fresh connection if the connection
+    drops; writes are not, since they may have committed part of the input.
+
+    With cache=ResultCache(...) (music_db_cache.py), read results are served
+    from memory until a write through this facade invalidates them.
+
+    With instrumentation=Instrumentation(...) (music_db_instrument.py),
+    every call's statements are counted and timed.
+
+    backend and connect_kwargs are passed to music_db_backends.connect
+    when no pool is given.
+    """
+
+    def __init__(self, pool=None, pool_size=5, prepare=True, cache=None, backend=None,
+                 instrumentation=None, **connect_kwargs):
+        if pool is None:
+            pool = ConnectionPool(partial(music_db_backends.connect, backend, **connect_kwargs),
+                                  size=pool_size, prepare=prepare)
+        self.pool = pool
+        self.cache = cache
+        self.instrumentation = instrumentation
+
+    @contextmanager
+    def transaction(self):
+        """
+        Yields one pooled connection for several music_db calls.
+        Commits at the end, or rolls back if the block raises.
+
+        The cache cannot tell what the block wrote, so it is cleared
+        afterwards, also on failure (the loaders commit in chunks).
+        """
+        try:
+            with self.pool.connection() as conn:
+                try:
+                    yield conn
+                except BaseException:
+                    conn.rollback()
+                    raise
+                conn.commit()
+        finally:
+            if self.cache is not None:
+                self.cache.clear()
+
+    def _run(self, conn, func, *args, **kwargs):
+        if self.instrumentation is None:
+            return func(conn, *args, **kwargs)
+        conn = self.instrumentation.wrap(conn)
+        with conn.call(func.__name__):
+            return func(conn, *args, **kwargs)
+
+    def _write(self, func, *args, **kwargs):
+        try:
+            with self.pool.connection() as conn:
+                return self._run(conn, func, *args, **kwargs)
+        finally:
+            if self.cache is not None:
+                self.cache.invalidate_for(func.__name__)
+
+    def _read(self, func, *args, **kwargs):
+        if self.cache is not None:
+            return self.cache.call(func.__name__, partial(self._read_uncached, func), *args, **kwargs)
+        return self._read_uncached(func, *args, **kwargs)
+
+    def _read_uncached(self, func, *args, **kwargs):
+        try:
+            with self.pool.connection() as conn:
+                return self._run(conn, func, *args, **kwargs)
+        except DISCONNECT_ERRORS:
+            with self.pool.connection() as conn:
+                return self._run(conn, func, *args, **kwargs)
+
+    def cache_stats(self):
+        """
+        Returns the result cache counters (see ResultCache.stats), or None
+        if the facade has no cache.
+        """
+        return None if self.cache is None else self.cache.stats()
+
+    def close(self):
+        self.pool.close()
+
+    # writes
+
+    def clear_database(self, **kwargs):
+        return self._write(music_db.clear_database, **kwargs)
+
+    def load_single_songs(self, single_songs, **kwargs):
+        return self._write(music_db.load_single_songs, single_songs, **kwargs)
+
+    def load_albums(self, albums, **kwargs):
+        return self._write(music_db.load_albums, albums, **kwargs)
+
+    def load_users(self, users, **kwargs):
+        return self._write(music_db.load_users, users, **kwargs)
+
+    def load_song_ratings(self, song_ratings, **kwargs):
+        return self._write(music_db.load_song_ratings, song_ratings, **kwargs)
+
+    # reads
+
+    def get_most_prolific_individual_artists(self, n, year_range):
+        return self._read(music_db.get_most_prolific_individual_artists, n, year_range)
+
+    def get_artists_last_single_in_year(self, year, **kwargs):
+        return self._read(music_db.get_artists_last_single_in_year, year, **kwargs)
+
+    def get_top_song_genres(self, n, **kwargs):
+        return self._read(music_db.get_top_song_genres, n, **kwargs)
+
+    def get_album_and_single_artists(self, **kwargs):
+        return self._read(music_db.get_album_and_single_artists, **kwargs)
+
+    def get_most_rated_songs(self, year_range, n, **kwargs):
+        return self._read(music_db.get_most_rated_songs, year_range, n, **kwargs)
+
+    def get_most_engaged_users(self, year_range, n, **kwargs):
+        return self._read(music_db.get_most_engaged_users, year_range, n, **kwargs)
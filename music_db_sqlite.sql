@@ -0,0 +1,93 @@
+-- SQLite schema equivalent to music_db.sql (MySQL).
+--
+-- Same tables, keys, foreign keys, CHECK constraints and indexes,
+-- including migrations/001_date_range_indexes.sql. Text keys use
+-- COLLATE NOCASE to approximate MySQL's case-insensitive collation, and
+-- VARCHAR lengths and DATE values are enforced with CHECK constraints
+-- since SQLite does not enforce declared types. A date must read back
+-- unchanged from date(x, '+0 days'), which rolls impossible days such as
+-- 2021-02-30 over into the next month (plain date(x) keeps them).
+--
+-- Applied automatically by music_db_backends.connect("sqlite", ...) to
+-- an empty database file.
+
+CREATE TABLE IF NOT EXISTS Artist (
+  name VARCHAR(150) NOT NULL COLLATE NOCASE PRIMARY KEY,
+  CHECK (length(name) <= 150)
+);
+
+CREATE TABLE IF NOT EXISTS Genre (
+  genre_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  name VARCHAR(50) NOT NULL COLLATE NOCASE UNIQUE,
+  CHECK (length(name) <= 50)
+);
+
+CREATE TABLE IF NOT EXISTS Album (
+  album_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  title VARCHAR(255) NOT NULL COLLATE NOCASE,
+  release_date DATE NOT NULL,
+  artist_name VARCHAR(100) NOT NULL COLLATE NOCASE
+    REFERENCES Artist (name) ON DELETE CASCADE,
+  genre_id INTEGER NOT NULL
+    REFERENCES Genre (genre_id) ON DELETE RESTRICT,
+  UNIQUE (title, artist_name),
+  CHECK (length(title) <= 255 AND length(artist_name) <= 100),
+  CHECK (release_date IS date(release_date, '+0 days'))
+);
+CREATE INDEX IF NOT EXISTS album_artist_name ON Album (artist_name);
+CREATE INDEX IF NOT EXISTS album_genre_id ON Album (genre_id);
+
+CREATE TABLE IF NOT EXISTS Song (
+  song_id INTEGER PRIMARY KEY AUTOINCREMENT,
+  title VARCHAR(300) NOT NULL COLLATE NOCASE,
+  release_date DATE NOT NULL,
+  artist_name VARCHAR(100) NOT NULL COLLATE NOCASE
+    REFERENCES Artist (name) ON DELETE CASCADE,
+  album_id INTEGER DEFAULT NULL
+    REFERENCES Album (album_id) ON DELETE CASCADE,
+  UNIQUE (title, artist_name),
+  CHECK (length(title) <= 300 AND length(artist_name) <= 100),
+  CHECK (release_date IS date(release_date, '+0 days'))
+);
+CREATE INDEX IF NOT EXISTS song_artist_name ON Song (artist_name);
+CREATE INDEX IF NOT EXISTS song_album_id ON Song (album_id);
+CREATE INDEX IF NOT EXISTS song_album_date_artist ON Song (album_id, release_date, artist_name);
+CREATE INDEX IF NOT EXISTS song_album_artist ON Song (album_id, artist_name);
+
+CREATE TABLE IF NOT EXISTS SongArtist (
+  song_id INTEGER NOT NULL
+    REFERENCES Song (song_id) ON DELETE CASCADE,
+  artist_name VARCHAR(100) NOT NULL COLLATE NOCASE
+    REFERENCES Artist (name) ON DELETE CASCADE,
+  PRIMARY KEY (song_id, artist_name)
+);
+CREATE INDEX IF NOT EXISTS songartist_artist_name ON SongArtist (artist_name);
+
+CREATE TABLE IF NOT EXISTS SongGenre (
+  song_id INTEGER NOT NULL
+    REFERENCES Song (song_id) ON DELETE CASCADE,
+  genre_id INTEGER NOT NULL
+    REFERENCES Genre (genre_id) ON DELETE CASCADE,
+  PRIMARY KEY (song_id, genre_id)
+);
+CREATE INDEX IF NOT EXISTS songgenre_genre_id ON SongGenre (genre_id);
+
+CREATE TABLE IF NOT EXISTS User (
+  username VARCHAR(30) NOT NULL COLLATE NOCASE PRIMARY KEY,
+  CHECK (length(username) <= 30)
+);
+
+CREATE TABLE IF NOT EXISTS Rating (
+  username VARCHAR(30) NOT NULL COLLATE NOCASE
+    REFERENCES User (username) ON DELETE CASCADE,
+  song_id INTEGER NOT NULL
+    REFERENCES Song (song_id) ON DELETE CASCADE,
+  rating_value TINYINT NOT NULL,
+  rating_date DATE NOT NULL,
+  PRIMARY KEY (username, song_id),
+  CHECK (rating_value BETWEEN 1 AND 5),
+  CHECK (rating_date IS date(rating_date, '+0 days'))
+);
+CREATE INDEX IF NOT EXISTS rating_song_id ON Rating (song_id);
+CREATE INDEX IF NOT EXISTS rating_date_song ON Rating (rating_date, song_id);
+CREATE INDEX IF NOT EXISTS rating_date_user ON Rating (rating_date, username);
@@ -0,0 +1,289 @@
+"""
+Streaming and keyset-paginated versions of the music_db get_* queries.
+
+The get_* functions fetch their whole result with fetchall() and return a
+list or set. For big results there are two alternatives here:
+
+iter_* generators run the query once on an unbuffered cursor and yield
+rows as they are fetched, fetch_size at a time, so memory stays flat
+however many rows there are. n is optional (None: no LIMIT).
+
+    for title, artist, num_ratings in iter_most_rated_songs(mydb, (2000, 2024)):
+        ...
+
+*_page functions return one page and a token for the next, for APIs that
+hand out pages across requests. The token encodes the ORDER BY keys of
+the last row (keyset pagination): the next page starts with a WHERE on
+those keys instead of an OFFSET, so rows inserted meanwhile do not shift
+page boundaries and the rows of earlier pages are not sorted and sent
+only to be skipped. The WHERE applies to the aggregated rows, though, so
+every page still aggregates the whole year range; a page costs about as
+much as the first one, not less:
+
+    rows, token = most_rated_songs_page(mydb, (2000, 2024), page_size=50)
+    rows, token = most_rated_songs_page(mydb, (2000, 2024), page_size=50, token=token)
+    # token is None after the last page
+
+Rows come in the same order as from the get_* functions (e.g.
+num_ratings DESC, title ASC). Where that order can tie (two songs with the
+same title and count), the primary key is added as a final key so pages
+neither repeat nor skip rows. The set-returning functions are ordered by
+artist_name.
+
+While an iter_* generator is open its connection is busy with the
+unfinished result; exhaust or close() it before running other statements
+on that connection. Closing it (or leaving its loop early) reads and
+discards the rest of the result, which mysql-connector requires before
+the cursor can be closed, so abandoning a long result early still costs
+the transfer of its remaining rows. That drain is best effort: if it
+fails, its error is dropped and the connection may have to be reopened.
+If the query or a fetch fails, the rest of the result is not read and
+the original error is raised.
+"""
+import base64
+import json
+from typing import Iterator, List, Optional, Tuple
+
+from music_db import _date_range
+
+# Rows fetched per round trip by the iter_* generators.
+FETCH_SIZE = 1000
+
+# name -> (SQL producing every output and order column,
+#          output columns,
+#          ORDER BY keys with direction; the last key is unique)
+_QUERIES = {
+    "most_prolific_individual_artists": (
+        """
+        SELECT artist_name, COUNT(*) AS num_singles
+        FROM Song
+        WHERE album_id IS NULL
+          AND release_date >= %s AND release_date < %s
+        GROUP BY artist_name
+        """,
+        ("artist_name", "num_singles"),
+        (("num_singles", "DESC"), ("artist_name", "ASC")),
+    ),
+    "artists_last_single_in_year": (
+        """
+        SELECT artist_name
+        FROM Song
+        WHERE album_id IS NULL
+        GROUP BY artist_name
+        HAVING MAX(release_date) >= %s AND MAX(release_date) < %s
+        """,
+        ("artist_name",),
+        (("artist_name", "ASC"),),
+    ),
+    "top_song_genres": (
+        """
+        SELECT g.name, COUNT(*) AS num_songs
+        FROM SongGenre sg
+        JOIN Genre g ON sg.genre_id = g.genre_id
+        GROUP BY g.genre_id, g.name
+        """,
+        ("name", "num_songs"),
+        (("num_songs", "DESC"), ("name", "ASC")),
+    ),
+    "album_and_single_artists": (
+        """
+        SELECT DISTINCT s.artist_name
+        FROM Song s
+        WHERE s.album_id IS NULL
+          AND EXISTS (SELECT 1 FROM Album a WHERE a.artist_name = s.artist_name)
+        """,
+        ("artist_name",),
+        (("artist_name", "ASC"),),
+    ),
+    "most_rated_songs": (
+        """
+        SELECT s.song_id, s.title, s.artist_name, COUNT(*) AS num_ratings
+        FROM Rating r
+        JOIN Song s ON r.song_id = s.song_id
+        WHERE r.rating_date >= %s AND r.rating_date < %s
+        GROUP BY s.song_id, s.title, s.artist_name
+        """,
+        ("title", "artist_name", "num_ratings"),
+        (("num_ratings", "DESC"), ("title", "ASC"), ("song_id", "ASC")),
+    ),
+    "most_engaged_users": (
+        """
+        SELECT r.username, COUNT(*) AS num_rated
+        FROM Rating r
+        WHERE r.rating_date >= %s AND r.rating_date < %s
+        GROUP BY r.username
+        """,
+        ("username", "num_rated"),
+        (("num_rated", "DESC"), ("username", "ASC")),
+    ),
+}
+
+
+def encode_token(values) -> str:
+    """
+    Opaque, URL-safe page token for the ORDER BY values of a row.
+    """
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode("utf-8")).decode("ascii")
+
+
+def decode_token(token: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"invalid page token {token!r}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"invalid page token {token!r}")
+    return values
+
+
+def _keyset_condition(order: Tuple[Tuple[str, str], ...], after: list) -> Tuple[str, list]:
+    """
+    WHERE condition for rows that sort after `after` under `order`:
+        k1 < v1 OR (k1 = v1 AND k2 > v2) OR ...   (< for DESC, > for ASC)
+    """
+    if len(after) != len(order):
+        raise ValueError("page token does not match this query")
+    terms, params = [], []
+    for i, (column, direction) in enumerate(order):
+        parts = [f"{prev} = %s" for prev, _ in order[:i]]
+        parts.append(f"{column} {'<' if direction == 'DESC' else '>'} %s")
+        terms.append("(" + " AND ".join(parts) + ")")
+        params.extend(after[:i + 1])
+    return " OR ".join(terms), params
+
+
+def _build(name: str, args: tuple, after: Optional[list], limit: Optional[int]):
+    base, columns, order = _QUERIES[name]
+    order_columns = [column for column, _ in order]
+    select = list(columns) + [c for c in order_columns if c not in columns]
+    sql = f"SELECT {', '.join(select)} FROM ({base}) t"
+    params = list(args)
+    if after is not None:
+        condition, condition_params = _keyset_condition(order, after)
+        sql += f" WHERE {condition}"
+        params += condition_params
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column, direction in order)
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit)
+    # positions of the output and order columns in each row
+    return sql, params, len(columns), [select.index(c) for c in order_columns]
+
+
+def _iter(mydb, name: str, args: tuple, n: Optional[int], fetch_size: int) -> Iterator[tuple]:
+    sql, params, width, _ = _build(name, args, None, n)
+    # unbuffered, so rows stay on the server until fetched
+    cursor = mydb.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield tuple(row[:width])
+    except GeneratorExit:
+        # closed early: an unbuffered cursor with unread rows cannot be
+        # closed ("Unread result found"), so read the rest off the
+        # connection, best effort
+        try:
+            while cursor.fetchmany(fetch_size):
+                pass
+            cursor.close()
+        except Exception:
+            pass
+        raise
+    except BaseException:
+        # the query or a fetch failed: leave the rest of the result, and
+        # do not let close() replace the error being raised
+        try:
+            cursor.close()
+        except Exception:
+            pass
+        raise
+    cursor.close()
+
+
+def _page(mydb, name: str, args: tuple, page_size: int, token: Optional[str]):
+    if page_size < 1:
+        raise ValueError("page_size must be at least 1")
+    after = decode_token(token) if token is not None else None
+    # one extra row tells whether there is a next page
+    sql, params, width, key_positions = _build(name, args, after, page_size + 1)
+    cursor = mydb.cursor()
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+    next_token = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_token = encode_token(rows[-1][i] for i in key_positions)
+    return [tuple(row[:width]) for row in rows], next_token
+
+
+def _single(rows):
+    return [row[0] for row in rows]
+
+
+# iter_*: one query, streamed
+
+def iter_most_prolific_individual_artists(mydb, year_range, n: int = None,
+                                          fetch_size: int = FETCH_SIZE) -> Iterator[Tuple[str, int]]:
+    return _iter(mydb, "most_prolific_individual_artists", _date_range(year_range), n, fetch_size)
+
+
+def iter_artists_last_single_in_year(mydb, year: int, fetch_size: int = FETCH_SIZE) -> Iterator[str]:
+    for row in _iter(mydb, "artists_last_single_in_year", _date_range((year, year)), None, fetch_size):
+        yield row[0]
+
+
+def iter_top_song_genres(mydb, n: int = None, fetch_size: int = FETCH_SIZE) -> Iterator[Tuple[str, int]]:
+    return _iter(mydb, "top_song_genres", (), n, fetch_size)
+
+
+def iter_album_and_single_artists(mydb, fetch_size: int = FETCH_SIZE) -> Iterator[str]:
+    for row in _iter(mydb, "album_and_single_artists", (), None, fetch_size):
+        yield row[0]
+
+
+def iter_most_rated_songs(mydb, year_range, n: int = None,
+                          fetch_size: int = FETCH_SIZE) -> Iterator[Tuple[str, str, int]]:
+    return _iter(mydb, "most_rated_songs", _date_range(year_range), n, fetch_size)
+
+
+def iter_most_engaged_users(mydb, year_range, n: int = None,
+                            fetch_size: int = FETCH_SIZE) -> Iterator[Tuple[str, int]]:
+    return _iter(mydb, "most_engaged_users", _date_range(year_range), n, fetch_size)
+
+
+# *_page: (rows, next token or None)
+
+def most_prolific_individual_artists_page(mydb, year_range, page_size: int = 100,
+                                          token: str = None) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+    return _page(mydb, "most_prolific_individual_artists", _date_range(year_range), page_size, token)
+
+
+def artists_last_single_in_year_page(mydb, year: int, page_size: int = 100,
+                                     token: str = None) -> Tuple[List[str], Optional[str]]:
+    rows, next_token = _page(mydb, "artists_last_single_in_year", _date_range((year, year)), page_size, token)
+    return _single(rows), next_token
+
+
+def top_song_genres_page(mydb, page_size: int = 100,
+                         token: str = None) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+    return _page(mydb, "top_song_genres", (), page_size, token)
+
+
+def album_and_single_artists_page(mydb, page_size: int = 100,
+                                  token: str = None) -> Tuple[List[str], Optional[str]]:
+    rows, next_token = _page(mydb, "album_and_single_artists", (), page_size, token)
+    return _single(rows), next_token
+
+
+def most_rated_songs_page(mydb, year_range, page_size: int = 100,
+                          token: str = None) -> Tuple[List[Tuple[str, str, int]], Optional[str]]:
+    return _page(mydb, "most_rated_songs", _date_range(year_range), page_size, token)
+
+
+def most_engaged_users_page(mydb, year_range, page_size: int = 100,
+                            token: str = None) -> Tuple[List[Tuple[str, int]], Optional[str]]:
+    return _page(mydb, "most_engaged_users", _date_range(year_range), page_size, token)
@@ -0,0 +1,162 @@
+"""
+Maintenance for the summary tables from migrations/002_summary_tables.sql
+and migrations/004_artist_single_stats.sql.
+
+The tables are kept current by triggers; these functions recompute them
+from the base tables (rebuild) or compare the two (check), e.g. after
+rows were removed by ON DELETE CASCADE, which does not fire triggers.
+Summary tables whose migration has not been applied are skipped.
+
+Usage:
+    python music_db_summaries.py check   --user mk2605 --password ...
+    python music_db_summaries.py rebuild --user mk2605 --password ...
+"""
+import argparse
+from typing import Dict, List, Tuple
+
+from music_db import collation_key
+
+# summary table -> (key columns, value columns, query computing them from base tables)
+# A row whose num_* values are all 0 counts as absent.
+SUMMARIES = {
+    "GenreSongCount": (
+        ("genre_id",), ("num_songs",),
+        "SELECT genre_id, COUNT(*) FROM SongGenre GROUP BY genre_id"
+    ),
+    "SongYearRatingCount": (
+        ("song_id", "year"), ("num_ratings",),
+        "SELECT song_id, YEAR(rating_date), COUNT(*) FROM Rating GROUP BY song_id, YEAR(rating_date)"
+    ),
+    "UserYearRatingCount": (
+        ("username", "year"), ("num_ratings",),
+        "SELECT username, YEAR(rating_date), COUNT(*) FROM Rating GROUP BY username, YEAR(rating_date)"
+    ),
+    "ArtistSingleStats": (
+        ("artist_name",), ("first_single", "last_single", "num_singles", "num_albums"),
+        """
+        SELECT a.name, MIN(s.release_date), MAX(s.release_date), COUNT(s.song_id),
+               (SELECT COUNT(*) FROM Album al WHERE al.artist_name = a.name)
+        FROM Artist a
+        LEFT JOIN Song s ON s.artist_name = a.name AND s.album_id IS NULL
+        GROUP BY a.name
+        """
+    ),
+}
+
+
+def _existing_summaries(cursor) -> List[str]:
+    """
+    The tables of SUMMARIES that exist in the current database.
+    """
+    cursor.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = DATABASE()
+    """)
+    existing = {row[0].lower() for row in cursor.fetchall()}
+    return [table for table in SUMMARIES if table.lower() in existing]
+
+
+def _key(row, width: int) -> tuple:
+    # names the database considers equal are the same key
+    return tuple(collation_key(v) if isinstance(v, str) else v for v in row[:width])
+
+
+def _values_by_key(rows, width: int, columns, shown_keys: dict) -> dict:
+    """
+    Maps the key of each row to its values, leaving out absent rows (all
+    num_* values 0). Records the first spelling of each key in shown_keys.
+    """
+    values_by_key = {}
+    for row in rows:
+        key = _key(row, width)
+        values = tuple(row[width:])
+        if any(value for column, value in zip(columns, values) if column.startswith("num_")):
+            shown_keys.setdefault(key, tuple(row[:width]))
+            values_by_key[key] = values
+    return values_by_key
+
+
+def _shown(values):
+    # count tables report a plain count, as before
+    return int(values[0]) if len(values) == 1 else values
+
+
+def rebuild_summaries(mydb):
+    """
+    Recomputes every summary table from the base tables in one transaction.
+    """
+    cursor = mydb.cursor()
+
+    for table in _existing_summaries(cursor):
+        keys, columns, query = SUMMARIES[table]
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f"INSERT INTO {table} ({', '.join(keys + columns)}) {query}")
+
+    mydb.commit()
+
+
+def check_summaries(mydb) -> Dict[str, List[Tuple[tuple, object, object]]]:
+    """
+    Compares every summary table with the values computed from the base tables.
+
+    Returns:
+        dict of table name -> list of (key, expected, stored) for each key
+        that differs, where expected and stored are the count for the
+        count tables and a tuple of all value columns otherwise. Absent
+        keys compare as 0 (or a tuple of None and 0). All lists are empty
+        if the summaries are consistent.
+    """
+    cursor = mydb.cursor()
+    mismatches = {}
+
+    for table in _existing_summaries(cursor):
+        keys, columns, query = SUMMARIES[table]
+        width = len(keys)
+        empty = tuple(0 if column.startswith("num_") else None for column in columns)
+
+        shown_keys = {}   # compared key -> key as stored
+
+        cursor.execute(f"SELECT {', '.join(keys + columns)} FROM {table}")
+        stored = _values_by_key(cursor.fetchall(), width, columns, shown_keys)
+        cursor.execute(query)
+        expected = _values_by_key(cursor.fetchall(), width, columns, shown_keys)
+
+        mismatches[table] = sorted(
+            ((shown_keys[key], _shown(expected.get(key, empty)), _shown(stored.get(key, empty)))
+             for key in expected.keys() | stored.keys()
+             if expected.get(key, empty) != stored.get(key, empty)),
+            key=lambda mismatch: mismatch[0]
+        )
+
+    return mismatches
+
+
+def main():
+    import mysql.connector
+
+    parser = argparse.ArgumentParser(description="Check or rebuild the music_db summary tables.")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--user", default="mk2605")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--database", default="musicdb")
+    args = parser.parse_args()
+
+    mydb = mysql.connector.connect(host=args.host, user=args.user,
+                                   password=args.password, database=args.database)
+    if args.command == "rebuild":
+        rebuild_summaries(mydb)
+        print("Summary tables rebuilt.")
+    else:
+        mismatches = check_summaries(mydb)
+        for table, rows in mismatches.items():
+            print(f"{table}: {'OK' if not rows else f'{len(rows)} mismatched keys'}")
+            for key, expected, stored in rows[:20]:
+                print(f"  {key}: expected {expected}, stored {stored}")
+        if any(mismatches.values()):
+            raise SystemExit(1)
+    mydb.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""
+In-memory snapshot of musicdb for batch reporting.
+
+MusicSnapshot reads the tables once, streaming them with fetchmany, and
+keeps them as NumPy columns, each filled a fetched block at a time:
+
+    songs:   song_id, artist code, release year, is-single flag (+ titles)
+    ratings: user code, song position, rating year
+    links:   song position, genre code   (SongGenre)
+    albums:  artist code
+
+The get_* methods take the same arguments as the music_db functions,
+minus `mydb`, and return the same results without touching the server.
+Names are interned by collation_key, so "Adele" and "ADELE" are one
+artist (or user, or genre) as in the SQL GROUP BYs, reported under the
+first spelling read (Artist and User rows are read first). Ties are
+ordered by the same key, matching the utf8mb4_0900_ai_ci collation the
+schema uses for ORDER BY name, and then by song_id.
+
+The snapshot does not see later writes; build a new one to refresh it.
+"""
+from typing import List, Set, Tuple
+
+import numpy as np
+
+from music_db import collation_key
+
+# Rows fetched per round trip while loading
+FETCH_SIZE = 10000
+
+
+def _stream(cursor, sql, fetch_size=FETCH_SIZE):
+    """
+    Runs `sql` and yields its rows, fetch_size at a time.
+    """
+    for block in _blocks(cursor, sql, fetch_size):
+        yield from zip(*block)
+
+
+def _blocks(cursor, sql, fetch_size=FETCH_SIZE):
+    """
+    Runs `sql` and yields its rows fetch_size at a time, as one tuple of
+    values per column.
+    """
+    cursor.execute(sql)
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            return
+        yield tuple(zip(*rows))
+
+
+def _concat(blocks: List[np.ndarray], dtype) -> np.ndarray:
+    return np.concatenate(blocks).astype(dtype, copy=False) if blocks else np.zeros(0, dtype=dtype)
+
+
+def _years(values) -> np.ndarray:
+    # the connector returns datetime.date, SQLite ISO text; NumPy parses both
+    days = np.asarray(values, dtype="datetime64[D]")
+    return days.astype("datetime64[Y]").astype(np.int64) + 1970
+
+
+class _Codes:
+    """
+    Interns strings to consecutive int codes; names the database considers
+    equal (same collation_key) share a code and the first spelling.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.names = []
+
+    def code(self, name):
+        key = collation_key(name)
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.names)
+            self.names.append(name)
+        return code
+
+    def code_block(self, names) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Interns a block of names, each distinct value once. Returns
+        (distinct values, their codes, index of each name's value), so
+        codes[inverse] are the codes of `names`.
+        """
+        distinct, first, inverse = np.unique(np.asarray(names, dtype=object),
+                                             return_index=True, return_inverse=True)
+        codes = np.zeros(len(distinct), dtype=np.int32)
+        for j in np.argsort(first).tolist():   # in order of appearance: first spelling wins
+            codes[j] = self.code(distinct[j])
+        return distinct, codes, inverse.reshape(-1)
+
+    def __len__(self):
+        return len(self.names)
+
+
+class MusicSnapshot:
+
+    def __init__(self, mydb, fetch_size=FETCH_SIZE):
+        """
+        Loads the snapshot from the database connection `mydb`.
+
+        Each fetchmany block becomes NumPy arrays as a whole: song_ids are
+        read in order, so a song's position is found with np.searchsorted
+        over them, and names are interned once per distinct value of a block.
+        """
+        cursor = mydb.cursor()
+        self.artists = _Codes()
+        self.genres = _Codes()
+        self.users = _Codes()
+
+        for (name,) in _stream(cursor, "SELECT name FROM Artist", fetch_size):
+            self.artists.code(name)
+        for (username,) in _stream(cursor, "SELECT username FROM User", fetch_size):
+            self.users.code(username)
+
+        genre_ids, genre_codes = [], []
+        for genre_id, name in _stream(cursor, "SELECT genre_id, name FROM Genre ORDER BY genre_id", fetch_size):
+            genre_ids.append(genre_id)
+            genre_codes.append(self.genres.code(name))
+        genre_ids = np.asarray(genre_ids, dtype=np.int64)
+        genre_codes = np.asarray(genre_codes, dtype=np.int32)
+
+        album_artists = []
+        for (names,) in _blocks(cursor, "SELECT artist_name FROM Album", fetch_size):
+            _, codes, inverse = self.artists.code_block(names)
+            album_artists.append(codes[inverse])
+
+        song_ids, song_artists, song_years, song_singles = [], [], [], []
+        self.song_titles = []
+        # song position -> artist_name as stored in Song, where it is not
+        # the artist's interned spelling (get_most_rated_songs returns it)
+        self.song_artist_spellings = {}
+        for ids, titles, artist_names, release_dates, singles in _blocks(
+                cursor, "SELECT song_id, title, artist_name, release_date, album_id IS NULL"
+                        " FROM Song ORDER BY song_id", fetch_size):
+            distinct, codes, inverse = self.artists.code_block(artist_names)
+            respelled = [j for j, name in enumerate(distinct.tolist())
+                         if name != self.artists.names[codes[j]]]
+            if respelled:
+                base = len(self.song_titles)
+                for pos in np.flatnonzero(np.isin(inverse, respelled)).tolist():
+                    self.song_artist_spellings[base + pos] = artist_names[pos]
+            song_ids.append(np.asarray(ids, dtype=np.int64))
+            self.song_titles.extend(titles)
+            song_artists.append(codes[inverse])
+            song_years.append(_years(release_dates))
+            song_singles.append(np.asarray(singles, dtype=bool))
+        self.song_id = _concat(song_ids, np.int64)   # ascending
+
+        link_songs, link_genres = [], []
+        for ids, link_genre_ids in _blocks(cursor, "SELECT song_id, genre_id FROM SongGenre", fetch_size):
+            link_songs.append(np.searchsorted(self.song_id, np.asarray(ids, dtype=np.int64)))
+            link_genres.append(genre_codes[np.searchsorted(genre_ids, np.asarray(link_genre_ids, dtype=np.int64))])
+
+        rating_users, rating_songs, rating_years = [], [], []
+        for usernames, ids, rating_dates in _blocks(
+                cursor, "SELECT username, song_id, rating_date FROM Rating", fetch_size):
+            _, codes, inverse = self.users.code_block(usernames)
+            rating_users.append(codes[inverse])
+            rating_songs.append(np.searchsorted(self.song_id, np.asarray(ids, dtype=np.int64)))
+            rating_years.append(_years(rating_dates))
+
+        self.song_artist = _concat(song_artists, np.int32)
+        self.song_year = _concat(song_years, np.int16)
+        self.song_single = _concat(song_singles, bool)
+        self.album_artist = _concat(album_artists, np.int32)
+        self.link_song = _concat(link_songs, np.int32)
+        self.link_genre = _concat(link_genres, np.int32)
+        self.rating_user = _concat(rating_users, np.int32)
+        self.rating_song = _concat(rating_songs, np.int32)
+        self.rating_year = _concat(rating_years, np.int16)
+
+    def nbytes(self) -> int:
+        """
+        Bytes held by the NumPy columns (strings not included).
+        """
+        return sum(getattr(self, name).nbytes for name in (
+            "song_id", "song_artist", "song_year", "song_single", "album_artist",
+            "link_song", "link_genre", "rating_user", "rating_song", "rating_year"))
+
+    @staticmethod
+    def _top_n(counts, n, sort_name, ids=None) -> List[int]:
+        """
+        Returns the indexes of the n largest nonzero counts, ordered by
+        count descending, then by collation_key(sort_name(index)) and then
+        by ids[index] (song_id) if given.
+        Only the candidates that can reach the top n are sorted in Python.
+        """
+        nonzero = np.flatnonzero(counts)
+        if n <= 0 or len(nonzero) == 0:
+            return []
+        if len(nonzero) > n:
+            # everything tied with the n-th largest count is a candidate
+            threshold = np.partition(counts[nonzero], len(nonzero) - n)[len(nonzero) - n]
+            nonzero = nonzero[counts[nonzero] >= threshold]
+        ranked = sorted(nonzero.tolist(), key=lambda i: (
+            -int(counts[i]), collation_key(sort_name(i)), 0 if ids is None else int(ids[i])))
+        return ranked[:n]
+
+    def _year_mask(self, years, year_range):
+        start_year, end_year = year_range
+        return (years >= start_year) & (years <= end_year)
+
+    def get_most_prolific_individual_artists(self, n: int, year_range: Tuple[int, int]) -> List[Tuple[str, int]]:
+        mask = self.song_single & self._year_mask(self.song_year, year_range)
+        counts = np.bincount(self.song_artist[mask], minlength=len(self.artists))
+        names = self.artists.names
+        return [(names[i], int(counts[i])) for i in self._top_n(counts, n, names.__getitem__)]
+
+    def get_artists_last_single_in_year(self, year: int) -> Set[str]:
+        last = np.full(len(self.artists), -1, dtype=np.int32)
+        np.maximum.at(last, self.song_artist[self.song_single], self.song_year[self.song_single])
+        return {self.artists.names[i] for i in np.flatnonzero(last == year)}
+
+    def get_top_song_genres(self, n: int) -> List[Tuple[str, int]]:
+        counts = np.bincount(self.link_genre, minlength=len(self.genres))
+        names = self.genres.names
+        return [(names[i], int(counts[i])) for i in self._top_n(counts, n, names.__getitem__)]
+
+    def get_album_and_single_artists(self) -> Set[str]:
+        has_single = np.zeros(len(self.artists), dtype=bool)
+        has_single[self.song_artist[self.song_single]] = True
+        has_album = np.zeros(len(self.artists), dtype=bool)
+        has_album[self.album_artist] = True
+        return {self.artists.names[i] for i in np.flatnonzero(has_single & has_album)}
+
+    def get_most_rated_songs(self, year_range: Tuple[int, int], n: int) -> List[Tuple[str, str, int]]:
+        mask = self._year_mask(self.rating_year, year_range)
+        counts = np.bincount(self.rating_song[mask], minlength=len(self.song_titles))
+        titles, names = self.song_titles, self.artists.names
+        return [(titles[i], self.song_artist_spellings.get(i, names[self.song_artist[i]]), int(counts[i]))
+                for i in self._top_n(counts, n, titles.__getitem__, self.song_id)]
+
+    def get_most_engaged_users(self, year_range: Tuple[int, int], n: int) -> List[Tuple[str, int]]:
+        mask = self._year_mask(self.rating_year, year_range)
+        counts = np.bincount(self.rating_user[mask], minlength=len(self.users))
+        names = self.users.names
+        return [(names[i], int(counts[i])) for i in self._top_n(counts, n, names.__getitem__)]
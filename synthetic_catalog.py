@@ -0,0 +1,152 @@
+"""
+Reproducible synthetic catalogs for benchmarking music_db.
+
+Everything is derived from `seed`, so two runs with the same settings load
+exactly the same rows. Artists are drawn from a Zipf distribution (a few
+artists own most songs), as are song popularity for ratings and genres.
+
+Rows are produced lazily in the shapes the loaders take, so large scales
+can be streamed straight into load_* without materializing the input.
+
+Example:
+    catalog = Catalog(songs=10_000, seed=42)
+    load_users(mydb, catalog.users())
+    load_single_songs(mydb, catalog.singles())
+    load_albums(mydb, catalog.albums())
+    load_song_ratings(mydb, catalog.ratings())
+"""
+import datetime
+import random
+from array import array
+from itertools import accumulate
+
+# Named scales for --scale in the benchmarks (number of songs)
+SCALES = {"small": 10_000, "medium": 1_000_000, "large": 10_000_000}
+
+
+class ZipfSampler:
+    """
+    Draws ranks 0..n-1 with probability proportional to 1 / (rank + 1) ** s.
+    """
+
+    def __init__(self, n, s, rng):
+        self.rng = rng
+        self.population = range(n)
+        self.cum_weights = list(accumulate(1.0 / (k + 1) ** s for k in range(n)))
+
+    def sample(self, k=1):
+        return self.rng.choices(self.population, cum_weights=self.cum_weights, k=k)
+
+    def one(self):
+        return self.sample(1)[0]
+
+
+class Catalog:
+    """
+    songs: total songs, split between singles and album tracks
+    album_fraction: share of songs that are album tracks
+    tracks_per_album: tracks on each album
+    artists, genres, users: pool sizes (defaults scale with songs)
+    ratings_per_song: average number of ratings per song
+    years: (first, last) year for release and rating dates
+    zipf_s: skew of the artist, genre and song popularity distributions
+    """
+
+    def __init__(self, songs=10_000, album_fraction=0.5, tracks_per_album=10,
+                 artists=None, genres=50, users=None, ratings_per_song=5,
+                 years=(1990, 2024), zipf_s=1.1, seed=42):
+        self.n_albums = int(songs * album_fraction) // tracks_per_album
+        self.n_singles = songs - self.n_albums * tracks_per_album
+        self.tracks_per_album = tracks_per_album
+        self.n_artists = artists or max(1, songs // 20)
+        self.n_genres = genres
+        self.n_users = users or max(1, songs // 10)
+        self.n_ratings = songs * ratings_per_song
+        self.years = years
+        self.zipf_s = zipf_s
+        self.seed = seed
+        self._first_day = datetime.date(years[0], 1, 1).toordinal()
+        self._n_days = datetime.date(years[1], 12, 31).toordinal() - self._first_day + 1
+        # artist of every song, by song number (singles first, then tracks)
+        self._song_artists = None
+
+    def _rng(self, stream):
+        # independent, reproducible stream per kind of row
+        return random.Random(f"{self.seed}:{stream}")
+
+    def _date(self, rng):
+        return datetime.date.fromordinal(self._first_day + rng.randrange(self._n_days)).isoformat()
+
+    @staticmethod
+    def artist_name(i):
+        return f"Artist {i:07d}"
+
+    @staticmethod
+    def genre_name(i):
+        return f"Genre {i:03d}"
+
+    @staticmethod
+    def username(i):
+        return f"user{i:08d}"
+
+    def _song_key(self, i):
+        """(artist_name, title) of song number i."""
+        artist = self.artist_name(self.song_artists()[i])
+        if i < self.n_singles:
+            return artist, f"Single {i:08d}"
+        album, track = divmod(i - self.n_singles, self.tracks_per_album)
+        return artist, f"Track {album:07d}-{track:02d}"
+
+    def song_artists(self):
+        """
+        Artist number of every song (singles, then album tracks), drawn
+        once from the Zipf distribution. All tracks of an album share it.
+        """
+        if self._song_artists is None:
+            rng = self._rng("artists")
+            zipf = ZipfSampler(self.n_artists, self.zipf_s, rng)
+            artists = array("i", zipf.sample(self.n_singles))
+            for album_artist in zipf.sample(self.n_albums):
+                artists.extend([album_artist] * self.tracks_per_album)
+            self._song_artists = artists
+        return self._song_artists
+
+    def users(self):
+        return (self.username(i) for i in range(self.n_users))
+
+    def singles(self):
+        rng = self._rng("singles")
+        genres = ZipfSampler(self.n_genres, self.zipf_s, rng)
+        artists = self.song_artists()
+        for i in range(self.n_singles):
+            names = tuple(dict.fromkeys(self.genre_name(g) for g in genres.sample(rng.randint(1, 3))))
+            yield (f"Single {i:08d}", names, self.artist_name(artists[i]), self._date(rng))
+
+    def albums(self):
+        rng = self._rng("albums")
+        genres = ZipfSampler(self.n_genres, self.zipf_s, rng)
+        artists = self.song_artists()
+        for a in range(self.n_albums):
+            first = self.n_singles + a * self.tracks_per_album
+            tracks = [f"Track {a:07d}-{t:02d}" for t in range(self.tracks_per_album)]
+            yield (f"Album {a:07d}", self.genre_name(genres.one()), self.artist_name(artists[first]),
+                   self._date(rng), tracks)
+
+    def ratings(self):
+        """
+        Ratings of Zipf-popular songs by uniformly drawn users. Some pairs
+        repeat, as in real feeds, and are rejected by load_song_ratings.
+        """
+        rng = self._rng("ratings")
+        n_songs = self.n_singles + self.n_albums * self.tracks_per_album
+        songs = ZipfSampler(n_songs, self.zipf_s, rng)
+        # shuffle popularity so popular songs are not just the first singles
+        order = list(range(n_songs))
+        rng.shuffle(order)
+        remaining = self.n_ratings
+        while remaining:
+            block = songs.sample(min(remaining, 1000))
+            remaining -= len(block)
+            for song in block:
+                yield (self.username(rng.randrange(self.n_users)), self._song_key(order[song]),
+                       rng.randint(1, 5), self._date(rng))
@@ -692,6 +692,592 @@ load_albums(mydb, album_with_multiple)
 cursor.execute("SELECT COUNT(*) FROM Song WHERE album_id IN (SELECT album_id FROM Album WHERE title = 'Album Multi')")
 assert_equal(cursor.fetchone()[0], 5, "Album with 5 songs all inserted")
 
+# Test 6: A string that is not a date, or a day the month does not have, is refused by the schema
+for bad_date in ("not a date", "2021-02-30"):
+    try:
+        cursor.execute("INSERT INTO Song (title, release_date, artist_name) VALUES ('Bad Date', %s, 'Artist')",
+                       (bad_date,))
+        bad_date_stored = True
+    except Exception:
+        bad_date_stored = False
+    mydb.rollback()
+    assert_false(bad_date_stored, f"Song with release_date {bad_date!r} is refused")
+
+print()
+
+# ============================================================================
+# PART 14: BULK LOADERS
+# ============================================================================
+print(f"{BOLD}[PART 14] BULK LOADERS{END}")
+print("-" * 80)
+
+clear_database(mydb)
+
+bulk_singles = [
+    ("Bulk 1", ("Pop", "Rock"), "Bulk Artist", "2020-01-01"),
+    ("Bulk 2", ("Pop",), "Bulk Artist", "2021-01-01"),
+    ("Bulk 1", ("Jazz",), "Bulk Artist", "2022-01-01"),  # duplicate inside the input
+    ("Bulk 3", (), "Other Artist", "2019-05-05"),
+]
+load_single_songs(mydb, [("Bulk 2", ("Pop",), "Bulk Artist", "2018-01-01")])
+rejects = load_single_songs(mydb, bulk_singles, bulk=True, batch_size=2)
+assert_equal(rejects, {("Bulk 1", "Bulk Artist"), ("Bulk 2", "Bulk Artist")},
+             "Bulk singles reject existing and repeated songs")
+assert_equal(get_table_count("Song"), 3, "Bulk singles insert only new songs")
+cursor.execute("""
+    SELECT COUNT(*) FROM SongGenre sg
+    JOIN Song s ON sg.song_id = s.song_id
+    WHERE s.title = 'Bulk 1'
+""")
+assert_equal(cursor.fetchone()[0], 2, "Bulk singles link genres of the first occurrence")
+
+bulk_albums = [
+    ("Bulk Album", "Rock", "Bulk Artist", "2022-06-01", ["Bulk 1", "Track A", "Track B"]),
+    ("Bulk Album", "Rock", "Bulk Artist", "2022-07-01", ["Track C"]),  # duplicate album
+]
+rejects = load_albums(mydb, bulk_albums, bulk=True)
+assert_equal(rejects, {("Bulk Album", "Bulk Artist")}, "Bulk albums reject repeated album")
+cursor.execute("SELECT title FROM Song WHERE album_id IS NOT NULL ORDER BY title")
+assert_equal([row[0] for row in cursor.fetchall()], ["Track A", "Track B"],
+             "Bulk albums skip conflicting tracks and tracks of rejected albums")
+
+load_users(mydb, ["bulk_user", "other_user"])
+bulk_ratings = [
+    ("bulk_user", ("Bulk Artist", "Bulk 2"), 5, "2023-01-01"),
+    ("bulk_user", ("Bulk Artist", "Bulk 2"), 4, "2023-01-02"),   # (c) rated earlier in the input
+    ("ghost", ("Bulk Artist", "Bulk 2"), 3, "2023-01-01"),       # (a) unknown user
+    ("other_user", ("Bulk Artist", "Nope"), 3, "2023-01-01"),    # (b) unknown song
+    ("other_user", ("Bulk Artist", "Track A"), 9, "2023-01-01"), # (d) out of range
+    ("other_user", ("Bulk Artist", "Track A"), 2, "2023-01-01"),
+]
+rejects = load_song_ratings(mydb, bulk_ratings, bulk=True, batch_size=4)
+assert_equal(rejects, {("bulk_user", "Bulk Artist", "Bulk 2"), ("ghost", "Bulk Artist", "Bulk 2"),
+                       ("other_user", "Bulk Artist", "Nope"), ("other_user", "Bulk Artist", "Track A")},
+             "Bulk ratings reject all four reasons")
+assert_equal(get_table_count("Rating"), 2, "Bulk ratings insert valid rows")
+
+class CollectingSink:
+    def __init__(self):
+        self.items = []
+
+    def add(self, item):
+        self.items.append(item)
+
+sink = CollectingSink()
+streamed = ((f"Stream {i % 3}", ("Pop",), "Stream Artist", "2020-01-01") for i in range(6))
+load_single_songs(mydb, streamed, commit_every=2, reject_sink=sink)
+assert_equal(len(sink.items), 3, "Streaming loader passes every reject to the sink")
+
+print()
+
+# ============================================================================
+# PART 15: POOLED FACADE
+# ============================================================================
+print(f"{BOLD}[PART 15] POOLED FACADE{END}")
+print("-" * 80)
+
+from concurrent.futures import ThreadPoolExecutor
+from music_db_pool import MusicDB, PooledPreparedCursor
+
+pooled = MusicDB(host="localhost", user="mk2605", password="mypassword",
+                 database="musicdb", pool_size=3)
+mydb.commit()
+expected = get_top_song_genres(mydb, 5)
+with ThreadPoolExecutor(max_workers=6) as executor:
+    results = list(executor.map(lambda _: pooled.get_top_song_genres(5), range(12)))
+assert_true(all(r == expected for r in results), "Concurrent pooled reads match direct reads")
+assert_equal(pooled.load_users(["pool_user", "pool_user"]), {"pool_user"},
+             "Pooled load_users rejects duplicate")
+assert_equal(pooled.load_users(["pool_prepared", "pool_prepared"], prepared=True), {"pool_prepared"},
+             "Pooled prepared load_users rejects duplicate")
+with pooled.transaction() as conn:
+    assert_false(isinstance(conn.cursor(), PooledPreparedCursor),
+                 "Pooled connections hand out plain cursors by default")
+pooled.close()
+
+from music_db_cache import ResultCache
+
+cached = MusicDB(host="localhost", user="mk2605", password="mypassword",
+                 database="musicdb", pool_size=2, cache=ResultCache())
+cached.load_single_songs([("Cache Song 1", ("Cache Genre",), "Cache Artist", "2020-01-01")])
+assert_equal(dict(cached.get_top_song_genres(100)).get("Cache Genre"), 1,
+             "Cached read before a transaction")
+with cached.transaction() as conn:
+    load_single_songs(conn, [("Cache Song 2", ("Cache Genre",), "Cache Artist", "2020-02-01")])
+assert_equal(dict(cached.get_top_song_genres(100)).get("Cache Genre"), 2,
+             "Cached read sees a write made in a transaction")
+cached.close()
+
+print()
+
+# ============================================================================
+# PART 16: INSTRUMENTATION
+# ============================================================================
+print(f"{BOLD}[PART 16] INSTRUMENTATION{END}")
+print("-" * 80)
+
+from music_db_instrument import Instrumentation, InstrumentedMusicDB, normalize_sql
+
+instrumentation = Instrumentation(slow_ms=None)
+instrumented = InstrumentedMusicDB(mydb, instrumentation)
+assert_equal(instrumented.get_top_song_genres(5), get_top_song_genres(mydb, 5),
+             "Instrumented call returns the same result")
+instrumented.load_users(["instr_a", "instr_b", "instr_c"])
+last = instrumentation.stats()["last_calls"]["load_users"]
+assert_equal(last["statements"], 3, "One statement per user counted")
+assert_equal(normalize_sql("INSERT INTO T VALUES (%s, %s), (%s, %s)"), "INSERT INTO T VALUES (%s, %s), ...",
+             "Multi-row VALUES normalized to one group")
+assert_true('music_db_calls_total{function="load_users"} 1' in instrumentation.prometheus_text(),
+            "Prometheus text includes call counter")
+
+print()
+
+# ============================================================================
+# PART 17: PARALLEL LOADERS
+# ============================================================================
+print(f"{BOLD}[PART 17] PARALLEL LOADERS{END}")
+print("-" * 80)
+
+from functools import partial
+from music_db_backends import connect
+from music_db_parallel import load_single_songs_parallel, shard_of
+
+assert_equal(shard_of("Parallel Artist", 8), shard_of("PARALLEL ARTIST", 8),
+             "Names equal under the collation share a shard")
+parallel_songs = [
+    ("Parallel Song 1", ("Parallel Genre",), "Parallel Artist A", "2021-01-01"),
+    ("Parallel Song 2", ("Parallel Genre",), "Parallel Artist B", "2021-01-01"),
+    ("Parallel Song 1", ("Parallel Genre",), "PARALLEL ARTIST A", "2021-02-01"),
+]
+mydb.commit()
+parallel_rejects = load_single_songs_parallel(
+    partial(connect, "mysql", host="localhost", user="mk2605", password="mypassword", database="musicdb"),
+    parallel_songs, workers=2)
+assert_equal(parallel_rejects, {("Parallel Song 1", "PARALLEL ARTIST A")},
+             "Parallel load rejects the same duplicate as the serial loader")
+
+print()
+
+# ============================================================================
+# PART 18: ASYNC API
+# ============================================================================
+print(f"{BOLD}[PART 18] ASYNC API{END}")
+print("-" * 80)
+
+import asyncio
+from music_db_async import AsyncMusicDB
+
+
+async def async_dashboard():
+    async with AsyncMusicDB(host="localhost", user="mk2605", password="mypassword",
+                            database="musicdb", pool_size=3) as async_db:
+        return await asyncio.gather(
+            async_db.get_top_song_genres(5),
+            async_db.get_most_rated_songs((2000, 2025), 5),
+            async_db.get_most_engaged_users((2000, 2025), 5),
+        )
+
+mydb.commit()
+assert_equal(asyncio.run(async_dashboard()),
+             [get_top_song_genres(mydb, 5), get_most_rated_songs(mydb, (2000, 2025), 5),
+              get_most_engaged_users(mydb, (2000, 2025), 5)],
+             "Concurrent async queries match the synchronous functions")
+
+print()
+
+# ============================================================================
+# PART 19: TRUNCATE CLEAR
+# ============================================================================
+print(f"{BOLD}[PART 19] TRUNCATE CLEAR{END}")
+print("-" * 80)
+
+load_single_songs(mydb, [("Truncate Song", ("Truncate Genre",), "Truncate Artist", "2020-01-01")])
+clear_database(mydb, truncate=True)
+cursor = mydb.cursor()
+cursor.execute("SELECT COUNT(*) FROM Song")
+assert_equal(cursor.fetchone()[0], 0, "Truncate empties Song")
+load_single_songs(mydb, [("Truncate Song", ("Truncate Genre",), "Truncate Artist", "2020-01-01")])
+cursor.execute("SELECT genre_id FROM Genre WHERE name = 'Truncate Genre'")
+assert_equal(cursor.fetchone()[0], 1, "Truncate resets AUTO_INCREMENT")
+cursor.execute("SELECT @@foreign_key_checks")
+assert_equal(cursor.fetchone()[0], 1, "Foreign key checks restored")
+
+print()
+
+# ============================================================================
+# PART 20: DIMENSION CACHE
+# ============================================================================
+print(f"{BOLD}[PART 20] DIMENSION CACHE{END}")
+print("-" * 80)
+
+import music_db
+
+clear_database(mydb)
+load_single_songs(mydb, [("Cache Song 1", ("Cache Genre",), "Cache Artist", "2020-01-01")])
+instrumentation = Instrumentation(slow_ms=None)
+InstrumentedMusicDB(mydb, instrumentation).load_single_songs(
+    [("Cache Song 2", ("Cache Genre",), "Cache Artist", "2020-01-01")])
+dimension_statements = [sql for sql in instrumentation.stats()["statements"]
+                        if "Artist(name)" in sql or "Genre(name)" in sql or "FROM Genre" in sql]
+assert_equal(dimension_statements, [], "Second load makes no dimension lookups")
+clear_database(mydb)
+assert_equal(music_db.DIMENSIONS.stats()["databases"], 0, "clear_database invalidates the dimension cache")
+
+assert_true(music_db.DIMENSIONS.stats()["databases"] <= music_db.DIMENSIONS.maxdatabases,
+            "Dimension cache keeps a bounded number of databases")
+
+print()
+
+# ============================================================================
+# PART 21: STREAMING AND PAGINATED QUERIES
+# ============================================================================
+print(f"{BOLD}[PART 21] STREAMING AND PAGINATED QUERIES{END}")
+print("-" * 80)
+
+from music_db_stream import iter_most_engaged_users, most_engaged_users_page
+
+clear_database(mydb)
+load_users(mydb, [f"page_user{i}" for i in range(5)])
+load_single_songs(mydb, [(f"Page Song {i}", ("Pop",), "Page Artist", "2020-01-01") for i in range(3)])
+load_song_ratings(mydb, [(f"page_user{u}", ("Page Artist", f"Page Song {s}"), 4, "2020-06-01")
+                         for u in range(5) for s in range(u % 3 + 1)])
+expected = get_most_engaged_users(mydb, (2020, 2020), 10)
+assert_equal(list(iter_most_engaged_users(mydb, (2020, 2020), fetch_size=2)), expected,
+             "Streaming generator matches get_most_engaged_users")
+paged, token = [], None
+while True:
+    page, token = most_engaged_users_page(mydb, (2020, 2020), page_size=2, token=token)
+    paged += page
+    if token is None:
+        break
+assert_equal(paged, expected, "Keyset pages concatenate to the full ranking")
+for row in iter_most_engaged_users(mydb, (2020, 2020), fetch_size=1):
+    break
+assert_equal(get_most_engaged_users(mydb, (2020, 2020), 10), expected,
+             "Connection is usable after leaving a streaming loop early")
+
+print()
+
+# ============================================================================
+# PART 22: CONFLICT CHECKING
+# ============================================================================
+print(f"{BOLD}[PART 22] CONFLICT CHECKING{END}")
+print("-" * 80)
+
+from music_db import LoadError
+
+clear_database(mydb)
+replay = [("Replay Song", ("Pop",), "Replay Artist", "2020-01-01"),
+          ("Replay Song 2", ("Pop",), "Replay Artist", "2020-01-01")]
+load_single_songs(mydb, replay[:1])
+stats = {}
+rejects = load_single_songs(mydb, replay + replay, conflicts="check", stats=stats)
+assert_equal(rejects, {("Replay Song", "Replay Artist"), ("Replay Song 2", "Replay Artist")},
+             "conflicts='check' rejects the same songs")
+assert_equal(stats, {"inserted": 1, "duplicate": 3}, "Per-reason counts for singles")
+stats = {}
+load_albums(mydb, [("Replay Album", "Pop", "Replay Artist", "2021-01-01", ["Replay Song", "Album Track"])] * 2,
+            conflicts="check", stats=stats)
+assert_equal(stats, {"inserted": 1, "duplicate_album": 1, "tracks_inserted": 1, "duplicate_track": 1},
+             "Per-reason counts for albums")
+try:
+    load_single_songs(mydb, [("Replay Song 3", ("Pop",), "Replay Artist", None)], conflicts="check")
+    assert_true(False, "A row failing for another reason raises LoadError")
+except LoadError:
+    assert_true(True, "A row failing for another reason raises LoadError")
+mydb.rollback()
+
+clear_database(mydb)
+load_single_songs(mydb, replay[:1])
+stats = {}
+rejects = load_single_songs(mydb, replay + replay + [("Replay Song 3", ("Pop",), "Replay Artist", None)],
+                            stats=stats)
+assert_equal(len(rejects), 3, "conflicts='exception' still rejects every failing row")
+assert_equal(stats, {"inserted": 1, "duplicate": 3, "insert_failed": 1},
+             "conflicts='exception' tells duplicates from other failures")
+
+print()
+
+# ============================================================================
+# PART 23: RATING UPSERT
+# ============================================================================
+print(f"{BOLD}[PART 23] RATING UPSERT{END}")
+print("-" * 80)
+
+clear_database(mydb)
+load_users(mydb, ["upsert_user"])
+load_single_songs(mydb, [("Upsert Song", ("Pop",), "Upsert Artist", "2020-01-01"),
+                         ("Upsert Song 2", ("Pop",), "Upsert Artist", "2020-01-01")])
+load_song_ratings(mydb, [("upsert_user", ("Upsert Artist", "Upsert Song"), 3, "2021-05-01")])
+feed = [
+    ("upsert_user", ("Upsert Artist", "Upsert Song"), 5, "2021-06-01"),     # newer: updated
+    ("upsert_user", ("Upsert Artist", "Upsert Song"), 1, "2021-01-01"),     # older: ignored
+    ("upsert_user", ("Upsert Artist", "Upsert Song 2"), 4, "2021-06-01"),   # new
+    ("upsert_user", ("Upsert Artist", "No Such Song"), 4, "2021-06-01"),    # rejected
+]
+stats = {}
+rejects = load_song_ratings(mydb, feed, upsert=True, stats=stats)
+assert_equal(rejects, {("upsert_user", "Upsert Artist", "No Such Song")}, "Upsert only rejects invalid ratings")
+assert_equal(stats, {"updated": 1, "inserted": 1, "rejected": 1}, "Upsert counts one outcome per pair")
+cursor = mydb.cursor()
+cursor.execute("""
+    SELECT s.title, r.rating_value FROM Rating r JOIN Song s ON r.song_id = s.song_id
+    ORDER BY s.title
+""")
+assert_equal([tuple(row) for row in cursor.fetchall()], [("Upsert Song", 5), ("Upsert Song 2", 4)],
+             "Latest rating by rating_date wins")
+stats = {}
+load_song_ratings(mydb, feed, upsert=True, stats=stats)
+assert_equal(stats.get("inserted", 0) + stats.get("updated", 0), 0, "Replaying the feed changes nothing")
+same_day = [
+    ("upsert_user", ("Upsert Artist", "Upsert Song"), 2, "2021-6-1"),      # same day, unpadded
+    ("upsert_user", ("Upsert Artist", "Upsert Song"), 5, "2021-06-01"),    # back to the stored rating
+]
+stats = {}
+load_song_ratings(mydb, same_day, upsert=True, stats=stats)
+assert_equal(stats, {"unchanged": 1}, "Same-day repeats that end at the stored rating are unchanged")
+
+print()
+
+# ============================================================================
+# PART 24: MULTI-RANGE ANALYTICS
+# ============================================================================
+print(f"{BOLD}[PART 24] MULTI-RANGE ANALYTICS{END}")
+print("-" * 80)
+
+from music_db import (get_most_engaged_users_for_ranges, get_most_prolific_individual_artists_for_ranges,
+                      get_most_rated_songs_for_ranges)
+
+clear_database(mydb)
+load_users(mydb, [f"range_user{i}" for i in range(4)])
+load_single_songs(mydb, [(f"Range Song {i}", ("Pop",), f"Range Artist {i % 3}", f"{2018 + i % 4}-03-01")
+                         for i in range(12)])
+load_song_ratings(mydb, [(f"range_user{u}", (f"Range Artist {s % 3}", f"Range Song {s}"), 3, f"{2018 + (u + s) % 4}-07-01")
+                         for u in range(4) for s in range(12) if (u + s) % 3])
+ranges = [(2018, 2018), (2019, 2019), (2020, 2021), (2018, 2021), (2030, 2031)]
+artists = get_most_prolific_individual_artists_for_ranges(mydb, 2, ranges)
+songs = get_most_rated_songs_for_ranges(mydb, ranges, 3)
+users = get_most_engaged_users_for_ranges(mydb, ranges, 2)
+assert_true(all(artists[r] == [tuple(row) for row in get_most_prolific_individual_artists(mydb, 2, r)] for r in ranges),
+            "Batched prolific artists match the single-range function")
+assert_true(all(songs[r] == [tuple(row) for row in get_most_rated_songs(mydb, r, 3)] for r in ranges),
+            "Batched most rated songs match the single-range function")
+assert_true(all(users[r] == [tuple(row) for row in get_most_engaged_users(mydb, r, 2)] for r in ranges),
+            "Batched engaged users match the single-range function")
+assert_equal(songs[(2030, 2031)], [], "A range without data gives an empty list")
+reversed_ranges = [(2021, 2020), (2019, 2018)]
+assert_equal(get_most_rated_songs_for_ranges(mydb, reversed_ranges, 3),
+             {r: [tuple(row) for row in get_most_rated_songs(mydb, r, 3)] for r in reversed_ranges},
+             "Only reversed ranges give empty lists like the single-range function")
+assert_equal(get_most_engaged_users_for_ranges(mydb, [(2021, 2020)], 2), {(2021, 2020): []},
+             "Reversed range gives no engaged users")
+assert_equal(get_most_prolific_individual_artists_for_ranges(mydb, 2, [(2021, 2020)]), {(2021, 2020): []},
+             "Reversed range gives no prolific artists")
+
+print()
+
+# ============================================================================
+# PART 25: ARTIST SINGLE STATS
+# ============================================================================
+print(f"{BOLD}[PART 25] ARTIST SINGLE STATS{END}")
+print("-" * 80)
+
+from music_db_summaries import check_summaries
+
+cursor = mydb.cursor()
+cursor.execute("""
+    SELECT table_name FROM information_schema.tables
+    WHERE table_schema = DATABASE()
+""")
+if "artistsinglestats" in {row[0].lower() for row in cursor.fetchall()}:
+    clear_database(mydb)
+    load_single_songs(mydb, [("Stats Single", ("Pop",), "Stats Artist", "2019-04-01"),
+                             ("Stats Single 2", ("Pop",), "Stats Artist", "2021-04-01"),
+                             ("Stats Single 3", ("Pop",), "Stats Other", "2021-04-01")])
+    load_albums(mydb, [("Stats Album", "Pop", "Stats Artist", "2020-01-01", ["Stats Track"])])
+    assert_equal(get_artists_last_single_in_year(mydb, 2021, use_summaries=True),
+                 get_artists_last_single_in_year(mydb, 2021), "Last single year from ArtistSingleStats")
+    assert_equal(get_album_and_single_artists(mydb, use_summaries=True),
+                 get_album_and_single_artists(mydb), "Album and single artists from ArtistSingleStats")
+    cursor.execute("DELETE FROM Song WHERE title = 'Stats Single 2'")
+    mydb.commit()
+    assert_equal(get_artists_last_single_in_year(mydb, 2019, use_summaries=True), {"Stats Artist"},
+                 "Deleting the last single moves the artist back to 2019")
+    assert_equal(check_summaries(mydb)["ArtistSingleStats"], [], "Triggers keep ArtistSingleStats consistent")
+else:
+    print("ArtistSingleStats not found, apply migrations/004_artist_single_stats.sql (skipped)")
+
+print()
+
+# ============================================================================
+# PART 26: CATALOG INDEX
+# ============================================================================
+print(f"{BOLD}[PART 26] CATALOG INDEX{END}")
+print("-" * 80)
+
+from music_db_index import CatalogIndex
+
+clear_database(mydb)
+load_users(mydb, ["index_user"])
+load_single_songs(mydb, [("Index Song", ("Pop",), "Index Artist", "2020-01-01")])
+index = CatalogIndex.load(mydb)
+assert_equal(index.song_id("INDEX SONG", "index artist"), index.song_id("Index Song", "Index Artist"),
+             "Index compares names like the database")
+assert_equal(index.song_id("Index Song", "Other Artist"), None, "Unknown song is not in the index")
+cursor.execute("SELECT song_id FROM Song WHERE title = %s AND artist_name = %s", ("Índex Song", "Index Artist"))
+row = cursor.fetchone()
+assert_equal(index.song_id("Índex Song", "Index Artist"), row[0] if row else None,
+             "Index matches accents as the database does")
+try:
+    load_song_ratings(mydb, [], bulk=True, index=CatalogIndex(key=str))
+    foreign_index_refused = False
+except ValueError:
+    foreign_index_refused = True
+assert_true(foreign_index_refused, "Loaders refuse an index that compares names differently")
+load_albums(mydb, [("Index Album", "Rock", "Index Artist", "2021-01-01", ["Index Track", "Index Song"])],
+            bulk=True, index=index)
+assert_equal(len(index), 2, "Loaders add the songs they insert to the index")
+feed = [
+    ("index_user", ("Index Artist", "Index Track"), 4, "2021-02-01"),
+    ("index_user", ("Index Artist", "No Such Song"), 4, "2021-02-01"),
+]
+assert_equal(load_song_ratings(mydb, feed, bulk=True, index=index),
+             load_song_ratings(mydb, feed, bulk=True) - {("index_user", "Index Artist", "Index Track")},
+             "Ratings resolved in the index reject the same songs")
+
+def failing_singles():
+    yield ("Index Rolled Back", ("Pop",), "Index Artist", "2021-01-01")
+    raise RuntimeError("input failed")
+
+try:
+    load_single_songs(mydb, failing_singles(), bulk=True, index=index)
+except RuntimeError:
+    mydb.rollback()
+assert_equal(index.song_id("Index Rolled Back", "Index Artist"), None,
+             "A rolled-back load adds nothing to the index")
+
+print()
+
+# ============================================================================
+# PART 27: SNAPSHOT QUERIES
+# ============================================================================
+print(f"{BOLD}[PART 27] SNAPSHOT QUERIES{END}")
+print("-" * 80)
+
+from music_snapshot import MusicSnapshot
+
+def folded(rows):
+    # SQL may report a group under any of its spellings
+    return [tuple(collation_key(v) if isinstance(v, str) else v for v in row) for row in rows]
+
+clear_database(mydb)
+load_users(mydb, ["snap_user", "other_user"])
+load_single_songs(mydb, [("Snap One", ("Pop",), "Snap Artist", "2020-01-01"),
+                         ("Snap Two", ("POP",), "SNAP ARTIST", "2020-06-01"),
+                         ("Snap Three", ("Rock",), "Lone Artist", "2020-03-01"),
+                         ("Snap Four", ("Rock",), "Third Artist", "2021-03-01"),
+                         ("Snap One", ("Rock",), "Third Artist", "2021-04-01")])
+load_albums(mydb, [("Snap Album", "pop", "snap artist", "2019-01-01", ["Snap Track"])])
+load_song_ratings(mydb, [("snap_user", ("Snap Artist", "Snap One"), 4, "2021-01-01"),
+                         ("SNAP_USER", ("SNAP ARTIST", "Snap Two"), 4, "2021-01-01"),
+                         ("other_user", ("Snap Artist", "Snap Track"), 4, "2021-01-01"),
+                         ("other_user", ("Lone Artist", "Snap Three"), 4, "2021-01-01"),
+                         ("other_user", ("Third Artist", "Snap One"), 4, "2021-01-01")])
+snapshot = MusicSnapshot(mydb)
+assert_equal(folded(snapshot.get_most_prolific_individual_artists(5, (2020, 2021))),
+             folded(get_most_prolific_individual_artists(mydb, 5, (2020, 2021))),
+             "Snapshot prolific artists group spellings like SQL")
+assert_equal({collation_key(a) for a in snapshot.get_artists_last_single_in_year(2020)},
+             {collation_key(a) for a in get_artists_last_single_in_year(mydb, 2020)},
+             "Snapshot last single year matches SQL")
+assert_equal(folded(snapshot.get_top_song_genres(5)), folded(get_top_song_genres(mydb, 5)),
+             "Snapshot top genres match SQL")
+assert_equal({collation_key(a) for a in snapshot.get_album_and_single_artists()},
+             {collation_key(a) for a in get_album_and_single_artists(mydb)},
+             "Snapshot album and single artists match SQL")
+assert_equal(snapshot.get_most_rated_songs((2021, 2021), 5),
+             [tuple(row) for row in get_most_rated_songs(mydb, (2021, 2021), 5)],
+             "Snapshot most rated songs match SQL, ties by song_id")
+assert_equal(folded(snapshot.get_most_engaged_users((2021, 2021), 5)),
+             folded(get_most_engaged_users(mydb, (2021, 2021), 5)),
+             "Snapshot engaged users group spellings like SQL")
+
+print()
+
+# ============================================================================
+# PART 28: FILE IMPORT
+# ============================================================================
+print(f"{BOLD}[PART 28] FILE IMPORT{END}")
+print("-" * 80)
+
+from music_db_import import import_albums, import_single_songs, import_song_ratings
+
+import_users = ["imp_user", "other_imp_user"]
+import_singles = [
+    ("Imp Song", ("Pop", "Rock"), "Imp Artist", "2020-01-01"),
+    ("IMP SONG", ("pop",), "imp artist", "2020-02-01"),             # case variant of the first
+    ("Imp Song 2", ("Jazz",), "Imp Artist", "2020-03-01"),
+    ("Imp Song 2", ("Jazz",), "Imp Artist", "2020-03-01"),          # repeated row
+    ("Imp Song", ("Pop",), "Other Imp Artist", "2021-01-01"),
+    ("L" * 301, ("Pop",), "Imp Artist", "2021-01-01"),                # title too long
+    ("Imp Dated", ("Pop",), "Imp Artist", "2021-02-30"),              # not a date
+    ("Imp Dated", ("Pop",), "Imp Artist", "2021-03-01"),              # so this one is new
+]
+import_album_rows = [
+    ("Imp Album", "ROCK", "Imp Artist", "2019-01-01", ["Imp Track", "Imp Song", "imp track"]),
+    ("imp album", "Pop", "IMP ARTIST", "2019-05-01", ["Other Track"]),   # case variant of the album
+    ("Imp Album 2", "Pop", "Other Imp Artist", "2019-06-01", ["Imp Track", "T" * 301]),
+    ("Imp Album 3", "G" * 51, "Imp Artist", "2019-07-01", ["Imp Track 3"]),   # genre too long
+]
+import_ratings = [
+    ("imp_user", ("Imp Artist", "Imp Song"), 5, "2021-01-01"),
+    ("IMP_USER", ("imp artist", "imp song"), 4, "2021-02-01"),          # same user and song again
+    ("imp_user", ("Imp Artist", "Imp Track"), 3, "2021-01-01"),
+    ("other_imp_user", ("Other Imp Artist", "Imp Song"), 6, "2021-01-01"),   # rating out of range
+    ("no_such_user", ("Imp Artist", "Imp Song"), 3, "2021-01-01"),
+    ("other_imp_user", ("Imp Artist", "No Such Song"), 3, "2021-01-01"),
+    ("other_imp_user", ("Imp Artist", "Imp Song 2"), 2, "2021-01-01"),
+]
+
+def catalog_state():
+    mydb.commit()
+    state = []
+    for sql in ["SELECT name FROM Artist", "SELECT name FROM Genre",
+                "SELECT title, artist_name, release_date FROM Album",
+                "SELECT s.title, s.artist_name, s.release_date, a.title FROM Song s "
+                "LEFT JOIN Album a ON s.album_id = a.album_id",
+                "SELECT s.title, s.artist_name, g.name FROM SongGenre sg "
+                "JOIN Song s ON sg.song_id = s.song_id JOIN Genre g ON sg.genre_id = g.genre_id",
+                "SELECT r.username, s.title, s.artist_name, r.rating_value, r.rating_date FROM Rating r "
+                "JOIN Song s ON r.song_id = s.song_id"]:
+        cursor.execute(sql)
+        state.append({tuple(str(v) if hasattr(v, "year") else v for v in row) for row in cursor.fetchall()})
+    return state
+
+def load_catalog(db, singles, albums, ratings):
+    clear_database(mydb)
+    load_users(mydb, import_users)
+    mydb.commit()
+    return singles(db, import_singles), albums(db, import_album_rows), ratings(db, import_ratings)
+
+cursor.execute("SELECT @@GLOBAL.local_infile")
+if int(cursor.fetchone()[0]):
+    import_db = mysql.connector.connect(host="localhost", user="mk2605", password="mypassword",
+                                        database="musicdb", allow_local_infile=True)
+    loaded = load_catalog(mydb, load_single_songs, load_albums, load_song_ratings)
+    loaded_state = catalog_state()
+    imported = load_catalog(import_db, import_single_songs, import_albums, import_song_ratings)
+    imported_state = catalog_state()
+    assert_equal(imported[0], loaded[0], "import_single_songs rejects the same singles")
+    assert_equal(imported[1], loaded[1], "import_albums rejects the same albums")
+    assert_equal(imported[2], loaded[2], "import_song_ratings rejects the same ratings")
+    for table, imported_rows, loaded_rows in zip(["Artist", "Genre", "Album", "Song", "SongGenre", "Rating"],
+                                                 imported_state, loaded_state):
+        assert_equal(imported_rows, loaded_rows, f"{table} rows match the Python loaders")
+    import_db.close()
+else:
+    print("local_infile is off on the server, run SET GLOBAL local_infile = 1 (skipped)")
+
 print()
 
 # ============================================================================
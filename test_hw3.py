@@ -1,8 +1,8 @@
-import mysql.connector
 from music_db import *
+from music_db_backends import connect
 
-# Connect to MySQL
-mydb = mysql.connector.connect(
+# Connect to MySQL (or SQLite with MUSICDB_BACKEND=sqlite)
+mydb = connect(
     host="localhost",
     user="mk2605",         # Change to your MySQL username
     password="mypassword",   # Change to your MySQL password